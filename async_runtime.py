@@ -0,0 +1,195 @@
+"""
+Asyncio runtime for the live game loop.
+
+The threaded loop in live_rsp.py polls: it blocks on the result queue,
+calls cv2.waitKey(1) once per frame, and the countdown only moves when a
+frame arrives, so a tick or the capture can land up to a frame late and a
+slow camera makes the beeps uneven. AsyncGameLoop runs the same work as
+coroutines and callbacks on one asyncio event loop instead:
+
+  frames    awaits the next processed frame through an executor thread (the
+            pipeline's blocking queue), updates the session and hands the
+            frame to the caller to draw and show
+  keys      pumps the window and reads the keyboard every `key_interval`
+            seconds (`idle_key_interval` while idle), independent of the
+            frame rate
+  timers    each countdown tick and the capture are loop.call_later callbacks
+            scheduled from session.next_deadline(), so they fire on the
+            second whether frames arrive at 60 fps, 5 fps or not at all
+  periodic  stats reports and anything else that runs every few seconds
+
+Camera reads and MediaPipe stay on the pipeline's own threads; only the
+waiting moves into the executor. OpenCV windows must be used from the
+thread that created them, so drawing, imshow and waitKey run on the event
+loop's thread. While the round waits for a player and no face is in view,
+the pipeline is throttled to `idle_fps` frames a second: the capture thread
+only grabs the frames in between without decoding them, so the conversion,
+the models and the drawing all run at that rate too, and every thread
+blocks in between. The first frame with a face lifts the throttle.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from metrics import StageTimer
+from phase_scheduler import IDLE
+
+
+class AsyncGameLoop:
+    """Drives a FramePipeline and a game session from an asyncio event loop"""
+
+    def __init__(self, pipeline, session, on_frame, on_events=None, on_key=None, periodic=(),
+                 key_interval=0.02, idle_fps=5, wait_timeout=0.5, metrics=None, idle_key_interval=0.1):
+        """
+        on_frame(packet, events, now): draw and show a frame; events includes any fired by timers since the last frame
+        on_events(events): react to events as they happen (audio cues), from frames and timers alike
+        on_key(key): handle a key press; returning False stops the loop
+        periodic: (interval seconds, callable) pairs run on a schedule
+        metrics: optional MetricsRegistry for the wait, game and frame stages
+        """
+        self.pipeline = pipeline
+        self.session = session
+        self.on_frame = on_frame
+        self.on_events = on_events
+        self.on_key = on_key
+        self.periodic = list(periodic)
+        self.key_interval = key_interval
+        self.idle_key_interval = idle_key_interval
+        self.idle_fps = idle_fps
+        self.wait_timeout = wait_timeout
+        self.metrics = metrics
+        self.error = None
+        self.timers_fired = 0
+        self.idle_periods = 0
+        self._idle = False
+        self._lateness = []
+        self._pending = []          # Timer events not yet seen by on_frame
+        self._timer = None
+        self._timer_deadline = None
+        self._stopped = None
+        self._loop = None
+
+    def run(self):
+        """Run until stopped by a key, by the pipeline ending, or by Ctrl+C"""
+        asyncio.run(self.main())
+
+    def stop(self):
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        # One thread is enough: it only ever waits on the result queue
+        executor = ThreadPoolExecutor(1, thread_name_prefix="frame-wait")
+        tasks = [asyncio.create_task(self._frames(executor)), asyncio.create_task(self._keys())]
+        tasks += [asyncio.create_task(self._every(interval, fn)) for interval, fn in self.periodic]
+        try:
+            await self._stopped.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._cancel_timer()
+            self._set_idle(False)
+            executor.shutdown(wait=True)
+
+    async def _frames(self, executor):
+        while True:
+            with StageTimer(self.metrics, "wait"):
+                packet = await self._loop.run_in_executor(executor, self.pipeline.next_packet, self.wait_timeout)
+            if packet is None:
+                if not self.pipeline.alive():
+                    self.stop()
+                    return
+                continue
+            try:
+                self._handle_frame(packet)
+            except Exception as e:
+                self.error = e
+                self.stop()
+                return
+
+    def _set_idle(self, idle):
+        """Throttle the whole pipeline to idle_fps while nobody is playing"""
+        if idle == self._idle:
+            return
+        self._idle = idle
+        self.idle_periods += idle
+        self.pipeline.throttle(self.idle_fps if idle else None)
+
+    def _handle_frame(self, packet):
+        now = time.time()
+        if self.idle_fps:
+            self._set_idle(not packet.results['face_boxes'] and self.session.phase(now) == IDLE)
+        with StageTimer(self.metrics, "frame"):
+            with StageTimer(self.metrics, "game"):
+                events = self.session.update(packet.results, now)
+            self._dispatch(events)
+            shown, self._pending = self._pending + events, []
+            self.on_frame(packet, shown, now)
+
+    def _dispatch(self, events):
+        if events and self.on_events is not None:
+            self.on_events(events)
+        self._schedule_timer()
+
+    def _schedule_timer(self):
+        """Keep exactly one callback scheduled, for the session's next countdown deadline"""
+        deadline = self.session.next_deadline()
+        if deadline == self._timer_deadline:
+            return
+        self._cancel_timer()
+        if deadline is not None:
+            self._timer_deadline = deadline
+            self._timer = self._loop.call_later(max(0.0, deadline - time.time()), self._on_timer, deadline)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._timer_deadline = None
+
+    def _on_timer(self, deadline):
+        self._timer = self._timer_deadline = None
+        now = time.time()
+        if now < deadline:
+            # The loop's monotonic clock and the wall clock can disagree by a fraction of a millisecond
+            self._timer_deadline = deadline
+            self._timer = self._loop.call_later(deadline - now, self._on_timer, deadline)
+            return
+        self.timers_fired += 1
+        self._lateness.append(now - deadline)
+        del self._lateness[:-100]
+        events = self.session.advance(now)
+        self._pending.extend(events)
+        if events and self.on_events is not None:
+            self.on_events(events)
+        # With nobody in view the countdown holds; the next frame with a player reschedules it
+        if self.session.next_deadline() != deadline:
+            self._schedule_timer()
+
+    async def _keys(self):
+        while True:
+            key = cv2.waitKey(1) & 0xFF
+            if key != 0xFF and self.on_key is not None:
+                if self.on_key(key) is False:
+                    self.stop()
+                    return
+                # A restart ends the countdown the timer was waiting for
+                self._schedule_timer()
+            # Nobody is playing while idle, so keys can wait a little longer
+            await asyncio.sleep(self.idle_key_interval if self._idle else self.key_interval)
+
+    async def _every(self, interval, fn):
+        while True:
+            await asyncio.sleep(interval)
+            fn()
+
+    def summary(self):
+        late = sorted(self._lateness)
+        lateness = f"p50 late {late[len(late) // 2] * 1000:.1f}ms" if late else "none yet"
+        skipped = self.pipeline.capture.skipped
+        return (f"Timers: {self.timers_fired} fired ({lateness}) | idle {self.idle_periods} times, "
+                f"{skipped} frames not decoded")
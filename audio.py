@@ -0,0 +1,199 @@
+"""
+Non-blocking sound cues.
+
+The countdown beeps used to shell out to sox on every frame, which forked two
+processes and stalled the frame loop for the length of the tone. Here every
+tone is synthesized once at start-up into a 16-bit PCM buffer, and play()
+only drops the cue's name on a queue; a dedicated audio thread hands the
+buffer to the output backend. When no audio output is available (or for
+headless runs) the null backend accepts cues and plays nothing.
+"""
+import io
+import platform
+import queue
+import shutil
+import subprocess
+import threading
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+
+# Cue name -> (frequency in Hz, duration in seconds)
+TONES = {
+    "tick": (1000, 0.2),    # One per countdown second, the game's original beep
+    "go": (1500, 0.3),      # Capture starts
+}
+
+
+def synthesize_tone(frequency, duration, sample_rate=SAMPLE_RATE, volume=0.5, fade=0.01):
+    """Sine tone as mono 16-bit PCM, with short fades so it starts and stops without clicks"""
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    tone = np.sin(2 * np.pi * frequency * t) * volume
+    ramp = min(len(t) // 2, int(fade * sample_rate))
+    if ramp:
+        envelope = np.linspace(0.0, 1.0, ramp)
+        tone[:ramp] *= envelope
+        tone[-ramp:] *= envelope[::-1]
+    return (tone * 32767).astype(np.int16)
+
+
+def wav_bytes(samples, sample_rate=SAMPLE_RATE):
+    """Wrap PCM samples in an in-memory WAV file"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class NullBackend:
+    """Plays nothing; for headless runs and machines without audio output"""
+
+    name = "null"
+
+    def prepare(self, samples, sample_rate):
+        return None
+
+    def play(self, sound):
+        pass
+
+    def close(self):
+        pass
+
+
+class SoundDeviceBackend:
+    """PortAudio output through the optional sounddevice package"""
+
+    name = "sounddevice"
+
+    def __init__(self):
+        import sounddevice
+        self.sd = sounddevice
+
+    def prepare(self, samples, sample_rate):
+        return samples, sample_rate
+
+    def play(self, sound):
+        samples, sample_rate = sound
+        self.sd.play(samples, sample_rate)
+        self.sd.wait()
+
+    def close(self):
+        self.sd.stop()
+
+
+class WinsoundBackend:
+    """Windows' built-in player, fed WAV data from memory"""
+
+    name = "winsound"
+
+    def __init__(self):
+        import winsound
+        self.winsound = winsound
+
+    def prepare(self, samples, sample_rate):
+        return wav_bytes(samples, sample_rate)
+
+    def play(self, sound):
+        # SND_MEMORY cannot be asynchronous, but this runs on the audio thread
+        self.winsound.PlaySound(sound, self.winsound.SND_MEMORY)
+
+    def close(self):
+        pass
+
+
+class PipeBackend:
+    """Streams raw PCM into one long-running aplay/pacat process instead of starting a player per cue"""
+
+    COMMANDS = {
+        "aplay": ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-c", "1", "-r", "{rate}", "-"],
+        "pacat": ["pacat", "--format=s16le", "--channels=1", "--rate={rate}"],
+    }
+
+    def __init__(self, program, sample_rate=SAMPLE_RATE):
+        self.name = program
+        command = [part.format(rate=sample_rate) for part in self.COMMANDS[program]]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def prepare(self, samples, sample_rate):
+        return samples.tobytes()
+
+    def play(self, sound):
+        self.process.stdin.write(sound)
+        self.process.stdin.flush()
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.terminate()
+
+
+def create_backend(name="auto", sample_rate=SAMPLE_RATE):
+    """Build the named backend; "auto" picks the first one that works on this machine"""
+    if name == "null":
+        return NullBackend()
+    candidates = ["sounddevice", "winsound", "aplay", "pacat"] if name == "auto" else [name]
+    for candidate in candidates:
+        try:
+            if candidate == "sounddevice":
+                return SoundDeviceBackend()
+            if candidate == "winsound" and platform.system() == "Windows":
+                return WinsoundBackend()
+            if candidate in PipeBackend.COMMANDS and shutil.which(candidate):
+                return PipeBackend(candidate, sample_rate)
+        except (ImportError, OSError):
+            continue    # Package missing or no audio device behind it
+    return NullBackend()
+
+
+class AudioEngine:
+    """Plays pre-synthesized cues on a dedicated thread so the frame loop never waits for sound"""
+
+    def __init__(self, backend="auto", tones=TONES, sample_rate=SAMPLE_RATE, max_pending=4):
+        self.backend = create_backend(backend, sample_rate) if isinstance(backend, str) else backend
+        self.sounds = {name: self.backend.prepare(synthesize_tone(freq, duration, sample_rate), sample_rate)
+                       for name, (freq, duration) in tones.items()}
+        self.played = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+        self._thread.start()
+
+    def play(self, name):
+        """Queue a cue and return immediately; cues are dropped if the audio thread falls behind"""
+        try:
+            self._queue.put_nowait(name)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            name = self._queue.get()
+            if name is None:
+                break
+            try:
+                self.backend.play(self.sounds[name])
+                self.played += 1
+            except Exception as exc:
+                # The output went away (device unplugged, player exited); keep the game silent
+                print(f"  ⚠️  Audio output {self.backend.name} failed ({exc}); continuing without sound")
+                try:
+                    self.backend.close()    # A pipe player would otherwise keep running until exit
+                except Exception:
+                    pass
+                self.backend = NullBackend()
+
+    def close(self):
+        try:
+            self._queue.put(None, timeout=1.0)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=1.0)
+        self.backend.close()
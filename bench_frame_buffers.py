@@ -0,0 +1,125 @@
+"""
+Frame buffer benchmark.
+
+Runs the part of the frame path that only moves pixels (camera read, mirror
+flip, downscale, RGB conversion and the display resize) two ways:
+
+  allocating  every step returns a new array, as the game loop used to
+  reused      the pooled camera frame is flipped in place, the downscaled frame
+              is resized into a FrameBuffers array and converted to RGB in place,
+              and the display frame is resized into its own reused array (dst=)
+
+and reports time per frame plus the arrays and megabytes allocated per
+frame, measured with tracemalloc. Camera reads are simulated by copying a
+synthetic frame, into a new array or into the pooled one.
+
+    python bench_frame_buffers.py
+    python bench_frame_buffers.py --resolution 1280x720 --frames 500 --json buffers.json
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from frame_pipeline import FrameBuffers, inference_size, prepare_inference_frame
+from hud import display_settings
+from inference_scheduler import percentile_ms
+
+MIN_ARRAY_BYTES = 64 * 1024     # Smaller allocations are Python objects, not frames
+
+
+def allocating_path(source, inference_height, display_size):
+    captured = source.copy()                # cap.read() returns a new array
+    frame = cv2.flip(captured, 1)
+    size = inference_size(frame.shape[1], frame.shape[0], inference_height)
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    display = cv2.resize(frame, display_size)
+    return captured, frame, small, rgb, display
+
+
+class ReusedPath:
+    """The same steps writing into arrays allocated once"""
+
+    def __init__(self):
+        self.buffers = FrameBuffers()
+
+    def __call__(self, source, inference_height, display_size):
+        frame = self.buffers.get("camera", source.shape)
+        np.copyto(frame, source)            # cap.read(frame) fills the pooled array
+        cv2.flip(frame, 1, dst=frame)
+        rgb = prepare_inference_frame(frame, inference_height, buffers=self.buffers)
+        display = cv2.resize(frame, display_size, dst=self.buffers.get("display", display_size[::-1] + (3,)))
+        return frame, rgb, display
+
+
+def allocations_per_frame(step, sources, *args):
+    """Mean (arrays, bytes) newly allocated by one call of step, once it has warmed up"""
+    step(sources[0], *args)
+    arrays = allocated = 0
+    tracemalloc.start()
+    try:
+        for source in sources:
+            before = tracemalloc.take_snapshot()
+            outputs = step(source, *args)
+            after = tracemalloc.take_snapshot()
+            # Each allocating step is one source line, so big lines count arrays
+            stats = [stat for stat in after.compare_to(before, 'lineno') if stat.size_diff >= MIN_ARRAY_BYTES]
+            arrays += len(stats)
+            allocated += sum(stat.size_diff for stat in stats)
+            del outputs
+    finally:
+        tracemalloc.stop()
+    return arrays / len(sources), allocated / len(sources)
+
+
+def time_per_frame(step, sources, frames, *args):
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        step(sources[i % len(sources)], *args)
+        times.append(time.perf_counter() - start)
+    return {'p50_ms': percentile_ms(times, 50), 'p95_ms': percentile_ms(times, 95)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocation and time per frame with and without reused buffers")
+    parser.add_argument("--resolution", default="1920x1080", help="Camera resolution WIDTHxHEIGHT")
+    parser.add_argument("--inference-height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=300, help="Timed frames per path")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.lower().split("x"))
+    display_width = display_settings(width)[0]
+    display_size = (display_width, int(display_width * height / width))
+    rng = np.random.default_rng(0)
+    sources = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+
+    results = {'resolution': [width, height], 'inference_height': args.inference_height,
+               'display': list(display_size)}
+    for name, step in (("allocating", allocating_path), ("reused", ReusedPath())):
+        arrays, allocated = allocations_per_frame(step, sources, args.inference_height, display_size)
+        timing = time_per_frame(step, sources, args.frames, args.inference_height, display_size)
+        results[name] = {'arrays_per_frame': arrays, 'mb_per_frame': allocated / 1e6, **timing}
+
+    print(f"🧮 Frame path at {width}x{height} (inference {args.inference_height}p, display {display_size[0]}px)")
+    for name in ("allocating", "reused"):
+        r = results[name]
+        print(f"  {name:10s} {r['arrays_per_frame']:4.1f} arrays {r['mb_per_frame']:6.1f} MB per frame | "
+              f"p50 {r['p50_ms']:.2f} ms p95 {r['p95_ms']:.2f} ms")
+    saved = results['allocating']['p50_ms'] - results['reused']['p50_ms']
+    print(f"  saved {results['allocating']['mb_per_frame'] - results['reused']['mb_per_frame']:.1f} MB "
+          f"and {saved:.2f} ms per frame")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
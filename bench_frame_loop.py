@@ -0,0 +1,257 @@
+"""
+Frame loop benchmark.
+
+Runs every stage of the game's frame loop over synthetic or recorded frames
+at each camera resolution the probe tries, and reports p50/p95/p99 latency
+per stage, loop throughput and peak memory. Stages run one after another on
+one thread so each number is that stage's own cost.
+
+    python bench_frame_loop.py --json baseline.json
+    python bench_frame_loop.py --video session.mp4 --baseline baseline.json
+    python bench_frame_loop.py --landmarks game.rpslog
+
+Synthetic frames contain no face or hand, so the models find nothing to
+classify. On those frames the classification stages (detect_emotion and
+get_hand_gesture) get landmark arrays from elsewhere: from a recorded
+session log with --landmarks, otherwise generated around one face and one
+hand. Real frames use what the models found, plus the log's landmarks on
+frames where they found nothing if --landmarks is given.
+
+With --baseline the run fails (exit code 1) when a stage's p95 or the FPS at
+any resolution is worse than the saved run by more than --tolerance.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from camera_probe import CANDIDATE_RESOLUTIONS
+from frame_analysis import create_solutions
+from frame_pipeline import inference_size
+from game_session import detect_emotion, get_hand_gesture
+from hand_tracking import HandRoiTracker
+from hud import HudCompositor, display_settings
+from inference_scheduler import percentile_ms
+from landmark_features import results_to_arrays
+from session_recorder import SessionLog
+
+STAGES = ["flip", "downscale", "cvtColor", "face_detection", "face_mesh", "hands",
+          "detect_emotion", "get_hand_gesture", "hud", "resize", "imshow"]
+PERCENTILES = (50, 95, 99)
+WARMUP_FRAMES = 5           # Untimed frames first; model start-up would otherwise dominate p99
+MIN_REGRESSION_MS = 0.5     # Ignore p95 changes smaller than this; tiny stages are mostly timer noise
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None when it cannot be read"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def load_frames(video, count, width, height):
+    """Frames at one camera resolution, from a recording or synthetic noise"""
+    if video:
+        cap = cv2.VideoCapture(video)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame.shape[1] != width or frame.shape[0] != height:
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            raise SystemExit(f"❌ Could not read frames from {video}")
+        return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def load_landmarks(source, count, seed=0):
+    """
+    (face arrays, hand arrays) for `count` frames, from a session log or, for source "synthetic",
+    generated around one face and one hand with a little jitter per frame
+    """
+    if source != "synthetic":
+        log = SessionLog(source)
+        if not len(log):
+            raise SystemExit(f"❌ No records in {source}")
+        return [(log.face_arrays(i % len(log)), log.hand_arrays(i % len(log))) for i in range(count)]
+    rng = np.random.default_rng(seed)
+    face = rng.uniform(0.35, 0.65, (478, 3)).astype(np.float32)
+    hand = rng.uniform(0.6, 0.9, (21, 3)).astype(np.float32)
+    return [([face + rng.normal(0, 0.002, face.shape).astype(np.float32)],
+             [hand + rng.normal(0, 0.01, hand.shape).astype(np.float32)]) for _ in range(count)]
+
+
+def run_resolution(width, height, video=None, count=150, inference_height=480,
+                   hand_roi_tracking=True, display=False, landmarks=None):
+    """
+    Time every loop stage at one camera resolution; runs in its own process so peak RSS is per resolution.
+    landmarks ("synthetic" or a session log path) feeds the classifiers on frames where the models found nothing.
+    """
+    frames = load_frames(video, count, width, height)
+    stand_ins = load_landmarks(landmarks, WARMUP_FRAMES + len(frames)) if landmarks else None
+    solutions = create_solutions(face_detection_fallback=True)
+    hands = HandRoiTracker(solutions['hands']) if hand_roi_tracking else solutions['hands']
+    display_width, ui_scale, text_scale, overlay_height = display_settings(width)
+    hud = HudCompositor(ui_scale, text_scale, overlay_height, compact=width < 800)
+    target = inference_size(width, height, inference_height)
+    timings = {stage: [] for stage in STAGES}
+
+    def timed(stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        timings[stage].append(time.perf_counter() - start)
+        return value
+
+    loop_start = time.perf_counter()
+    for index, frame in enumerate(frames[:WARMUP_FRAMES] + frames):
+        if index == WARMUP_FRAMES:
+            for values in timings.values():
+                values.clear()
+            loop_start = time.perf_counter()
+        frame = timed("flip", cv2.flip, frame, 1)
+        small = frame
+        if target != (width, height):
+            small = timed("downscale", cv2.resize, frame, target, interpolation=cv2.INTER_AREA)
+        rgb = timed("cvtColor", cv2.cvtColor, small, cv2.COLOR_BGR2RGB)
+        rgb.flags.writeable = False
+
+        timed("face_detection", solutions['face'].process, rgb)
+        mesh_results = timed("face_mesh", solutions['face_mesh'].process, rgb)
+        hand_results = timed("hands", hands.process, rgb)
+
+        # Array conversion is part of classification cost in the game loop
+        face_arrays = results_to_arrays(mesh_results.multi_face_landmarks)
+        hand_arrays = results_to_arrays(hand_results.multi_hand_landmarks)
+        if stand_ins is not None:
+            face_arrays = face_arrays or stand_ins[index][0]
+            hand_arrays = hand_arrays or stand_ins[index][1]
+        emotion, _ = timed("detect_emotion", detect_emotion, face_arrays[0] if face_arrays else None)
+        gesture = timed("get_hand_gesture", get_hand_gesture, hand_arrays)
+
+        # Worst case HUD: both moves and the result banner on screen
+        timed("hud", hud.draw, frame, 1, 2, emotion, False, gesture or "rock", "paper",
+              "Better luck next time!", False)
+        frame_resized = timed("resize", cv2.resize, frame, (display_width, int(display_width * height / width)))
+        if display:
+            timed("imshow", lambda: (cv2.imshow("Benchmark", frame_resized), cv2.waitKey(1)))
+    elapsed = time.perf_counter() - loop_start
+
+    for solution in solutions.values():
+        solution.close()
+    if display:
+        cv2.destroyAllWindows()
+
+    stages = {stage: {f'p{pct}': percentile_ms(values, pct) for pct in PERCENTILES}
+              for stage, values in timings.items() if values}
+    return {
+        'width': width,
+        'height': height,
+        'inference': list(target),
+        'frames': len(frames),
+        'fps': len(frames) / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': stages,
+    }
+
+
+def find_regressions(report, baseline, tolerance):
+    """Compare against a saved run; returns human-readable regression lines"""
+    previous = {(row['width'], row['height']): row for row in baseline.get('resolutions', [])}
+    problems = []
+    for row in report['resolutions']:
+        old = previous.get((row['width'], row['height']))
+        if old is None:
+            continue
+        size = f"{row['width']}x{row['height']}"
+        if row['fps'] < old['fps'] * (1 - tolerance):
+            problems.append(f"{size} fps {old['fps']:.1f} -> {row['fps']:.1f}")
+        for stage, values in row['stages'].items():
+            old_p95 = old['stages'].get(stage, {}).get('p95')
+            if old_p95 is None:
+                continue
+            if values['p95'] > old_p95 * (1 + tolerance) and values['p95'] - old_p95 > MIN_REGRESSION_MS:
+                problems.append(f"{size} {stage} p95 {old_p95:.2f} ms -> {values['p95']:.2f} ms")
+    return problems
+
+
+def print_row(row):
+    print(f"\n📐 {row['width']}x{row['height']} (inference {row['inference'][0]}x{row['inference'][1]}): "
+          f"{row['fps']:.1f} fps over {row['frames']} frames"
+          + (f", peak RSS {row['peak_rss_mb']:.0f} MB" if row['peak_rss_mb'] is not None else ""))
+    print(f"   {'stage':<17} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for stage, values in row['stages'].items():
+        print(f"   {stage:<17} {values['p50']:>6.2f}ms {values['p95']:>6.2f}ms {values['p99']:>6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency, FPS and memory benchmark for the frame loop")
+    parser.add_argument("--video", help="Recorded video or image sequence (e.g. frames/%%04d.png); default is synthetic frames")
+    parser.add_argument("--landmarks", help="Session log (.rpslog) whose landmarks feed the classifiers where the "
+                                            "models find none (default for synthetic frames: generated landmarks)")
+    parser.add_argument("--frames", type=int, default=150, help="Frames per resolution")
+    parser.add_argument("--resolutions", nargs="+", help="Resolutions as WxH (default: the camera probe's list)")
+    parser.add_argument("--inference-height", type=int, default=480, help="Inference frame height (0 = full size)")
+    parser.add_argument("--no-roi", action="store_true", help="Run hand tracking on the full frame")
+    parser.add_argument("--display", action="store_true", help="Also time imshow (needs a display)")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.resolutions:
+        resolutions = [tuple(int(v) for v in text.lower().split("x")) for text in args.resolutions]
+    else:
+        resolutions = CANDIDATE_RESOLUTIONS
+
+    landmarks = args.landmarks or (None if args.video else "synthetic")
+    print(f"🎞️  {args.frames} {'frames from ' + args.video if args.video else 'synthetic frames'} "
+          f"per resolution, {len(resolutions)} resolutions"
+          + (f", classifier landmarks from {landmarks}" if landmarks else ""))
+    report = {'source': args.video or "synthetic", 'landmarks': landmarks, 'frames': args.frames,
+              'inference_height': args.inference_height, 'resolutions': []}
+    for width, height in resolutions:
+        # A fresh process per resolution keeps peak RSS and model state independent
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            row = pool.submit(run_resolution, width, height, args.video, args.frames,
+                              args.inference_height or None, not args.no_roi, args.display, landmarks).result()
+        report['resolutions'].append(row)
+        print_row(row)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = find_regressions(report, baseline, args.tolerance)
+        if problems:
+            print(f"\n❌ {len(problems)} regression(s) against {args.baseline}:")
+            for line in problems:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
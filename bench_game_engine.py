@@ -0,0 +1,128 @@
+"""
+Game engine benchmark.
+
+Measures the round logic on its own, with no camera, models or window:
+
+  frames   whole rounds driven frame by frame through GameEngine.observe at a
+           simulated camera rate (countdown, capture, result, restart); this
+           is the engine's real throughput
+  rounds   GameEngine.decide_round called directly, one round per call
+           (computer move, scoring and emotion reaction, no countdown)
+  batch    GameEngine.play_rounds over arrays of player moves and emotions:
+           the same computer move, scoring and reaction as decide_round, as
+           array operations (random opponent)
+  adaptive play_rounds against the "mix" opponent, which still predicts
+           one round at a time; scoring and reactions stay batched
+
+Simulated time is used throughout, so a 3-second countdown costs only the
+observe() calls it takes, not 3 seconds.
+
+    python bench_game_engine.py
+    python bench_game_engine.py --rounds 100000 --batch 10000000 --json engine.json
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from game_engine import MOVES, ROUND_DECIDED, GameEngine
+from landmark_features import EMOTIONS
+from opponents import create_opponent
+
+
+def play_frames(engine, rounds, fps=30.0, lock_delay=0.2, result_hold=1.0, seed=0):
+    """
+    Play `rounds` rounds at `fps` simulated frames per second: the player is always in view,
+    their gesture locks `lock_delay` seconds into capture and each result stays up for `result_hold` seconds.
+    Returns the number of observations it took.
+    """
+    rng = random.Random(seed)
+    step = 1.0 / fps
+    now = 0.0
+    observations = 0
+    decided_at = None
+    move = rng.choice(MOVES)
+    while engine.rounds_played < rounds:
+        now += step
+        observations += 1
+        if not engine.round_active:
+            if now - decided_at >= result_hold:
+                engine.restart_round()
+                move = rng.choice(MOVES)
+            continue
+        locked = engine.countdown_started and engine.countdown_elapsed(now) >= engine.countdown_duration + lock_delay
+        if ROUND_DECIDED in engine.observe(now, True, move if locked else None):
+            decided_at = now
+    return observations
+
+
+def decide_rounds(engine, rounds, seed=0):
+    """Score `rounds` rounds one decide_round call at a time"""
+    rng = random.Random(seed)
+    moves = [rng.choice(MOVES) for _ in range(1024)]
+    for i in range(rounds):
+        engine.decide_round(moves[i & 1023])
+    return rounds
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the headless Rock Paper Scissors engine")
+    parser.add_argument("--rounds", type=int, default=20000, help="Rounds for the frame-by-frame and per-round runs")
+    parser.add_argument("--batch", type=int, default=5_000_000, help="Rounds decided in one play_rounds call")
+    parser.add_argument("--fps", type=float, default=30.0, help="Simulated camera rate for the frame-by-frame run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+
+    engine = GameEngine(rng=random.Random(args.seed))
+    observations, seconds = timed(play_frames, engine, args.rounds, args.fps, 0.2, 1.0, args.seed)
+    results['frames'] = {'rounds': engine.rounds_played, 'observations': observations, 'seconds': seconds,
+                         'observations_per_s': observations / seconds, 'rounds_per_s': engine.rounds_played / seconds,
+                         'score': [engine.player_score, engine.computer_score]}
+
+    engine = GameEngine(rng=random.Random(args.seed))
+    rounds, seconds = timed(decide_rounds, engine, args.rounds, args.seed)
+    results['rounds'] = {'rounds': rounds, 'seconds': seconds, 'rounds_per_s': rounds / seconds,
+                         'score': [engine.player_score, engine.computer_score]}
+
+    rng = np.random.default_rng(args.seed)
+    player_moves = rng.integers(0, len(MOVES), args.batch, dtype=np.int8)
+    emotions = rng.integers(0, len(EMOTIONS), args.batch, dtype=np.int8)
+    for name, opponent, rounds in (('batch', None, args.batch), ('adaptive', "mix", args.rounds * 10)):
+        engine = GameEngine(rng=random.Random(args.seed), opponent=opponent and create_opponent(opponent))
+        _, seconds = timed(engine.play_rounds, player_moves[:rounds], emotions[:rounds])
+        results[name] = {'rounds': engine.rounds_played, 'seconds': seconds,
+                         'rounds_per_s': engine.rounds_played / seconds,
+                         'score': [engine.player_score, engine.computer_score]}
+
+    print(f"🎲 Game engine, no camera, models or window (simulated {args.fps:.0f} fps for frame-by-frame rounds)")
+    frames = results['frames']
+    print(f"  frames  {frames['rounds']:>10,} rounds {frames['rounds_per_s']:>14,.0f} rounds/s "
+          f"({frames['observations_per_s']:,.0f} observations/s, "
+          f"{frames['observations'] / frames['rounds']:.0f} per round)")
+    r = results['rounds']
+    print(f"  rounds  {r['rounds']:>10,} rounds {r['rounds_per_s']:>14,.0f} rounds/s (decide_round only)")
+    r = results['batch']
+    print(f"  batch   {r['rounds']:>10,} rounds {r['rounds_per_s']:>14,.0f} rounds/s (play_rounds, random opponent)")
+    r = results['adaptive']
+    print(f"  adaptive{r['rounds']:>10,} rounds {r['rounds_per_s']:>14,.0f} rounds/s "
+          f"(play_rounds, mix opponent predicting round by round)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Inference resolution benchmark.
+
+Runs FaceMesh and Hands over the same frames at several inference heights and
+reports, for each size, how long preprocessing and each model take and how far
+the landmarks drift from the ones found at full camera resolution.
+
+    python bench_inference_size.py --video session.mp4
+    python bench_inference_size.py --synthetic 1920x1080   # speed only
+
+Accuracy needs real faces and hands, so it is only reported for recorded
+input. Landmark error is measured in pixels of the full-resolution frame.
+"""
+import argparse
+import json
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from frame_pipeline import inference_size, prepare_inference_frame
+from inference_scheduler import percentile_ms
+
+DEFAULT_HEIGHTS = [1080, 720, 480, 360, 240]
+
+
+def load_frames(args):
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        frames = []
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.flip(frame, 1))
+        cap.release()
+        if not frames:
+            raise SystemExit(f"❌ Could not read frames from {args.video}")
+        return frames
+    width, height = (int(v) for v in args.synthetic.lower().split("x"))
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(args.frames)]
+
+
+def landmark_points(landmark_lists, w, h):
+    """Pixel coordinates (N, 2) of the first face/hand, or None"""
+    if not landmark_lists:
+        return None
+    return np.array([(lm.x * w, lm.y * h) for lm in landmark_lists[0].landmark], dtype=np.float32)
+
+
+def run_size(frames, target_height):
+    """Run both models over every frame at one inference height"""
+    face_mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.7)
+    hands = mp.solutions.hands.Hands(max_num_hands=2, min_detection_confidence=0.7)
+    timings = {'prepare': [], 'face_mesh': [], 'hands': []}
+    landmarks = {'face_mesh': [], 'hands': []}
+    h, w = frames[0].shape[:2]
+
+    for frame in frames:
+        start = time.perf_counter()
+        rgb = prepare_inference_frame(frame, target_height)
+        rgb.flags.writeable = False
+        timings['prepare'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        mesh_results = face_mesh.process(rgb)
+        timings['face_mesh'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        hand_results = hands.process(rgb)
+        timings['hands'].append(time.perf_counter() - start)
+
+        landmarks['face_mesh'].append(landmark_points(mesh_results.multi_face_landmarks, w, h))
+        landmarks['hands'].append(landmark_points(hand_results.multi_hand_landmarks, w, h))
+
+    face_mesh.close()
+    hands.close()
+    return timings, landmarks
+
+
+def compare(reference, candidate):
+    """Detection agreement and mean landmark error against the reference run"""
+    agree = 0
+    errors = []
+    for ref, cand in zip(reference, candidate):
+        if (ref is None) == (cand is None):
+            agree += 1
+        if ref is not None and cand is not None:
+            errors.append(float(np.linalg.norm(ref - cand, axis=1).mean()))
+    return {
+        'agreement': agree / len(reference) if reference else 0.0,
+        'mean_error_px': float(np.mean(errors)) if errors else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference resolutions for speed and landmark accuracy")
+    parser.add_argument("--video", help="Recorded video or image sequence (e.g. frames/%%04d.png)")
+    parser.add_argument("--synthetic", default="1920x1080", help="Synthetic frame size when no video is given")
+    parser.add_argument("--frames", type=int, default=150, help="Number of frames to use")
+    parser.add_argument("--heights", type=int, nargs="+", default=DEFAULT_HEIGHTS, help="Inference heights to test")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    h, w = frames[0].shape[:2]
+    heights = sorted({min(height, h) for height in args.heights}, reverse=True)
+    print(f"🎞️  {len(frames)} frames at {w}x{h}, testing inference heights {heights}")
+
+    # The camera resolution is the accuracy reference
+    _, reference = run_size(frames, None)
+
+    report = []
+    print(f"{'size':>11} | {'prepare':>8} | {'mesh':>8} | {'hands':>8} | {'total':>8} | {'face agree':>10} | {'face err':>8} | {'hand agree':>10} | {'hand err':>8}")
+    for height in heights:
+        timings, landmarks = run_size(frames, height)
+        size = inference_size(w, h, height)
+        row = {'width': size[0], 'height': size[1]}
+        for name, values in timings.items():
+            row[f'{name}_p50_ms'] = percentile_ms(values, 50)
+        row['total_p50_ms'] = sum(row[f'{name}_p50_ms'] for name in timings)
+        if args.video:
+            row['face'] = compare(reference['face_mesh'], landmarks['face_mesh'])
+            row['hands'] = compare(reference['hands'], landmarks['hands'])
+        report.append(row)
+
+        def fmt_acc(key):
+            if key not in row:
+                return f"{'n/a':>10} | {'n/a':>8}"
+            err = row[key]['mean_error_px']
+            err_text = f"{err:.1f}px" if err is not None else "n/a"
+            return f"{row[key]['agreement'] * 100:>9.0f}% | {err_text:>8}"
+
+        print(f"{size[0]:>5}x{size[1]:<5} | {row['prepare_p50_ms']:>6.1f}ms | {row['face_mesh_p50_ms']:>6.1f}ms | "
+              f"{row['hands_p50_ms']:>6.1f}ms | {row['total_p50_ms']:>6.1f}ms | {fmt_acc('face')} | {fmt_acc('hands')}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'source': args.video or f"synthetic {w}x{h}", 'frames': len(frames), 'sizes': report}, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
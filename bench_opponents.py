@@ -0,0 +1,125 @@
+"""
+Computer opponent benchmark.
+
+Plays every opponent in opponents.py through long matches against scripted
+players and reports the computer's win and loss rates, then times the
+opponents alone (choose + observe per round) at the start and at the end of
+a very long match, to show the cost per round does not grow with history.
+
+    python bench_opponents.py
+    python bench_opponents.py --rounds 200000 --timing-rounds 2000000 --json opponents.json
+"""
+import argparse
+import json
+import random
+import time
+
+from opponents import BEATS, OPPONENTS, create_opponent, play_match
+
+
+def random_player(last_player, last_computer, rng):
+    return rng.randrange(3)
+
+
+def cycle_player(last_player, last_computer, rng):
+    """rock, paper, scissors, rock, ..."""
+    return 0 if last_player is None else (last_player + 1) % 3
+
+
+def biased_player(last_player, last_computer, rng):
+    """Rock half the time, paper 30%, scissors 20%"""
+    return rng.choices((0, 1, 2), (0.5, 0.3, 0.2))[0]
+
+
+def win_stay_lose_shift_player(last_player, last_computer, rng):
+    """Repeats a winning move, otherwise shifts to one of the two other moves at random"""
+    if last_player is None:
+        return rng.randrange(3)
+    if (last_player - last_computer) % 3 == 1:
+        return last_player
+    return (last_player + rng.randrange(1, 3)) % 3
+
+
+def beat_last_player(last_player, last_computer, rng):
+    """Always plays what beats the computer's previous move"""
+    return rng.randrange(3) if last_computer is None else BEATS[last_computer]
+
+
+class DriftingPlayer:
+    """Favours one move 60% of the time and switches favourite every `period` rounds"""
+
+    def __init__(self, period=300):
+        self.period = period
+        self.rounds = 0
+
+    def __call__(self, last_player, last_computer, rng):
+        favourite = (self.rounds // self.period) % 3
+        self.rounds += 1
+        return favourite if rng.random() < 0.6 else rng.randrange(3)
+
+
+PLAYERS = {
+    'random': lambda: random_player,
+    'cycle': lambda: cycle_player,
+    'biased': lambda: biased_player,
+    'win-stay lose-shift': lambda: win_stay_lose_shift_player,
+    'beat-last': lambda: beat_last_player,
+    'drifting': DriftingPlayer,
+}
+
+
+def time_rounds(opponent, moves, rng):
+    """Seconds per round spent in opponent.choose and opponent.observe over a fixed move sequence"""
+    start = time.perf_counter()
+    for move in moves:
+        opponent.observe(move, opponent.choose(rng))
+    return (time.perf_counter() - start) / len(moves)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Win rates and per-round cost of the computer opponents")
+    parser.add_argument("--rounds", type=int, default=100_000, help="Rounds per match against each scripted player")
+    parser.add_argument("--timing-rounds", type=int, default=1_000_000, help="Length of the match used for timing")
+    parser.add_argument("--decay", type=float, default=0.98, help="Count decay per round")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    names = sorted(OPPONENTS, key=list(OPPONENTS).index)
+    options = {name: {} if name == "random" else {'decay': args.decay} for name in names}
+    results = {'rounds': args.rounds, 'decay': args.decay, 'matches': {}, 'timing': {}}
+
+    print(f"🤖 Computer win / loss rate over {args.rounds:,} rounds (random play wins and loses 33%)")
+    print(f"  {'player':20s}" + "".join(f"{name:>18s}" for name in names))
+    for player_name, make_player in PLAYERS.items():
+        row = {}
+        for name in names:
+            wins, losses, draws = play_match(create_opponent(name, **options[name]), make_player(), args.rounds,
+                                             random.Random(args.seed))
+            row[name] = {'win_rate': wins / args.rounds, 'loss_rate': losses / args.rounds,
+                         'draw_rate': draws / args.rounds}
+        results['matches'][player_name] = row
+        print(f"  {player_name:20s}" + "".join(f"{r['win_rate']:10.1%} / {r['loss_rate']:5.1%}" for r in row.values()))
+
+    # Time on a long biased sequence: cost near the start of the match against cost at its end
+    rng = random.Random(args.seed)
+    moves = [biased_player(None, None, rng) for _ in range(args.timing_rounds)]
+    window = max(1, args.timing_rounds // 10)
+    print(f"\n⏱️  Opponent cost per round over a {args.timing_rounds:,}-round match")
+    for name in names:
+        opponent = create_opponent(name, **options[name])
+        first = time_rounds(opponent, moves[:window], rng)
+        time_rounds(opponent, moves[window:-window], rng)
+        last = time_rounds(opponent, moves[-window:], rng)
+        results['timing'][name] = {'first_us': first * 1e6, 'last_us': last * 1e6, 'counts': opponent.memory()}
+        print(f"  {name:10s} first {window:,} rounds {first * 1e6:6.2f}us | last {window:,} rounds "
+              f"{last * 1e6:6.2f}us | {opponent.memory()} counts kept")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Camera discovery and resolution probing.
+
+Each camera index is opened exactly once, on its own worker thread, and every
+candidate resolution is tried against that single handle. Results are cached
+on disk keyed by device identity so later launches can skip probing.
+
+Only Linux names the device behind an index without opening it. Elsewhere
+(DirectShow on Windows) the identity is just the index, so each cached entry
+also keeps a fingerprint: the backend name and the shape of the first frame.
+On a cache hit the camera is opened once and read one frame to check the
+fingerprint. That is much cheaper than probing every resolution, and a
+different camera plugged into the same index gets probed again.
+"""
+import json
+import os
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import cv2
+
+# Common resolutions to test (from highest to lowest)
+CANDIDATE_RESOLUTIONS = [
+    (1920, 1080),  # Full HD
+    (1280, 720),   # HD
+    (960, 720),    # HD ready
+    (800, 600),    # SVGA
+    (640, 480),    # VGA
+    (320, 240)     # QVGA
+]
+
+CAMERA_BACKEND = cv2.CAP_DSHOW
+MAX_CAMERAS_TO_CHECK = 5       # Check cameras 0-4
+PROBE_TIMEOUT = 4.0            # Seconds to wait for a single device to answer
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rock_paper_scissors")
+CACHE_PATH = os.path.join(CACHE_DIR, "cameras.json")
+LAST_CAMERA_PATH = os.path.join(CACHE_DIR, "last_camera.json")  # Camera and resolution of the last good start
+CACHE_MAX_AGE = 7 * 24 * 3600  # Re-probe cached devices after a week
+CACHE_VERSION = 2             # 2: entries carry a device fingerprint
+
+
+def identity_names_device():
+    """Whether device_identity tells devices apart, or only indices"""
+    return platform.system() == 'Linux'
+
+
+def device_identity(index, backend=CAMERA_BACKEND):
+    """Stable identity for a camera index that can be read without opening the device"""
+    identity = f"backend{backend}:{index}"
+    if identity_names_device():
+        sysfs = f"/sys/class/video4linux/video{index}"
+        try:
+            with open(os.path.join(sysfs, "name")) as f:
+                name = f.read().strip()
+        except OSError:
+            return identity + ":absent"
+        try:
+            device_path = os.path.realpath(os.path.join(sysfs, "device"))
+        except OSError:
+            device_path = ""
+        identity += f":{name}:{device_path}"
+    return identity
+
+
+def fingerprint(cap, frame):
+    """Cheap description of the device behind an open capture: backend name and first-frame shape"""
+    return f"{cap.getBackendName()}:{frame.shape[1]}x{frame.shape[0]}"
+
+
+def read_fingerprint(index, backend=CAMERA_BACKEND):
+    """Open a camera, read one frame and return its fingerprint, or None if it does not answer"""
+    cap = cv2.VideoCapture(index, backend)
+    try:
+        if not cap.isOpened():
+            return None
+        ret, frame = cap.read()
+        return fingerprint(cap, frame) if ret else None
+    finally:
+        cap.release()
+
+
+def probe_camera(index, resolutions=CANDIDATE_RESOLUTIONS, backend=CAMERA_BACKEND):
+    """Open a camera once and check every candidate resolution on that handle"""
+    start = time.perf_counter()
+    cap = cv2.VideoCapture(index, backend)
+    try:
+        if not cap.isOpened():
+            return None
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        open_time = time.perf_counter() - start
+        device_fingerprint = fingerprint(cap, frame)
+        default_res = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        supported = []
+        for width, height in resolutions:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            ret, _ = cap.read()
+            if not ret:
+                continue
+            actual = [int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))]
+            if actual not in supported:
+                supported.append(actual)
+
+        supported.sort(key=lambda res: res[0] * res[1], reverse=True)
+        return {
+            'index': index,
+            'width': default_res[0],
+            'height': default_res[1],
+            'resolutions': supported,
+            'open_time': round(open_time, 3),
+            'fingerprint': device_fingerprint,
+            'probe_time': round(time.perf_counter() - start, 3)
+        }
+    finally:
+        cap.release()
+
+
+def _run_parallel(fn, indices, backend, timeout, what):
+    """fn(index, backend) for every index on its own thread; indices that do not answer in time are left out"""
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, len(indices)), thread_name_prefix="camera-probe")
+    futures = {executor.submit(fn, i, backend): i for i in indices}
+    done, pending = wait(futures, timeout=timeout)
+    for future in done:
+        index = futures[future]
+        try:
+            results[index] = future.result()
+        except Exception as exc:
+            print(f"  ⚠️  Camera {index}: {what} failed ({exc})")
+            results[index] = None
+    for future in pending:
+        print(f"  ⚠️  Camera {futures[future]}: no answer within {timeout:.1f}s, skipping")
+    # Hung drivers cannot be interrupted; let their threads finish in the background
+    executor.shutdown(wait=False)
+    return results
+
+
+def probe_cameras(indices, resolutions=CANDIDATE_RESOLUTIONS, backend=CAMERA_BACKEND, timeout=PROBE_TIMEOUT):
+    """Probe several camera indices in parallel; devices that do not answer in time are skipped"""
+    return _run_parallel(lambda index, backend: probe_camera(index, resolutions, backend),
+                         indices, backend, timeout, "probe")
+
+
+def read_fingerprints(indices, backend=CAMERA_BACKEND, timeout=PROBE_TIMEOUT):
+    """Fingerprints of several cameras, read in parallel"""
+    return _run_parallel(read_fingerprint, indices, backend, timeout, "fingerprint check")
+
+
+def load_cache(path=CACHE_PATH):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache.get('devices', {})
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def save_cache(devices, path=CACHE_PATH):
+    try:
+        _write_json(path, {'version': CACHE_VERSION, 'devices': devices})
+    except OSError as exc:
+        print(f"  ⚠️  Could not write camera cache: {exc}")
+
+
+def discover_cameras(indices=None, refresh=False, timeout=PROBE_TIMEOUT, cache_path=CACHE_PATH):
+    """
+    Find working cameras and their supported resolutions.
+    Cached results are reused unless refresh is set.
+    Returns a list of camera info dicts sorted by index.
+    """
+    if indices is None:
+        indices = range(MAX_CAMERAS_TO_CHECK)
+    indices = list(indices)
+    identities = {i: device_identity(i) for i in indices}
+    cache = load_cache(cache_path)
+    now = time.time()
+
+    cameras = {}
+    to_probe = []
+    cached = []
+    for i in indices:
+        entry = None if refresh else cache.get(identities[i])
+        if identities[i].endswith(":absent"):
+            cameras[i] = None
+        elif entry and now - entry.get('probed_at', 0) < CACHE_MAX_AGE:
+            cameras[i] = entry.get('info')
+            cached.append(i)
+        else:
+            to_probe.append(i)
+
+    if cached and not identity_names_device():
+        # The identity is only the index here: check that the cached device is still the one plugged in
+        current = read_fingerprints(cached, timeout=timeout)
+        changed = [i for i in cached if i in current and current[i] != (cameras[i] or {}).get('fingerprint')]
+        if changed:
+            print(f"Cameras {changed} changed since they were cached")
+        for i in list(cached):
+            if i in changed:
+                cached.remove(i)
+                to_probe.append(i)
+            elif i not in current:
+                # It did not answer in time: not available this launch, and its entry is kept
+                cached.remove(i)
+                cameras[i] = None
+        to_probe.sort()
+
+    if to_probe:
+        print(f"Scanning cameras {to_probe} in parallel...")
+        start = time.perf_counter()
+        probed = probe_cameras(to_probe, timeout=timeout)
+        print(f"  ⏱️  Probe finished in {time.perf_counter() - start:.2f} seconds")
+        for i in to_probe:
+            info = probed.get(i)
+            cameras[i] = info
+            # Devices that timed out are not cached so the next launch tries again
+            if i in probed:
+                cache[identities[i]] = {'probed_at': now, 'info': info}
+        save_cache(cache, cache_path)
+    if cached:
+        print(f"Using cached results for cameras {cached} (press 'r' at the prompt to rescan)")
+
+    available = []
+    for i in indices:
+        info = cameras.get(i)
+        if info:
+            best = info['resolutions'][0] if info['resolutions'] else (info['width'], info['height'])
+            print(f"  ✓ Camera {i}: {info['width']}x{info['height']} (best {best[0]}x{best[1]}, "
+                  f"opened in {info['open_time']:.2f}s)")
+            available.append(info)
+        else:
+            print(f"  ✗ Camera {i}: Not available")
+    return available
+
+
+def forget_camera(index, cache_path=CACHE_PATH):
+    """Drop a camera from the cache, e.g. after it failed to open with cached settings"""
+    cache = load_cache(cache_path)
+    if cache.pop(device_identity(index), None) is not None:
+        save_cache(cache, cache_path)
+
+
+def save_last_camera(index, resolution, path=LAST_CAMERA_PATH):
+    """Remember the camera and resolution that just started successfully"""
+    try:
+        _write_json(path, {'version': CACHE_VERSION, 'index': index, 'resolution': list(resolution),
+                           'identity': device_identity(index)})
+    except OSError as exc:
+        print(f"  ⚠️  Could not save camera settings: {exc}")
+
+
+def load_last_camera(path=LAST_CAMERA_PATH):
+    """(index, resolution) of the last successful start, or None if there is none or the device changed"""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+        index, resolution = saved['index'], tuple(saved['resolution'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if saved.get('version') != CACHE_VERSION or saved.get('identity') != device_identity(index):
+        return None
+    return index, resolution
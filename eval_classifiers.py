@@ -0,0 +1,100 @@
+"""
+Offline evaluation of learned classifiers against the built-in rules.
+
+Reads the labeled frames of recorded sessions, classifies them with a saved
+model and with the current heuristic (finger-up patterns for gestures,
+thresholds for emotions), and reports accuracy per class plus the latency
+per sample, one sample at a time (as the live game calls it) and in one
+batch (as replays and multi-player frames do).
+
+    python eval_classifiers.py gesture.npz test/*.rpslog --labels labels.jsonl
+    python eval_classifiers.py emotion.npz test/*.rpslog --labels labels.jsonl --json eval.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from landmark_features import EMOTIONS, classify_emotions, classify_gestures, emotion_features
+from learned_classifiers import LABELS, labeled_landmarks, load_classifier
+
+
+def heuristic_batch(kind, landmarks):
+    """Class names from the built-in rules; a gesture that matches no pattern counts as "none" """
+    if kind == "gesture":
+        return [gesture or "none" for gesture in classify_gestures(landmarks)]
+    labels, _ = classify_emotions(emotion_features(landmarks))
+    return [EMOTIONS[int(label)] for label in np.ravel(labels)]
+
+
+def learned_batch(classifier, landmarks):
+    """Class names from the model; an unconfident answer counts as "none" for gestures, "neutral" for emotions"""
+    names, _ = classifier.classify_batch(landmarks)
+    fallback = "none" if classifier.kind == "gesture" else "neutral"
+    return [name or fallback for name in names]
+
+
+def time_per_sample(fn, landmarks, repeats=3, single_limit=500):
+    """Microseconds per sample for single-sample calls and for one batched call (best of `repeats`)"""
+    singles = landmarks[:single_limit]
+    best_single = best_batch = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for sample in singles:
+            fn(sample[None])
+        best_single = min(best_single, (time.perf_counter() - start) / len(singles))
+        start = time.perf_counter()
+        fn(landmarks)
+        best_batch = min(best_batch, (time.perf_counter() - start) / len(landmarks))
+    return {'single_us': best_single * 1e6, 'batch_us': best_batch * 1e6}
+
+
+def accuracy_report(labels, targets, predicted):
+    truth = [labels[t] for t in targets]
+    report = {'accuracy': float(np.mean([p == t for p, t in zip(predicted, truth)])), 'per_class': {}}
+    for label in labels:
+        rows = [p for p, t in zip(predicted, truth) if t == label]
+        if rows:
+            report['per_class'][label] = float(np.mean([p == label for p in rows]))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a learned classifier with the built-in heuristics")
+    parser.add_argument("model", help="Model saved by learned_classifiers.py (.npz)")
+    parser.add_argument("logs", nargs="+", help="Session logs to evaluate on (keep them out of training)")
+    parser.add_argument("--labels", required=True, help="JSON lines of labeled time spans")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    classifier = load_classifier(args.model)
+    load_ms = (time.perf_counter() - start) * 1000
+    kind = classifier.kind
+    labels = LABELS[kind]
+    landmarks, targets = labeled_landmarks(args.logs, args.labels, kind)
+    if not len(targets):
+        raise SystemExit(f"❌ No labeled {kind} frames found in the logs")
+
+    results = {'kind': kind, 'model': classifier.model, 'samples': len(targets), 'load_ms': load_ms}
+    for name, fn in (("heuristic", lambda x: heuristic_batch(kind, x)),
+                     ("learned", lambda x: learned_batch(classifier, x))):
+        results[name] = accuracy_report(labels, targets, fn(landmarks))
+        results[name].update(time_per_sample(fn, landmarks))
+
+    print(f"📊 {kind} | {len(targets)} labeled frames | {classifier.model} model loaded in {load_ms:.1f} ms")
+    print(f"  {'':10s} {'accuracy':>9s} {'single':>10s} {'batched':>10s}   per class")
+    for name in ("heuristic", "learned"):
+        r = results[name]
+        per_class = " ".join(f"{label} {value:.0%}" for label, value in r['per_class'].items())
+        print(f"  {name:10s} {r['accuracy']:9.1%} {r['single_us']:8.1f}us {r['batch_us']:8.2f}us   {per_class}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Face presence and bounding boxes.
+
+FaceMesh already locates the face, so its landmarks are enough to decide
+whether a player is in front of the camera and where to draw the face box.
+The FaceDetection model is only needed as an optional fallback.
+
+Boxes are normalized (xmin, ymin, width, height) tuples, the same layout as
+MediaPipe's relative_bounding_box.
+"""
+import cv2
+
+
+def face_boxes_from_arrays(face_arrays, margin=0.05):
+    """Bounding boxes around each FaceMesh face's (N, 3) landmark array, padded by a fraction of the box size"""
+    boxes = []
+    for face in face_arrays:
+        (xmin, ymin), (xmax, ymax) = face[:, :2].min(axis=0), face[:, :2].max(axis=0)
+        pad_x = (xmax - xmin) * margin
+        pad_y = (ymax - ymin) * margin
+        boxes.append(tuple(float(v) for v in (xmin - pad_x, ymin - pad_y, xmax - xmin + 2 * pad_x,
+                                                ymax - ymin + 2 * pad_y)))
+    return boxes
+
+
+def face_boxes_from_detection(face_results):
+    """Bounding boxes from FaceDetection results"""
+    boxes = []
+    if not face_results or not face_results.detections:
+        return boxes
+    for detection in face_results.detections:
+        box = detection.location_data.relative_bounding_box
+        boxes.append((box.xmin, box.ymin, box.width, box.height))
+    return boxes
+
+
+def draw_face_box(frame, box, color=(255, 255, 255), thickness=2, label=None):
+    """Draw a normalized face box onto a frame, optionally with a label above it"""
+    h, w = frame.shape[:2]
+    xmin, ymin, width, height = box
+    top_left = (max(0, int(xmin * w)), max(0, int(ymin * h)))
+    bottom_right = (min(w - 1, int((xmin + width) * w)), min(h - 1, int((ymin + height) * h)))
+    cv2.rectangle(frame, top_left, bottom_right, color, thickness)
+    if label:
+        cv2.putText(frame, label, (top_left[0], max(20, top_left[1] - 10)), cv2.FONT_HERSHEY_DUPLEX,
+                    0.8, color, thickness)
@@ -0,0 +1,151 @@
+"""
+Per-frame model analysis shared by the live game and offline replay.
+
+FrameAnalyzer decides which MediaPipe models are due for the current game
+phase, runs them through the inference scheduler, converts fresh landmarks to
+arrays and holds recent results for models that were skipped.
+"""
+from face_presence import face_boxes_from_arrays, face_boxes_from_detection
+from hand_tracking import HandRoiTracker
+from inference_scheduler import InferenceScheduler
+from landmark_features import result_arrays
+from phase_scheduler import LANDMARK_SCHEDULE, PhaseModelGate
+from process_inference import ProcessInference
+
+
+def create_face_model(name, max_faces=1, refine_landmarks=True, face_model=0):
+    """
+    Build one face model: 'face_mesh' or the fallback 'face' detector. refine_landmarks adds the
+    iris points (478 instead of 468); face_model is FaceDetection's model_selection
+    (0 = short range, 1 = full range).
+    """
+    # Imported here rather than at module level: the import alone takes most of a second,
+    # and the game does it on a background thread while the camera opens
+    import mediapipe as mp
+    if name == 'face_mesh':
+        return mp.solutions.face_mesh.FaceMesh(max_num_faces=max_faces, refine_landmarks=refine_landmarks,
+                                               min_detection_confidence=0.7)
+    return mp.solutions.face_detection.FaceDetection(model_selection=face_model, min_detection_confidence=0.7)
+
+
+def create_face_solutions(face_detection_fallback=False, max_faces=1, **face_options):
+    """Build the face models (see create_face_model for the options)"""
+    solutions = {'face_mesh': create_face_model('face_mesh', max_faces, **face_options)}
+    # Face presence comes from FaceMesh; FaceDetection is only loaded as a fallback
+    if face_detection_fallback:
+        solutions['face'] = create_face_model('face', max_faces, **face_options)
+    return solutions
+
+
+def create_solutions(face_detection_fallback=False, max_faces=1, max_hands=2, **face_options):
+    """Build the MediaPipe solution objects used by the game"""
+    import mediapipe as mp
+    solutions = {'hands': mp.solutions.hands.Hands(max_num_hands=max_hands, min_detection_confidence=0.7)}
+    solutions.update(create_face_solutions(face_detection_fallback, max_faces, **face_options))
+    return solutions
+
+
+def create_analyzer(processes=False, parallel=True, hand_roi_tracking=True, face_detection_fallback=False,
+                    max_faces=1, max_hands=2):
+    """FrameAnalyzer with models in this process (threads) or in worker processes fed through shared memory"""
+    if processes:
+        inference = ProcessInference(hand_roi_tracking=hand_roi_tracking, max_faces=max_faces, max_hands=max_hands,
+                                     face_detection_fallback=face_detection_fallback)
+        return FrameAnalyzer({}, inference=inference, max_faces=max_faces)
+    solutions = create_solutions(face_detection_fallback, max_faces, max_hands)
+    return FrameAnalyzer(solutions, parallel=parallel, hand_roi_tracking=hand_roi_tracking, max_faces=max_faces)
+
+
+class FrameAnalyzer:
+    """Runs the models a frame needs and packages their results for the game"""
+
+    def __init__(self, solutions, parallel=True, hand_roi_tracking=True, schedule=None, inference=None, max_faces=1):
+        """
+        `inference` replaces the in-process scheduler, e.g. with a ProcessInference whose
+        workers own the models; `solutions` is then empty.
+        """
+        self.solutions = solutions
+        self.max_faces = max_faces      # Needed to rebuild the face models when their options change
+        self.face_options = {'refine_landmarks': True, 'face_model': 0}
+        self.hand_tracker = None
+        self.frame_buffer = None    # Where the pipeline should write RGB frames, if the backend has a preference
+        if inference is None:
+            self.hand_tracker = HandRoiTracker(solutions['hands']) if hand_roi_tracking else None
+            models = {'face_mesh': solutions['face_mesh'], 'hands': self.hand_tracker or solutions['hands']}
+            if 'face' in solutions:
+                models['face'] = solutions['face']
+            inference = InferenceScheduler(models, parallel=parallel)
+        else:
+            self.frame_buffer = getattr(inference, 'frame_buffer', None)
+        self.inference = inference
+        self.model_gate = PhaseModelGate(schedule)
+
+    def process(self, rgb, timestamp, phase, show_landmarks=False):
+        """Run the models due in this phase on an RGB frame and return the merged results"""
+        extra = LANDMARK_SCHEDULE.get(phase, ()) if show_landmarks else ()
+        fresh = self.inference.run(rgb, self.model_gate.due_models(phase, timestamp, extra))
+
+        # Landmarks become arrays once per fresh result; the classifiers only see arrays
+        if 'face_mesh' in fresh:
+            fresh['face_arrays'] = result_arrays(fresh['face_mesh'], 'multi_face_landmarks')
+        if 'hands' in fresh:
+            fresh['hand_arrays'] = result_arrays(fresh['hands'], 'multi_hand_landmarks')
+
+        # FaceDetection only runs as a fallback when a fresh mesh finds no face
+        if 'face' in self.inference.models and 'face_mesh' in fresh and not fresh['face_arrays']:
+            fresh.update(self.inference.run(rgb, ['face']))
+        ran = {name for name in fresh if name in self.inference.models}
+
+        # Skipped models reuse their latest result for a short while
+        results = self.model_gate.hold(fresh, timestamp)
+        results['face_arrays'] = results.get('face_arrays') or []
+        results['hand_arrays'] = results.get('hand_arrays') or []
+        results.setdefault('face_mesh', None)
+        results.setdefault('hands', None)
+        results['face_boxes'] = (face_boxes_from_arrays(results['face_arrays']) or
+                                 face_boxes_from_detection(results.get('face')))
+        results['phase'] = phase
+        results['fresh'] = ran
+        # The hand tracker seeds its first crop from the latest face boxes
+        if self.hand_tracker is not None:
+            self.hand_tracker.face_boxes = results['face_boxes']
+        elif hasattr(self.inference, 'face_boxes'):
+            self.inference.face_boxes = results['face_boxes']
+        return results
+
+    def configure(self, mesh_rate=None, **face_options):
+        """
+        Change model quality between frames; call it from the thread that runs process().
+        mesh_rate caps FaceMesh runs per second (None = the phase schedule's own rate);
+        face_options (refine_landmarks, face_model) rebuild the face model they belong to when they change.
+        """
+        self.model_gate.rate_limits['face_mesh'] = mesh_rate
+        options = {**self.face_options, **face_options}
+        stale = []
+        if options['refine_landmarks'] != self.face_options['refine_landmarks']:
+            stale.append('face_mesh')
+        if options['face_model'] != self.face_options['face_model'] and 'face' in self.inference.models:
+            stale.append('face')
+        self.face_options = options
+        if not stale:
+            return
+        if hasattr(self.inference, 'configure'):
+            self.inference.configure(options, stale)    # Worker processes rebuild their own models
+            return
+        # Only the models whose options changed are rebuilt; graph construction is slow
+        for name in stale:
+            solution = create_face_model(name, self.max_faces, **options)
+            self.solutions.pop(name).close()
+            self.solutions[name] = self.inference.models[name] = solution
+
+    def summaries(self):
+        """Lines describing model timings and hand tracking for the periodic stats report"""
+        lines = [f"🧠 {self.inference.timing_summary()}"]
+        if self.hand_tracker is not None:
+            lines.append(f"✋ {self.hand_tracker.summary()}")
+        return lines
+
+    def close(self):
+        self.inference.close()
+        for solution in self.solutions.values():
+            solution.close()
@@ -0,0 +1,365 @@
+"""
+Threaded frame pipeline for the Rock Paper Scissors game.
+
+Frames flow through three stages joined by small bounded queues:
+
+    capture thread -> frame queue -> inference thread -> result queue -> render (main thread)
+
+Each queue drops its oldest item when full, so a slow stage never makes the
+stages before it wait and the renderer always works on the newest frame.
+
+Frame arrays are reused instead of allocated per frame. The camera reads
+into arrays from a FramePool, which get them back once a frame has been
+displayed or dropped; the mirror flip happens in place; and the downscaled
+inference frame is resized into a FrameBuffers array and converted to RGB
+in place. In steady state the frame path allocates no new arrays.
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from metrics import StageTimer
+
+
+def inference_size(width, height, target_height=None):
+    """Frame size used for model inference: the camera size scaled down to target_height"""
+    if not target_height or height <= target_height:
+        return width, height
+    scale = target_height / height
+    return int(round(width * scale)), int(target_height)
+
+
+class FrameBuffers:
+    """Named arrays reused from frame to frame; a new one is only made when a name's shape changes"""
+
+    def __init__(self):
+        self._arrays = {}
+        self.allocations = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        array = self._arrays.get(name)
+        if array is None or array.shape != tuple(shape) or array.dtype != dtype:
+            array = self._arrays[name] = np.empty(shape, dtype)
+            self.allocations += 1
+        # The models mark the RGB frame read-only while they use it
+        array.flags.writeable = True
+        return array
+
+
+class FramePool:
+    """
+    Camera frame arrays for the capture thread to read into.
+    Frames come back through release() once they are displayed or dropped, so steady capture
+    cycles through the few arrays in flight instead of getting a new one from every read.
+    """
+
+    def __init__(self, max_free=8):
+        self.max_free = max_free
+        self.shape = None
+        self.allocations = 0
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """A free frame array of the camera's shape, or None until the first frame shows the shape"""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        if self.shape is None:
+            return None
+        self.allocations += 1
+        return np.empty(self.shape, np.uint8)
+
+    def read(self, cap):
+        """cap.read() into a pooled array"""
+        buffer = self.acquire()
+        ret, frame = cap.read(buffer) if buffer is not None else cap.read()
+        if not ret:
+            self.release(buffer)
+            return False, None
+        if frame is not buffer:
+            # First frame, or the camera changed resolution: the backend made a new array
+            self.allocations += 1
+            self.shape = frame.shape
+        return True, frame
+
+    def release(self, frame):
+        if frame is None:
+            return
+        with self._lock:
+            if frame.shape == self.shape and len(self._free) < self.max_free:
+                self._free.append(frame)
+
+
+def prepare_inference_frame(frame, target_height=None, out=None, mirror=False, buffers=None):
+    """
+    Downscale a BGR frame once and convert it to the RGB buffer shared by every model.
+    With `out` the conversion is written straight into that array (e.g. shared memory); with
+    `buffers` (a FrameBuffers) the downscaled and RGB frames reuse the same arrays every frame.
+    `mirror` flips the inference frame, for callers that do not need a mirrored full-size frame.
+    """
+    h, w = frame.shape[:2]
+    size = inference_size(w, h, target_height)
+    if size != (w, h):
+        small = buffers.get("downscaled", (size[1], size[0], 3)) if buffers is not None else None
+        frame = cv2.resize(frame, size, dst=small, interpolation=cv2.INTER_AREA)
+        if out is None:
+            # The downscaled frame is a scratch array, so it can become the RGB frame in place
+            out = frame
+    elif out is None and buffers is not None:
+        out = buffers.get("rgb", frame.shape)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
+    if mirror:
+        cv2.flip(rgb, 1, dst=rgb)
+    return rgb
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self.maxsize = max(1, maxsize)
+        self.on_drop = on_drop      # Called with each item dropped to make room
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(dropped)
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None if nothing arrives before the timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class FramePacket:
+    """A captured frame plus everything the later stages attach to it"""
+
+    __slots__ = ("frame_id", "capture_time", "frame", "rgb", "results", "inference_done_time")
+
+    def __init__(self, frame_id, capture_time, frame):
+        self.frame_id = frame_id
+        self.capture_time = capture_time
+        self.frame = frame
+        self.rgb = None
+        self.results = {}
+        self.inference_done_time = None
+
+
+class PipelineStats:
+    """Rolling frame rates, latencies and drop counts for the pipeline stages"""
+
+    def __init__(self, window=120):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stamps = {}
+        self._latencies = {}
+        self.counts = {}
+
+    def tick(self, stage, now=None):
+        """Record that a stage finished one frame"""
+        now = time.perf_counter() if now is None else now
+        with self._lock:
+            self._stamps.setdefault(stage, deque(maxlen=self.window)).append(now)
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def add_latency(self, name, seconds):
+        with self._lock:
+            self._latencies.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def fps(self, stage):
+        with self._lock:
+            stamps = self._stamps.get(stage)
+            if not stamps or len(stamps) < 2:
+                return 0.0
+            span = stamps[-1] - stamps[0]
+            return (len(stamps) - 1) / span if span > 0 else 0.0
+
+    def latency_ms(self, name, percentile=50):
+        with self._lock:
+            values = sorted(self._latencies.get(name, ()))
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(round(percentile / 100 * (len(values) - 1))))
+        return values[index] * 1000
+
+    def summary(self, queues=None):
+        """One-line report of stage frame rates, display latency and dropped frames"""
+        parts = [f"{stage} {self.fps(stage):.1f} fps" for stage in ("capture", "inference", "render")]
+        parts.append(f"latency {self.latency_ms('display'):.0f} ms (p95 {self.latency_ms('display', 95):.0f} ms)")
+        if queues:
+            dropped = sum(q.dropped for q in queues.values())
+            parts.append(f"dropped {dropped}")
+        return " | ".join(parts)
+
+
+class CaptureStage(threading.Thread):
+    """
+    Reads frames from the camera as fast as it delivers them, keeping only the newest.
+    With max_fps set, frames in between are only grabbed (taken from the driver, not decoded),
+    so the stages after it see at most max_fps frames a second and the camera never lags.
+    """
+
+    def __init__(self, cap, out_queue, stats, max_failures=10, pool=None):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.out_queue = out_queue
+        self.stats = stats
+        self.pool = pool or FramePool()
+        self.max_failures = max_failures
+        self.max_fps = None         # Frames per second passed on (None = every frame); set from any thread
+        self.skipped = 0            # Frames grabbed but not decoded because of max_fps
+        self.failed = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        frame_id = 0
+        failures = 0
+        last_read = 0.0
+        while not self._stop_event.is_set():
+            max_fps = self.max_fps
+            if max_fps and time.perf_counter() - last_read < 1.0 / max_fps:
+                ret = self.cap.grab()
+                if ret:
+                    self.skipped += 1
+                    failures = 0
+                else:
+                    failures += 1
+                    if failures >= self.max_failures:
+                        self.failed = True
+                        break
+                continue
+            last_read = time.perf_counter()
+            ret, frame = self.pool.read(self.cap)
+            if not ret:
+                failures += 1
+                if failures >= self.max_failures:
+                    self.failed = True
+                    break
+                continue
+            failures = 0
+            now = time.perf_counter()
+            self.out_queue.put(FramePacket(frame_id, now, frame))
+            self.stats.tick("capture", now)
+            frame_id += 1
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class InferenceStage(threading.Thread):
+    """Mirrors each frame in place, makes the (possibly smaller) RGB frame and hands it to the model callback"""
+
+    def __init__(self, in_queue, out_queue, stats, process_fn, inference_height=None, metrics=None,
+                 frame_buffer=None):
+        super().__init__(name="inference", daemon=True)
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stats = stats
+        self.process_fn = process_fn
+        self.inference_height = inference_height
+        self.metrics = metrics      # Optional MetricsRegistry for stage timers
+        self.frame_buffer = frame_buffer    # Optional (height, width, 3) -> array the RGB frame is written into
+        self.buffers = FrameBuffers()       # Downscaled / RGB frames, reused because models finish with them per frame
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            packet = self.in_queue.get(timeout=0.1)
+            if packet is None:
+                continue
+            with StageTimer(self.metrics, "prepare"):
+                cv2.flip(packet.frame, 1, dst=packet.frame)
+                # Landmarks come back normalized, so results from the smaller
+                # inference frame line up with the full-resolution display frame
+                out = None
+                if self.frame_buffer is not None:
+                    h, w = packet.frame.shape[:2]
+                    width, height = inference_size(w, h, self.inference_height)
+                    out = self.frame_buffer((height, width, 3))
+                packet.rgb = prepare_inference_frame(packet.frame, self.inference_height, out, buffers=self.buffers)
+            try:
+                packet.results = self.process_fn(packet)
+            except Exception as exc:
+                self.error = exc
+                break
+            packet.inference_done_time = time.perf_counter()
+            self.stats.add_latency("inference", packet.inference_done_time - packet.capture_time)
+            self.stats.tick("inference", packet.inference_done_time)
+            self.out_queue.put(packet)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class FramePipeline:
+    """Wires the capture and inference stages together; the caller renders on its own thread"""
+
+    def __init__(self, cap, process_fn, capture_queue_size=1, result_queue_size=2, inference_height=None,
+                 metrics=None, frame_buffer=None):
+        self.stats = PipelineStats()
+        self.pool = FramePool()
+        self.frame_queue = DropOldestQueue(capture_queue_size, self.release)
+        self.result_queue = DropOldestQueue(result_queue_size, self.release)
+        self.capture = CaptureStage(cap, self.frame_queue, self.stats, pool=self.pool)
+        self.inference = InferenceStage(self.frame_queue, self.result_queue, self.stats, process_fn,
+                                        inference_height, metrics, frame_buffer)
+
+    @property
+    def queues(self):
+        return {"frames": self.frame_queue, "results": self.result_queue}
+
+    def start(self):
+        self.capture.start()
+        self.inference.start()
+
+    def throttle(self, max_fps=None):
+        """Pass on at most max_fps camera frames a second (None = all), e.g. while nobody is playing"""
+        self.capture.max_fps = max_fps
+
+    def next_packet(self, timeout=0.5):
+        """Newest processed frame for the renderer, or None if nothing is ready yet"""
+        return self.result_queue.get(timeout=timeout)
+
+    def alive(self):
+        return self.capture.is_alive() and self.inference.is_alive()
+
+    def release(self, packet):
+        """Give a packet's camera frame back to the pool; the packet must not be drawn on afterwards"""
+        self.pool.release(packet.frame)
+        packet.frame = None
+
+    def allocations(self):
+        """Frame arrays allocated so far by the capture pool and the inference stage"""
+        return {'capture': self.pool.allocations, 'inference': self.inference.buffers.allocations}
+
+    def mark_displayed(self, packet):
+        """Record render throughput and capture-to-display latency for a shown frame, then recycle its frame"""
+        now = time.perf_counter()
+        self.stats.tick("render", now)
+        self.stats.add_latency("display", now - packet.capture_time)
+        self.release(packet)
+
+    def stop(self):
+        self.capture.stop()
+        self.inference.stop()
+        self.capture.join(timeout=1.0)
+        self.inference.join(timeout=1.0)
@@ -0,0 +1,298 @@
+"""
+Headless round engine.
+
+GameEngine is the Rock Paper Scissors round state machine on its own: no
+camera, no models, no window and no clock. It is fed timestamped
+observations (is a player in view, which gesture is locked, which emotion
+is shown) and returns the events of that moment, so the same rounds can be
+driven by the live game, by a replay, or by a script playing millions of
+them to test computer opponents or load. Turning landmarks into those
+observations is GameSession's job (game_session.py), drawing the state is
+GameRenderer's (hud.py).
+
+The countdown itself lives in RoundStateMachine, which GameEngine and the
+multi-player session (multiplayer.py) share; they only differ in when the
+players are ready and how a round is decided. Between observations,
+next_deadline() and advance() let a timer (async_runtime.py) fire the
+countdown ticks and capture on the second instead of on the next frame.
+
+Moves are also available as indices into MOVES, which is how the batch
+functions below score whole arrays of rounds at once. GameEngine.play_rounds
+decides a whole array of rounds the same way decide_round decides one:
+computer moves, scoring and emotion reactions are array operations, so
+millions of rounds take well under a second. Only an adaptive opponent
+still picks its moves one round at a time, since each prediction depends on
+the rounds before it.
+"""
+import random
+
+import numpy as np
+
+from landmark_features import EMOTIONS
+from phase_scheduler import game_phase
+
+MOVES = ["rock", "paper", "scissors"]
+MOVE_INDEX = {move: i for i, move in enumerate(MOVES)}
+
+# Events reported by GameEngine.observe
+COUNTDOWN_STARTED = "countdown_started"
+COUNTDOWN = "countdown"
+COUNTDOWN_TICK = "countdown_tick"   # Once per countdown second, and once more when capture starts
+CAPTURE = "capture"
+ROUND_DECIDED = "round_decided"
+
+# Round results from the player's point of view, indexed by (player move - computer move) % 3
+DRAW, WIN, LOSS = 0, 1, 2
+RESULT_TEXT = ("Draw!", "You Win!", "Computer Wins!")
+
+# OUTCOMES[a, b] is 1 when move a beats move b, -1 when it loses, 0 for a draw (indices into MOVES)
+OUTCOMES = np.array([
+    [0, -1, 1],     # rock: loses to paper, beats scissors
+    [1, 0, -1],     # paper: beats rock, loses to scissors
+    [-1, 1, 0],     # scissors: loses to rock, beats paper
+])
+
+REACTIONS = {
+    "happy": {
+        "You Win!": "Great! Your happiness helped you win!",
+        "Computer Wins!": "Stay positive! Your smile is still winning!",
+        "Draw!": "Happy with the tie! Keep smiling!"
+    },
+    "sad": {
+        "You Win!": "Cheer up! You won this round!",
+        "Computer Wins!": "Don't be sad, try again!",
+        "Draw!": "A tie! Maybe that will cheer you up!"
+    },
+    "surprised": {
+        "You Win!": "Surprise! You won!",
+        "Computer Wins!": "Surprised by the loss? Try again!",
+        "Draw!": "Surprising tie!"
+    },
+    "sleepy": {
+        "You Win!": "Even sleepy, you won!",
+        "Computer Wins!": "Wake up for the next round!",
+        "Draw!": "Sleepy tie! Need some coffee?"
+    },
+    "neutral": {
+        "You Win!": "Nice win!",
+        "Computer Wins!": "Better luck next time!",
+        "Draw!": "It's a tie!"
+    }
+}
+
+
+# REACTION_TEXT[emotion * 3 + result] is get_emotion_reaction(EMOTIONS[emotion], RESULT_TEXT[result])
+REACTION_TEXT = tuple(REACTIONS.get(emotion, REACTIONS["neutral"])[text] for emotion in EMOTIONS for text in RESULT_TEXT)
+
+
+def round_result(player, computer):
+    """DRAW, WIN or LOSS for the player, from move indices"""
+    return (player - computer) % 3
+
+
+def decide_winner(player, computer):
+    """Result of one round from the player's point of view"""
+    return RESULT_TEXT[round_result(MOVE_INDEX[player], MOVE_INDEX[computer])]
+
+
+def get_emotion_reaction(emotion, result):
+    """Get a reaction message based on emotion and game result"""
+    return REACTIONS.get(emotion, REACTIONS["neutral"]).get(result, result)
+
+
+def score_rounds(player_moves, computer_moves):
+    """
+    Score many rounds at once from arrays of move indices.
+    Returns the per-round results (DRAW, WIN or LOSS) and the (wins, losses, draws) totals.
+    """
+    results = (np.asarray(player_moves, dtype=np.int8) - np.asarray(computer_moves, dtype=np.int8)) % 3
+    counts = np.bincount(results, minlength=3)
+    return results, (int(counts[WIN]), int(counts[LOSS]), int(counts[DRAW]))
+
+
+class RoundStateMachine:
+    """
+    Countdown and capture shared by every game mode, advanced by timestamped observations.
+    Subclasses say when a round is decided (capture_round) and may react to a countdown starting
+    (countdown_started_hook); whether the players are in view is passed to step_round.
+    """
+
+    def __init__(self, countdown_duration=3):
+        self.countdown_duration = countdown_duration
+        self.rounds_played = 0
+        self._ready = False
+        self.restart_round()
+
+    def restart_round(self):
+        """Wait for the players to start the next countdown"""
+        self.round_active = True
+        self.countdown_started = False
+        self.countdown_start_time = 0
+        self._last_tick = None
+
+    def countdown_elapsed(self, now):
+        return now - self.countdown_start_time if self.countdown_started else 0.0
+
+    def phase(self, now):
+        """Game phase used to decide which models run on the next frame"""
+        return game_phase(self.round_active, self.countdown_started,
+                          self.countdown_elapsed(now), self.countdown_duration)
+
+    def step_round(self, now, ready):
+        """
+        Advance the round to time `now`; ready: every player of this round is in view.
+        Returns the list of events that happened at this moment.
+        """
+        self._ready = ready
+        if not (ready and self.round_active):
+            return []
+
+        events = []
+        if not self.countdown_started:
+            self.countdown_start_time = now
+            self.countdown_started = True
+            self.countdown_started_hook()
+            events.append(COUNTDOWN_STARTED)
+
+        elapsed = int(now - self.countdown_start_time)
+        if elapsed != self._last_tick and elapsed <= self.countdown_duration:
+            self._last_tick = elapsed
+            events.append(COUNTDOWN_TICK)
+        if elapsed < self.countdown_duration:
+            events.append(COUNTDOWN)
+        else:
+            events.append(CAPTURE)
+            if self.capture_round():
+                events.append(ROUND_DECIDED)
+        return events
+
+    def countdown_started_hook(self):
+        """Called when a countdown starts"""
+
+    def capture_round(self):
+        """Decide the round if every move is locked; returns True when it was decided"""
+        raise NotImplementedError
+
+    def end_round(self):
+        """Count a decided round and show its result until the next restart"""
+        self.rounds_played += 1
+        self.round_active = False
+        self.countdown_started = False
+
+    def next_deadline(self):
+        """Time of the next countdown tick (the last one starts capture), or None when no countdown is running"""
+        if not (self.round_active and self.countdown_started):
+            return None
+        tick = 0 if self._last_tick is None else self._last_tick + 1
+        if tick > self.countdown_duration:
+            return None
+        return self.countdown_start_time + tick
+
+    def advance(self, now):
+        """Advance the round to `now` without a new frame, using the last observation's players and moves"""
+        return self.step_round(now, self._ready)
+
+
+class GameEngine(RoundStateMachine):
+    """Round state machine for one player against the computer, advanced by timestamped observations"""
+
+    def __init__(self, countdown_duration=3, rng=None, opponent=None):
+        """opponent picks the computer's moves (see opponents.py); None plays at random"""
+        self.rng = rng or random.Random()
+        self.opponent = opponent
+        self.player_score = 0
+        self.computer_score = 0
+        self.current_emotion = "neutral"
+        self._gesture = None
+        super().__init__(countdown_duration)
+
+    def restart_round(self):
+        """Clear the last result and wait for a face to start the next countdown"""
+        self.result_text = ""
+        self.player_move = ""
+        self.computer_move = ""
+        super().restart_round()
+
+    def observe(self, now, face_present, gesture=None, emotion=None):
+        """
+        Advance the round to time `now`.
+        face_present: a player is in view; gesture: the locked move, or None while nothing is locked;
+        emotion: the emotion to show, or None to keep the current one.
+        Returns the list of events that happened at this moment.
+        """
+        if emotion:
+            self.current_emotion = emotion
+        self._gesture = gesture
+        return self.step_round(now, face_present)
+
+    def capture_round(self):
+        # The move is only taken once it has been locked
+        if not self._gesture:
+            return False
+        self.decide_round(self._gesture)
+        return True
+
+    def choose_computer_move(self):
+        if self.opponent is None:
+            return self.rng.choice(MOVES)
+        return MOVES[self.opponent.choose(self.rng)]
+
+    def decide_round(self, gesture, computer_move=None):
+        """Score the player's gesture against a computer move"""
+        self.player_move = gesture
+        self.computer_move = computer_move or self.choose_computer_move()
+        basic_result = decide_winner(self.player_move, self.computer_move)
+        if self.opponent is not None:
+            self.opponent.observe(MOVE_INDEX[self.player_move], MOVE_INDEX[self.computer_move])
+        if basic_result == "You Win!":
+            self.player_score += 1
+        elif basic_result == "Computer Wins!":
+            self.computer_score += 1
+        self.result_text = get_emotion_reaction(self.current_emotion, basic_result)
+        self.end_round()
+        return basic_result
+
+    def play_rounds(self, player_moves, emotions=None, computer_moves=None):
+        """
+        Decide many rounds at once, as decide_round would one after another.
+        player_moves: array of move indices; emotions: emotion indices (see landmark_features.EMOTIONS)
+        for each round, or None for the current emotion; computer_moves: None to let the opponent choose.
+        Returns (computer moves, results, reactions) as arrays; a result is DRAW, WIN or LOSS and
+        a reaction indexes REACTION_TEXT. The last round is left showing, as after decide_round.
+        """
+        player_moves = np.asarray(player_moves, dtype=np.int8)
+        rounds = len(player_moves)
+        if rounds == 0:
+            empty = np.empty(0, np.int8)
+            return empty, empty, empty
+        if computer_moves is None and self.opponent is None:
+            # Seeded from the engine's own generator, so a seeded engine plays the same batch every time
+            computer_moves = np.random.default_rng(self.rng.getrandbits(64)).integers(0, len(MOVES), rounds, np.int8)
+        elif computer_moves is None:
+            # An adaptive opponent learns from every round before predicting the next
+            computer_moves = np.empty(rounds, np.int8)
+            choose, observe = self.opponent.choose, self.opponent.observe
+            for i, player in enumerate(player_moves.tolist()):
+                computer_moves[i] = computer = choose(self.rng)
+                observe(player, computer)
+        else:
+            computer_moves = np.asarray(computer_moves, dtype=np.int8)
+            if self.opponent is not None:
+                for player, computer in zip(player_moves.tolist(), computer_moves.tolist()):
+                    self.opponent.observe(player, computer)
+
+        results, (wins, losses, _) = score_rounds(player_moves, computer_moves)
+        if emotions is None:
+            emotion = self.current_emotion if self.current_emotion in EMOTIONS else "neutral"
+            emotions = EMOTIONS.index(emotion)
+        reactions = np.asarray(emotions, dtype=np.int8) * 3 + results
+        reactions = np.broadcast_to(reactions, results.shape)
+
+        self.player_score += wins
+        self.computer_score += losses
+        self.player_move = MOVES[player_moves[-1]]
+        self.computer_move = MOVES[computer_moves[-1]]
+        self.result_text = REACTION_TEXT[reactions[-1]]
+        self.rounds_played += rounds - 1
+        self.end_round()
+        return computer_moves, results, reactions
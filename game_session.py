@@ -0,0 +1,97 @@
+"""
+Round logic shared by the live game and offline replay.
+
+GameSession turns per-frame analysis results into the observations the
+round engine (game_engine.py) runs on: it classifies and smooths the
+player's emotion and gesture, then advances the countdown, gesture capture,
+scores and emotion reaction. Time is always passed in, so recorded video
+can drive it with its own timestamps.
+"""
+import numpy as np
+
+from game_engine import GameEngine
+from landmark_features import classify_emotion, classify_emotions, classify_gesture, landmarks_to_array
+from temporal_filter import (emotion_filter, emotion_observation, gesture_filter, gesture_observation,
+                             probability_filter, probability_observation)
+
+
+def detect_emotion(face_landmarks):
+    """
+    Improved emotion detection based on facial landmarks
+    Accepts a MediaPipe landmark list or an (N, 3) landmark array
+    Returns: emotion string and confidence
+    """
+    if face_landmarks is None or len(getattr(face_landmarks, 'landmark', face_landmarks)) == 0:
+        return "neutral", 0.0
+    if not isinstance(face_landmarks, np.ndarray):
+        face_landmarks = landmarks_to_array(face_landmarks)
+    return classify_emotion(face_landmarks)
+
+def get_hand_gesture(hand_landmarks):
+    """Gesture of the first hand in a list of MediaPipe landmark lists or (21, 3) arrays"""
+    if hand_landmarks is not None and len(hand_landmarks) > 0:
+        hand = hand_landmarks[0]
+        if not isinstance(hand, np.ndarray):
+            hand = landmarks_to_array(hand)
+        return classify_gesture(hand)
+    return None
+
+
+class GameSession(GameEngine):
+    """Game state for one player, advanced one analyzed frame at a time"""
+
+    def __init__(self, countdown_duration=3, gesture_window=5, gesture_required=3,
+                 emotion_window=7, emotion_required=4, rng=None, gesture_classifier=None, emotion_classifier=None,
+                 opponent=None):
+        """
+        The classifiers are optional learned models (learned_classifiers.py) replacing the built-in rules;
+        opponent is an optional computer strategy (opponents.py) replacing random moves
+        """
+        self.gesture_classifier = gesture_classifier
+        self.emotion_classifier = emotion_classifier
+        if gesture_classifier:
+            self.gesture_smoother = probability_filter(gesture_classifier, gesture_window, gesture_required)
+        else:
+            self.gesture_smoother = gesture_filter(gesture_window, gesture_required)
+        if emotion_classifier:
+            self.emotion_smoother = probability_filter(emotion_classifier, emotion_window, emotion_required)
+        else:
+            self.emotion_smoother = emotion_filter(emotion_window, emotion_required)
+        self.emotion_confidence = 0.0
+        super().__init__(countdown_duration, rng, opponent)
+
+    def update(self, results, now):
+        """
+        Advance the game with one frame of analysis results.
+        Returns the list of events that happened on this frame.
+        """
+        fresh = results['fresh']
+
+        # The shown emotion only changes once it holds for several frames
+        emotion = None
+        if 'face_mesh' in fresh:
+            if self.emotion_classifier:
+                observation = probability_observation(self.emotion_classifier, results['face_arrays'])
+            else:
+                observation = emotion_observation(results['face_arrays'])
+            emotion = self.emotion_smoother.update(observation, now)
+            if observation is not None:
+                # Confidence comes from this frame's observation; the face is not classified a second time
+                self.emotion_confidence = (float(observation['probs'].max()) if self.emotion_classifier
+                                           else float(classify_emotions(observation)[1]))
+
+        # Feed the gesture filter from precapture on, so a gesture already held when the countdown ends locks at once
+        gesture = None
+        if self.round_active and self.countdown_started:
+            if 'hands' in fresh:
+                if self.gesture_classifier:
+                    observation = probability_observation(self.gesture_classifier, results['hand_arrays'])
+                else:
+                    observation = gesture_observation(results['hand_arrays'])
+                self.gesture_smoother.update(observation, now)
+            gesture = self.gesture_smoother.committed
+
+        return self.observe(now, bool(results['face_boxes']), gesture, emotion)
+
+    def countdown_started_hook(self):
+        self.gesture_smoother.reset()
@@ -0,0 +1,140 @@
+"""
+ROI-cropped hand tracking.
+
+Instead of handing the whole camera frame to MediaPipe Hands, the tracker
+crops a padded region around the hands found on the previous frame (or, when
+there are none yet, a region around and below the player's face) and runs
+inference on that crop. Landmarks are mapped back to full-frame normalized
+coordinates, so callers cannot tell the difference. When the crop loses the
+hand the same frame is re-run on the full image.
+"""
+import time
+
+import numpy as np
+
+
+class HandRoiTracker:
+    """Drop-in replacement for a Hands solution object that infers on a cropped region"""
+
+    def __init__(self, hands, padding=0.5, min_roi=0.25, lost_after=0.5):
+        self.hands = hands
+        self.padding = padding          # Extra margin around the last hand box, as a fraction of its size
+        self.min_roi = min_roi          # Smallest crop side, as a fraction of the frame
+        self.lost_after = lost_after    # Seconds without a hand before the last ROI is forgotten
+        self.face_boxes = []            # Latest normalized face boxes, used to seed the first crop
+        self.roi_runs = 0
+        self.full_runs = 0
+        self._roi = None                # Current crop in pixels of the last frame: (x0, y0, x1, y1)
+        self._frame_size = None         # (height, width) the ROI was measured in
+        self._last_seen = 0.0
+        self._seed_retry_at = 0.0       # Do not retry a failed face-seeded crop before this time
+        self._crop_buffer = np.empty(0, np.uint8)   # Crops are copied into its start, so no crop allocates
+
+    def _hand_box(self, hand_landmarks_list):
+        xs = [lm.x for hand in hand_landmarks_list for lm in hand.landmark]
+        ys = [lm.y for hand in hand_landmarks_list for lm in hand.landmark]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _face_seed_roi(self, w, h):
+        if not self.face_boxes:
+            return None
+        xmin, ymin, width, height = self.face_boxes[0]
+        # Hands are shown beside or below the face: take a wide band from the face down
+        return self._clamp(xmin - 1.5 * width, ymin, xmin + 2.5 * width, ymin + 4 * height, w, h)
+
+    def _clamp(self, x0, y0, x1, y1, w, h):
+        # Enforce a minimum crop size so small or distant hands still have context
+        min_w, min_h = self.min_roi, self.min_roi * w / h
+        if x1 - x0 < min_w:
+            cx = (x0 + x1) / 2
+            x0, x1 = cx - min_w / 2, cx + min_w / 2
+        if y1 - y0 < min_h:
+            cy = (y0 + y1) / 2
+            y0, y1 = cy - min_h / 2, cy + min_h / 2
+        x0, y0 = max(0, int(x0 * w)), max(0, int(y0 * h))
+        x1, y1 = min(w, int(x1 * w)), min(h, int(y1 * h))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return (x0, y0, x1, y1)
+
+    def _inside(self, roi, box, w, h, margin=0.1):
+        """Whether a normalized box sits inside the inner part of a pixel ROI"""
+        mx, my = (roi[2] - roi[0]) * margin, (roi[3] - roi[1]) * margin
+        return (box[0] * w >= roi[0] + mx and box[1] * h >= roi[1] + my and
+                box[2] * w <= roi[2] - mx and box[3] * h <= roi[3] - my)
+
+    def _remap(self, results, roi, w, h):
+        """Convert crop-relative landmarks to full-frame normalized coordinates in place"""
+        x0, y0, x1, y1 = roi
+        scale_x, scale_y = (x1 - x0) / w, (y1 - y0) / h
+        for hand_landmarks in results.multi_hand_landmarks:
+            for lm in hand_landmarks.landmark:
+                lm.x = x0 / w + lm.x * scale_x
+                lm.y = y0 / h + lm.y * scale_y
+                lm.z = lm.z * scale_x
+        return results
+
+    def _crop(self, rgb, roi):
+        """Contiguous read-only copy of an ROI, written into the reused crop buffer"""
+        x0, y0, x1, y1 = roi
+        shape = (y1 - y0, x1 - x0, rgb.shape[2])
+        size = shape[0] * shape[1] * shape[2]
+        if self._crop_buffer.size < size:
+            # Sized for the whole frame, so later crops always fit
+            self._crop_buffer = np.empty(rgb.size, np.uint8)
+        self._crop_buffer.flags.writeable = True
+        crop = self._crop_buffer[:size].reshape(shape)
+        np.copyto(crop, rgb[y0:y1, x0:x1])
+        # Read-only lets MediaPipe wrap the crop instead of copying it
+        crop.flags.writeable = False
+        return crop
+
+    def process(self, rgb):
+        h, w = rgb.shape[:2]
+        now = time.perf_counter()
+        if (h, w) != self._frame_size:
+            # The inference size changed (e.g. a quality step): a pixel ROI from the old size no longer fits
+            self._frame_size = (h, w)
+            self._roi = None
+            self._seed_retry_at = 0.0
+        if self._roi is not None and now - self._last_seen > self.lost_after:
+            self._roi = None
+
+        roi = self._roi
+        seeded = roi is None and now >= self._seed_retry_at
+        if seeded:
+            roi = self._face_seed_roi(w, h)
+        if roi is not None and (roi[2] - roi[0]) * (roi[3] - roi[1]) < w * h:
+            crop = self._crop(rgb, roi)
+            results = self.hands.process(crop)
+            self.roi_runs += 1
+            if results.multi_hand_landmarks:
+                self._update(self._remap(results, roi, w, h), w, h, now)
+                return results
+
+            if seeded:
+                # No hand near the face yet; avoid paying for crop + full frame every frame
+                self._seed_retry_at = now + self.lost_after
+
+        # Tracking lost (or nothing to seed from): fall back to the full frame
+        results = self.hands.process(rgb)
+        self.full_runs += 1
+        if results.multi_hand_landmarks:
+            self._update(results, w, h, now)
+        else:
+            self._roi = None
+        return results
+
+    def _update(self, results, w, h, now):
+        self._last_seen = now
+        box = self._hand_box(results.multi_hand_landmarks)
+        # Keep the crop steady while the hand stays inside it so MediaPipe's own
+        # frame-to-frame tracking sees a stable image; re-centre once it drifts out
+        if self._roi is None or not self._inside(self._roi, box, w, h):
+            pad = max(box[2] - box[0], box[3] - box[1]) * self.padding
+            self._roi = self._clamp(box[0] - pad, box[1] - pad, box[2] + pad, box[3] + pad, w, h)
+
+    def summary(self):
+        total = self.roi_runs + self.full_runs
+        share = self.roi_runs / total * 100 if total else 0.0
+        return f"hand ROI runs {self.roi_runs} | full-frame runs {self.full_runs} ({share:.0f}% cropped)"
@@ -0,0 +1,417 @@
+"""
+Game rendering and the cached HUD compositor.
+
+The score panel and the result banner change only when the game state does,
+so their text is rendered once into small layers (pixels + mask) keyed by the
+content it shows, and reused until that content changes. Each frame only
+darkens the panel rows in place and copies the cached text on top, instead of
+copying and blending the whole frame.
+
+GameRenderer draws everything a game frame shows from the game state alone,
+so the game logic itself (game_engine.py) never touches OpenCV.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from face_presence import draw_face_box
+from frame_pipeline import FrameBuffers
+from game_engine import CAPTURE, COUNTDOWN, ROUND_DECIDED
+from metrics import StageTimer
+from multiplayer import face_slots
+
+
+def mp_solutions():
+    """MediaPipe's solutions package, imported on first use so start-up does not wait for it"""
+    import mediapipe as mp
+    return mp.solutions
+
+
+def display_settings(camera_width):
+    """Window width and UI scaling tier for a camera width: (display_width, ui_scale, text_scale, overlay_height)"""
+    if camera_width >= 1280:
+        return 1200, 1.0, 1.0, 250    # Large window and full scale UI for high-res cameras
+    if camera_width >= 800:
+        return 900, 0.8, 0.8, 200     # Medium window, slightly smaller UI
+    return 700, 0.6, 0.6, 150         # Smaller window, much smaller UI for low-res cameras
+
+
+def draw_countdown(frame, countdown_num, text_scale, ui_scale):
+    """Pulsing countdown number in a circle at the centre of the frame"""
+    h, w = frame.shape[:2]
+    countdown_text = f"GET READY: {countdown_num}"
+
+    # Create pulsing effect with adaptive scaling
+    pulse_scale = 1.0 + 0.3 * abs(time.time() % 1 - 0.5)
+    text_scale_countdown = (2.0 * pulse_scale) * text_scale  # Apply global text scaling
+
+    text_size = cv2.getTextSize(countdown_text, cv2.FONT_HERSHEY_DUPLEX, text_scale_countdown, max(1, int(4 * text_scale)))[0]
+    text_x = max(10, (w - text_size[0]) // 2)  # Prevent negative positioning
+    text_y = h // 2
+
+    # Background circle for countdown (adaptive size)
+    circle_radius = max(30, int((text_size[0]//2 + 50) * ui_scale))
+    cv2.circle(frame, (text_x + text_size[0]//2, text_y - text_size[1]//2),
+               circle_radius, (0, 0, 0), -1)
+    cv2.circle(frame, (text_x + text_size[0]//2, text_y - text_size[1]//2),
+               circle_radius, (0, 255, 255), max(1, int(3 * ui_scale)))
+
+    # Countdown text with shadow effect (adaptive thickness)
+    shadow_thickness = max(1, int(6 * text_scale))
+    main_thickness = max(1, int(4 * text_scale))
+
+    cv2.putText(frame, countdown_text, (text_x + 2, text_y + 2),
+                cv2.FONT_HERSHEY_DUPLEX, text_scale_countdown, (0, 0, 0), shadow_thickness)
+    cv2.putText(frame, countdown_text, (text_x, text_y),
+                cv2.FONT_HERSHEY_DUPLEX, text_scale_countdown, (0, 255, 255), main_thickness)
+
+
+def draw_face_landmarks(frame, face_mesh_results):
+    """Face mesh contours for every detected face"""
+    if not face_mesh_results or not face_mesh_results.multi_face_landmarks:
+        return
+    solutions = mp_solutions()
+    mp_drawing, mp_face_mesh = solutions.drawing_utils, solutions.face_mesh
+    for face_landmarks in face_mesh_results.multi_face_landmarks:
+        mp_drawing.draw_landmarks(
+            frame,
+            face_landmarks,
+            mp_face_mesh.FACEMESH_CONTOURS,
+            mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=1),
+            mp_drawing.DrawingSpec(color=(255, 0, 255), thickness=1)
+        )
+
+
+def draw_hand_landmarks(frame, hand_results, highlight=False):
+    """Hand skeletons; highlight uses the brighter landmarks-toggle colours"""
+    if not hand_results or not hand_results.multi_hand_landmarks:
+        return
+    solutions = mp_solutions()
+    mp_drawing, mp_hands = solutions.drawing_utils, solutions.hands
+    for hand_landmarks in hand_results.multi_hand_landmarks:
+        if highlight:
+            mp_drawing.draw_landmarks(
+                frame,
+                hand_landmarks,
+                mp_hands.HAND_CONNECTIONS,
+                mp_drawing.DrawingSpec(color=(0, 255, 255), thickness=2, circle_radius=2),
+                mp_drawing.DrawingSpec(color=(255, 255, 0), thickness=2)
+            )
+        else:
+            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+
+
+class TextLayer:
+    """Pre-rendered text for one panel: BGR pixels drawn on black plus their coverage mask"""
+
+    def __init__(self, width, height):
+        self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        self._index = None
+
+    def put_text(self, text, org, font, scale, color, thickness):
+        cv2.putText(self.pixels, text, org, font, scale, color, thickness)
+        cv2.putText(self.mask, text, org, font, scale, 255, thickness)
+
+    def outlined_text(self, text, org, font, scale, color, text_scale):
+        """White outline with coloured text on top, the HUD's usual text style"""
+        self.put_text(text, org, font, scale, (255, 255, 255), max(1, int(3 * text_scale)))
+        self.put_text(text, org, font, scale, color, max(1, int(2 * text_scale)))
+
+    def blit(self, region):
+        """Composite the text onto a frame region of the same size"""
+        if self._index is None:
+            # Only text pixels are touched; anti-aliased edges are blended by coverage
+            self._index = np.nonzero(self.mask)
+            alpha = self.mask[self._index].astype(np.float32)[:, None] / 255
+            self._keep = 1.0 - alpha
+            self._src = self.pixels[self._index].astype(np.float32)
+        blended = region[self._index] * self._keep + self._src
+        region[self._index] = np.clip(blended, 0, 255).astype(np.uint8)
+
+
+class HudCompositor:
+    """Draws the score panel and result banner from cached layers"""
+
+    def __init__(self, ui_scale, text_scale, overlay_height, compact):
+        self.ui_scale = ui_scale
+        self.text_scale = text_scale
+        self.overlay_height = overlay_height
+        self.compact = compact      # Short labels for low-resolution cameras
+        self.rebuilds = 0
+        self._cache = {}
+
+    def _cached(self, name, key, build):
+        entry = self._cache.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            self._cache[name] = entry
+            self.rebuilds += 1
+        return entry[1]
+
+    def _build_top(self, w, panel_h, player_score, computer_score, emotion, show_landmarks,
+                   player_move, computer_move):
+        text_scale = self.text_scale
+        layer = TextLayer(w, panel_h)
+
+        # Calculate line spacing based on scale
+        line_height = int(35 * self.ui_scale)
+        start_y = int(45 * self.ui_scale)
+
+        if self.compact:
+            score_text = f"YOU: {player_score} | PC: {computer_score}"
+            emotion_text = f"{emotion.upper()}"
+            landmarks_text = f"Marks: {'ON' if show_landmarks else 'OFF'}"
+        else:
+            score_text = f"SCORE - YOU: {player_score}  |  COMPUTER: {computer_score}"
+            emotion_text = f"EMOTION: {emotion.upper()}"
+            landmarks_text = f"Landmarks: {'ON' if show_landmarks else 'OFF'} (L)"
+
+        layer.outlined_text(score_text, (20, start_y), cv2.FONT_HERSHEY_DUPLEX,
+                            1.0 * text_scale, (0, 255, 255), text_scale)
+        y_pos = start_y + line_height
+        layer.outlined_text(emotion_text, (20, y_pos), cv2.FONT_HERSHEY_DUPLEX,
+                            0.9 * text_scale, (255, 100, 255), text_scale)
+        y_pos += line_height
+        layer.put_text(landmarks_text, (20, y_pos), cv2.FONT_HERSHEY_SIMPLEX,
+                       0.6 * text_scale, (255, 255, 0), max(1, int(2 * text_scale)))
+
+        if player_move:
+            y_pos += line_height
+            layer.outlined_text(f"YOU: {player_move.upper()}", (20, y_pos), cv2.FONT_HERSHEY_DUPLEX,
+                                1.0 * text_scale, (0, 255, 0), text_scale)
+        if computer_move:
+            y_pos += line_height
+            computer_text = f"PC: {computer_move.upper()}" if self.compact else f"COMPUTER: {computer_move.upper()}"
+            layer.outlined_text(computer_text, (20, y_pos), cv2.FONT_HERSHEY_DUPLEX,
+                                1.0 * text_scale, (0, 100, 255), text_scale)
+        return layer
+
+    def _build_result(self, w, area_h, result_text):
+        text_scale = self.text_scale
+        layer = TextLayer(w, area_h)
+
+        display_result = result_text
+        if self.compact and len(result_text) > 25:
+            # Truncate long messages for small screens
+            display_result = result_text[:22] + "..."
+
+        result_font_size = 1.3 * text_scale
+        result_size = cv2.getTextSize(display_result, cv2.FONT_HERSHEY_DUPLEX, result_font_size,
+                                      max(1, int(3 * text_scale)))[0]
+        result_x = max(10, (w - result_size[0]) // 2)  # Prevent negative positioning
+        result_y = area_h - int(70 * self.ui_scale)
+        layer.put_text(display_result, (result_x, result_y), cv2.FONT_HERSHEY_DUPLEX,
+                       result_font_size, (255, 255, 255), max(1, int(4 * text_scale)))
+        layer.put_text(display_result, (result_x, result_y), cv2.FONT_HERSHEY_DUPLEX,
+                       result_font_size, (0, 255, 255), max(1, int(3 * text_scale)))
+
+        if self.compact:
+            instruction_text = "[R] Again | [Q] Quit | [L] Marks"
+        else:
+            instruction_text = "Press [R] to play again  |  [Q] to quit  |  [L] to toggle landmarks"
+        inst_font_size = 0.8 * text_scale
+        inst_size = cv2.getTextSize(instruction_text, cv2.FONT_HERSHEY_SIMPLEX, inst_font_size,
+                                    max(1, int(2 * text_scale)))[0]
+        inst_x = max(10, (w - inst_size[0]) // 2)
+        inst_y = area_h - int(30 * self.ui_scale)
+        layer.put_text(instruction_text, (inst_x, inst_y), cv2.FONT_HERSHEY_SIMPLEX,
+                       inst_font_size, (200, 200, 200), max(1, int(2 * text_scale)))
+        return layer
+
+    def _build_prompt(self, w, area_h):
+        text_scale = self.text_scale
+        layer = TextLayer(w, area_h)
+        instruction_text = "Show face to start!" if self.compact else "Show your face to start a new round!"
+        inst_font_size = 1.0 * text_scale
+        inst_size = cv2.getTextSize(instruction_text, cv2.FONT_HERSHEY_SIMPLEX, inst_font_size,
+                                    max(1, int(3 * text_scale)))[0]
+        inst_x = max(10, (w - inst_size[0]) // 2)
+        inst_y = area_h - int(50 * self.ui_scale)
+        layer.put_text(instruction_text, (inst_x, inst_y), cv2.FONT_HERSHEY_SIMPLEX,
+                       inst_font_size, (255, 255, 0), max(1, int(3 * text_scale)))
+        return layer
+
+    def _build_scoreboard(self, w, panel_h, scores, mode_text, show_landmarks, moves):
+        text_scale = self.text_scale
+        layer = TextLayer(w, panel_h)
+        line_height = int(35 * self.ui_scale)
+        y_pos = int(45 * self.ui_scale)
+
+        score_text = "  |  ".join(f"{name}: {score}" for name, score in scores)
+        layer.outlined_text(score_text, (20, y_pos), cv2.FONT_HERSHEY_DUPLEX,
+                            1.0 * text_scale, (0, 255, 255), text_scale)
+        y_pos += line_height
+        layer.outlined_text(mode_text, (20, y_pos), cv2.FONT_HERSHEY_DUPLEX,
+                            0.9 * text_scale, (255, 100, 255), text_scale)
+        y_pos += line_height
+        landmarks_text = f"Marks: {'ON' if show_landmarks else 'OFF'}" if self.compact else \
+            f"Landmarks: {'ON' if show_landmarks else 'OFF'} (L)"
+        layer.put_text(landmarks_text, (20, y_pos), cv2.FONT_HERSHEY_SIMPLEX,
+                       0.6 * text_scale, (255, 255, 0), max(1, int(2 * text_scale)))
+        if moves:
+            y_pos += line_height
+            moves_text = "  ".join(f"{name}: {move.upper()}" for name, move in moves)
+            layer.outlined_text(moves_text, (20, y_pos), cv2.FONT_HERSHEY_DUPLEX,
+                                1.0 * text_scale, (0, 255, 0), text_scale)
+        return layer
+
+    def _top_panel(self, frame):
+        """Darken the score panel rows in place and return them"""
+        h = frame.shape[0]
+        panel_h = min(h, int(self.overlay_height * self.ui_scale) + 1)  # Same rows cv2.rectangle covered
+        top = frame[:panel_h]
+        cv2.convertScaleAbs(top, top, alpha=0.4)
+        return top
+
+    def draw(self, frame, player_score, computer_score, emotion, show_landmarks,
+             player_move, computer_move, result_text, round_active):
+        """Composite the HUD onto a frame in place"""
+        w = frame.shape[1]
+
+        # Score panel: darken the top rows in place, then copy the cached text on top
+        top = self._top_panel(frame)
+        panel_h = top.shape[0]
+        key = (w, panel_h, player_score, computer_score, emotion, show_landmarks, player_move, computer_move)
+        self._cached('top', key, lambda: self._build_top(w, panel_h, *key[2:])).blit(top)
+        self._draw_bottom(frame, result_text, round_active)
+
+    def draw_scoreboard(self, frame, scores, mode_text, show_landmarks, moves, result_text, round_active):
+        """Multi-player variant of draw; scores and moves are lists of (player name, value)"""
+        w = frame.shape[1]
+        top = self._top_panel(frame)
+        panel_h = top.shape[0]
+        key = (w, panel_h, tuple(scores), mode_text, show_landmarks, tuple(moves))
+        self._cached('top', key, lambda: self._build_scoreboard(w, panel_h, scores, mode_text,
+                                                               show_landmarks, moves)).blit(top)
+        self._draw_bottom(frame, result_text, round_active)
+
+    def _draw_bottom(self, frame, result_text, round_active):
+        h, w = frame.shape[:2]
+        area_h = min(h, int(120 * self.ui_scale))
+        bottom = frame[h - area_h:]
+        if result_text:
+            cv2.convertScaleAbs(bottom, bottom, alpha=0.3)
+            layer = self._cached('result', (w, area_h, result_text),
+                                 lambda: self._build_result(w, area_h, result_text))
+            layer.blit(bottom)
+        elif not round_active:
+            self._cached('prompt', (w, area_h), lambda: self._build_prompt(w, area_h)).blit(bottom)
+
+
+class MetricsOverlay:
+    """Performance panel under the score panel; its text is re-rendered only every `refresh` seconds"""
+
+    def __init__(self, ui_scale, text_scale, overlay_height, refresh=0.5):
+        self.ui_scale = ui_scale
+        self.text_scale = text_scale
+        self.overlay_height = overlay_height
+        self.refresh = refresh
+        self._layer = None
+        self._built_at = 0.0
+        self._size = None
+
+    def _build(self, w, lines):
+        line_height = max(12, int(22 * self.ui_scale))
+        font_size = 0.5 * self.text_scale
+        thickness = max(1, int(1 * self.text_scale))
+        widths = [cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, font_size, thickness)[0][0] for line in lines]
+        panel_w = min(w, max(widths, default=0) + 20)
+        panel_h = line_height * len(lines) + int(10 * self.ui_scale)
+        layer = TextLayer(panel_w, panel_h)
+        for i, line in enumerate(lines):
+            layer.put_text(line, (10, line_height * (i + 1)), cv2.FONT_HERSHEY_SIMPLEX,
+                           font_size, (0, 255, 0), thickness)
+        return layer
+
+    def draw(self, frame, lines_fn, now):
+        """Composite the panel onto a frame; lines_fn is only called when the text is due a refresh"""
+        h, w = frame.shape[:2]
+        if self._layer is None or now - self._built_at >= self.refresh or self._size != (w, h):
+            self._layer = self._build(w, lines_fn())
+            self._built_at = now
+            self._size = (w, h)
+
+        top = min(h, int(self.overlay_height * self.ui_scale) + 1)
+        layer_h, layer_w = self._layer.mask.shape
+        if top + layer_h > h:
+            return
+        region = frame[top:top + layer_h, w - layer_w:]
+        cv2.convertScaleAbs(region, region, alpha=0.4)
+        self._layer.blit(region)
+
+
+class GameRenderer:
+    """Draws a game frame from the session state: face boxes, countdown, landmarks, HUD and the display resize"""
+
+    def __init__(self, camera_width, players=1, metrics=None):
+        self.display_width, self.ui_scale, self.text_scale, overlay_height = display_settings(camera_width)
+        self.hud = HudCompositor(self.ui_scale, self.text_scale, overlay_height, compact=camera_width < 800)
+        self.metrics_overlay = MetricsOverlay(self.ui_scale, self.text_scale, overlay_height)
+        self.players = players
+        self.metrics = metrics      # Optional MetricsRegistry for the draw / hud / resize stage timings
+        self.buffers = FrameBuffers()
+
+    def render(self, frame, results, session, events, now, show_landmarks=False, metrics_lines=None):
+        """
+        Draw one frame's state onto `frame` in place and return it resized for display.
+        The resized frame is the renderer's own array, overwritten by the next call.
+        events are what session.update returned for this frame; metrics_lines, when given,
+        is called for the performance overlay text.
+        """
+        with StageTimer(self.metrics, "draw"):
+            self._draw_overlays(frame, results, session, events, now, show_landmarks)
+        with StageTimer(self.metrics, "hud") as timer:
+            self._draw_hud(frame, session, show_landmarks, metrics_lines, timer.start)
+        with StageTimer(self.metrics, "resize"):
+            # Resize the frame for display, keeping its aspect ratio, into the same array every frame
+            h, w = frame.shape[:2]
+            height = int(self.display_width * h / w)
+            resized = cv2.resize(frame, (self.display_width, height),
+                                 dst=self.buffers.get("display", (height, self.display_width, 3)))
+        return resized
+
+    def _draw_overlays(self, frame, results, session, events, now, show_landmarks):
+        """Face boxes, countdown and landmarks"""
+        face_boxes = results['face_boxes']
+        # Boxes stay up on the frame that decides the round, which is drawn before the result shows
+        if face_boxes and (session.round_active or ROUND_DECIDED in events):
+            if self.players > 1:
+                for box, slot in zip(face_boxes, face_slots(face_boxes, self.players)):
+                    draw_face_box(frame, box, label=session.players[slot].name)
+            else:
+                for box in face_boxes:
+                    draw_face_box(frame, box)
+
+        # Draw face mesh landmarks if toggle is enabled
+        if show_landmarks:
+            draw_face_landmarks(frame, results['face_mesh'])
+
+        # Countdown overlay with adaptive styling
+        if COUNTDOWN in events:
+            remaining = session.countdown_duration - int(session.countdown_elapsed(now))
+            draw_countdown(frame, remaining, self.text_scale, self.ui_scale)
+
+        # Always draw basic hand landmarks during gesture capture
+        if CAPTURE in events:
+            draw_hand_landmarks(frame, results['hands'])
+
+        # Draw hand landmarks outside of game logic if toggle is enabled
+        if show_landmarks and not session.round_active:
+            draw_hand_landmarks(frame, results['hands'], highlight=True)
+
+    def _draw_hud(self, frame, session, show_landmarks, metrics_lines, started):
+        """Score panel, result banner and the performance overlay (refreshed by the perf_counter time `started`)"""
+        # Score panel and result banner come from cached layers, blended only over their rows
+        if self.players > 1:
+            self.hud.draw_scoreboard(frame, [(player.name, player.score) for player in session.players],
+                                     session.mode_text, show_landmarks,
+                                     [(player.name, player.move) for player in session.players if player.move],
+                                     session.result_text, session.round_active)
+        else:
+            self.hud.draw(frame, session.player_score, session.computer_score, session.current_emotion,
+                          show_landmarks, session.player_move, session.computer_move, session.result_text,
+                          session.round_active)
+        if metrics_lines is not None:
+            self.metrics_overlay.draw(frame, metrics_lines, started)
@@ -0,0 +1,178 @@
+"""
+Landmark arrays and vectorized emotion / gesture features.
+
+Each MediaPipe landmark list is converted once per frame into a float32
+array of shape (N, 3) holding x, y, z. Emotion and gesture features are
+then computed with array operations on named index groups, so the same code
+classifies one face or a whole batch of recorded frames shaped (B, N, 3).
+"""
+import numpy as np
+
+# Face mesh landmark indices used for emotion detection
+FACE_POINTS = {
+    # Mouth landmarks
+    'mouth_left': 61,     # Left mouth corner
+    'mouth_right': 291,   # Right mouth corner
+    'upper_lip': 12,      # Upper lip center
+    'lower_lip': 15,      # Lower lip center
+    # Eye landmarks
+    'left_eye_top': 159,
+    'left_eye_bottom': 145,
+    'right_eye_top': 386,
+    'right_eye_bottom': 374,
+    'left_eye_inner': 133,
+    'left_eye_outer': 33,
+    'right_eye_inner': 362,
+    'right_eye_outer': 263,
+    # Eyebrow landmarks
+    'left_eyebrow_inner': 70,
+    'right_eyebrow_inner': 300,
+}
+
+# Index groups, gathered in one fancy-indexing call each
+MOUTH = np.array([FACE_POINTS['mouth_left'], FACE_POINTS['mouth_right'],
+                  FACE_POINTS['upper_lip'], FACE_POINTS['lower_lip']])
+EYES = np.array([FACE_POINTS['left_eye_top'], FACE_POINTS['left_eye_bottom'],
+                 FACE_POINTS['right_eye_top'], FACE_POINTS['right_eye_bottom'],
+                 FACE_POINTS['left_eye_inner'], FACE_POINTS['left_eye_outer'],
+                 FACE_POINTS['right_eye_inner'], FACE_POINTS['right_eye_outer']])
+EYEBROWS = np.array([FACE_POINTS['left_eyebrow_inner'], FACE_POINTS['right_eyebrow_inner']])
+
+# Hand landmark indices: thumb tip / IP joint, then fingertips and their PIP joints
+THUMB_TIP, THUMB_IP = 4, 3
+FINGER_TIPS = np.array([8, 12, 16, 20])
+FINGER_PIPS = FINGER_TIPS - 2
+
+EMOTIONS = ("surprised", "happy", "sad", "sleepy", "neutral")
+NEUTRAL_CONFIDENCE = 0.6
+
+# Finger-up patterns (thumb, index, middle, ring, pinky) encoded as bits -> gesture
+GESTURE_PATTERNS = {
+    0b00000: "rock",
+    0b11111: "paper",
+    0b00110: "scissors",   # Index and middle finger up
+}
+FINGER_BITS = 1 << np.arange(5)
+
+
+def landmarks_to_array(landmark_list):
+    """Convert a MediaPipe NormalizedLandmarkList into an (N, 3) float32 array"""
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmark_list.landmark], dtype=np.float32)
+
+
+def results_to_arrays(landmark_lists):
+    """Convert every face or hand in a MediaPipe result into landmark arrays"""
+    if not landmark_lists:
+        return []
+    return [landmarks_to_array(landmarks) for landmarks in landmark_lists]
+
+
+def result_arrays(result, field):
+    """
+    Landmark arrays of a MediaPipe result (field is e.g. 'multi_face_landmarks'),
+    or the arrays an inference worker process already sent back.
+    """
+    if result is None:
+        return []
+    if hasattr(result, 'arrays'):
+        return list(result.arrays)
+    return results_to_arrays(getattr(result, field))
+
+
+def _ratio(numerator, denominator):
+    """Elementwise numerator / denominator, 0 where the denominator is not positive"""
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def emotion_features(faces):
+    """
+    Emotion features for face arrays shaped (N, 3) or (B, N, 3).
+    Returns a dict of feature name -> array with the batch shape.
+    """
+    faces = np.asarray(faces, dtype=np.float32)
+    mouth = faces[..., MOUTH, :2]
+    eyes = faces[..., EYES, :2]
+    brows = faces[..., EYEBROWS, 1]
+
+    mouth_left, mouth_right, upper_lip, lower_lip = (mouth[..., i, :] for i in range(4))
+    mouth_width = np.abs(mouth_right[..., 0] - mouth_left[..., 0])
+    mouth_height = np.abs(upper_lip[..., 1] - lower_lip[..., 1])
+
+    # Mouth openness, lower-lip drop and smile curve, all relative to mouth width
+    mouth_center_y = (mouth_left[..., 1] + mouth_right[..., 1]) / 2
+    lip_center_y = (upper_lip[..., 1] + lower_lip[..., 1]) / 2
+
+    # Eye heights (top/bottom) and widths (inner/outer) for both eyes at once
+    eye_heights = np.abs(eyes[..., [0, 2], 1] - eyes[..., [1, 3], 1])
+    eye_widths = np.abs(eyes[..., [5, 7], 0] - eyes[..., [4, 6], 0])
+    avg_eye_height = eye_heights.mean(axis=-1)
+    avg_eye_width = eye_widths.mean(axis=-1)
+
+    # Eyebrow height above the top of each eye
+    eyebrow_heights = np.abs(brows - eyes[..., [0, 2], 1])
+
+    return {
+        'mouth_width': mouth_width,
+        'mouth_height': mouth_height,
+        'mouth_openness': _ratio(mouth_height, mouth_width),
+        'lower_lip_drop': _ratio(np.abs(lower_lip[..., 1] - mouth_center_y), mouth_width),
+        'smile_curve': _ratio(mouth_center_y - lip_center_y, mouth_width),
+        'eye_aspect_ratio': _ratio(avg_eye_height, avg_eye_width),
+        'eyebrow_height': eyebrow_heights.mean(axis=-1),
+    }
+
+
+def classify_emotions(features):
+    """
+    Threshold classifier over emotion features.
+    Returns (emotion index array, confidence array); names are in EMOTIONS.
+    """
+    openness = features['mouth_openness']
+    smile = features['smile_curve']
+    ear = features['eye_aspect_ratio']
+    brows = features['eyebrow_height']
+
+    # SURPRISE: Wide eyes + raised eyebrows + open mouth + dropped lower lip
+    surprised = (openness > 0.15) & (features['lower_lip_drop'] > 0.02) & (ear > 0.25) & (brows > 0.03)
+    # HAPPY: Smile curve (negative = upward curve)
+    happy = (smile < -0.003) & (openness > 0.05)
+    # SAD: Frown curve (positive = downward curve)
+    sad = smile > 0.002
+    # SLEEPY: Very small eye opening
+    sleepy = ear < 0.15
+
+    # np.select keeps the first matching condition, the same priority as an if/elif chain
+    conditions = [surprised, happy, sad, sleepy]
+    labels = np.select(conditions, np.arange(4), default=4)
+    confidence = np.select(conditions, [
+        np.minimum((openness + ear + brows) * 2, 1.0),
+        np.minimum(np.abs(smile) * 200, 1.0),
+        np.minimum(smile * 200, 1.0),
+        np.minimum((0.2 - ear) * 3, 1.0),
+    ], default=NEUTRAL_CONFIDENCE)
+    return labels, confidence
+
+
+def classify_emotion(face):
+    """Emotion name and confidence for a single (N, 3) face array"""
+    labels, confidence = classify_emotions(emotion_features(face))
+    return EMOTIONS[int(labels)], float(confidence)
+
+
+def finger_states(hands):
+    """Finger-up booleans (thumb, index, middle, ring, pinky) for hand arrays shaped (..., 21, 3)"""
+    hands = np.asarray(hands, dtype=np.float32)
+    thumb = hands[..., THUMB_TIP, 0] < hands[..., THUMB_IP, 0]
+    fingers = hands[..., FINGER_TIPS, 1] < hands[..., FINGER_PIPS, 1]
+    return np.concatenate([thumb[..., None], fingers], axis=-1)
+
+
+def classify_gestures(hands):
+    """Gesture name (or None) for every hand in a batch shaped (..., 21, 3)"""
+    codes = (finger_states(hands) * FINGER_BITS).sum(axis=-1)
+    return [GESTURE_PATTERNS.get(int(code)) for code in np.ravel(codes)]
+
+
+def classify_gesture(hand):
+    """Gesture name (or None) for a single (21, 3) hand array"""
+    return classify_gestures(hand)[0]
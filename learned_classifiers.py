@@ -0,0 +1,307 @@
+"""
+Learned gesture and emotion classifiers.
+
+The built-in rules look at finger-up booleans and fixed emotion thresholds:
+the thumb test assumes a right hand, and a hand shape that does not match a
+pattern exactly is no gesture at all. The models here learn from labeled
+frames of recorded sessions (see session_recorder.py). Landmarks are first
+normalized - moved to a common origin, scaled, rotated upright and, for
+hands, mirrored so left and right hands look alike - and then a k-nearest-
+neighbour or a small one-hidden-layer MLP maps them to class probabilities.
+
+classify_batch() takes landmarks shaped (N, K, 3), so every hand of a frame
+or every face of a recorded session is classified in one vectorized call.
+Models are plain numpy arrays saved as .npz files that load in milliseconds.
+
+    python learned_classifiers.py gesture sessions/*.rpslog --labels labels.jsonl --out gesture.npz
+    python learned_classifiers.py emotion sessions/*.rpslog --labels labels.jsonl --model knn --out emotion.npz
+
+Label files are JSON lines, each marking a time span of one log:
+
+    {"log": "game.rpslog", "start": 1712000000.0, "end": 1712000002.5, "gesture": "rock"}
+    {"log": "game.rpslog", "start": 1712000010.0, "end": 1712000013.0, "emotion": "happy"}
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from landmark_features import EMOTIONS
+from session_recorder import SessionLog, decode_points
+
+GESTURE_LABELS = ("rock", "paper", "scissors", "none")    # "none": a hand that shows no move
+EMOTION_LABELS = EMOTIONS
+
+# Face mesh points the emotion features use: lips (outer, inner), eyes and eyebrows.
+# All are below 468, so meshes without the iris refinement work too
+FACE_FEATURE_POINTS = np.array([
+    61, 146, 91, 181, 84, 17, 314, 405, 321, 375, 291, 409, 270, 269, 267, 0, 37, 39, 40, 185,
+    78, 95, 88, 178, 87, 14, 317, 402, 318, 324, 308, 415, 310, 311, 312, 13, 82, 81, 80, 191,
+    33, 160, 159, 158, 133, 153, 145, 144,
+    263, 387, 386, 385, 362, 380, 374, 373,
+    70, 63, 105, 66, 107, 300, 293, 334, 296, 336,
+])
+LEFT_EYE_OUTER, RIGHT_EYE_OUTER = 33, 263
+WRIST, MIDDLE_KNUCKLE, INDEX_KNUCKLE, PINKY_KNUCKLE = 0, 9, 5, 17
+
+
+def _align(points, origin, axis, angle_offset=0.0):
+    """Move `origin` to 0, scale so |axis| is 1 and rotate by -(angle of axis + angle_offset), per sample"""
+    points = points - origin[:, None, :]
+    length = np.linalg.norm(axis[:, :2], axis=1)
+    scale = np.where(length > 1e-6, length, 1.0)
+    theta = np.arctan2(axis[:, 1], axis[:, 0]) + angle_offset
+    c, s = np.cos(theta)[:, None], np.sin(theta)[:, None]
+    x, y = points[..., 0], points[..., 1]
+    aligned = np.empty_like(points)
+    aligned[..., 0] = x * c + y * s
+    aligned[..., 1] = y * c - x * s
+    aligned[..., 2] = points[..., 2]
+    return aligned / scale[:, None, None]
+
+
+def hand_features(hands):
+    """(N, 21, 3) hands -> (N, 60) features: wrist at 0, wrist-to-middle-knuckle pointing up with length 1"""
+    hands = np.asarray(hands, dtype=np.float32).reshape(-1, 21, 3)
+    points = _align(hands, hands[:, WRIST], hands[:, MIDDLE_KNUCKLE] - hands[:, WRIST], np.pi / 2)
+    # Mirror left hands onto right hands: the index knuckle always ends up right of the pinky knuckle
+    flip = points[:, INDEX_KNUCKLE, 0] < points[:, PINKY_KNUCKLE, 0]
+    points[flip, :, 0] *= -1
+    return points[:, 1:].reshape(len(points), -1)
+
+
+def face_features(faces):
+    """(N, K, 3) faces -> (N, 132) features: eye corners level, centred between them and 1 apart"""
+    faces = np.asarray(faces, dtype=np.float32)
+    faces = faces.reshape(-1, *faces.shape[-2:])
+    left, right = faces[:, LEFT_EYE_OUTER], faces[:, RIGHT_EYE_OUTER]
+    points = _align(faces[:, FACE_FEATURE_POINTS], (left + right) / 2, right - left)
+    return points[..., :2].reshape(len(points), -1)
+
+
+FEATURES = {'gesture': hand_features, 'emotion': face_features}
+LABELS = {'gesture': GESTURE_LABELS, 'emotion': EMOTION_LABELS}
+
+
+class LandmarkClassifier:
+    """Shared part of the models: landmark normalization, class names and the confidence threshold"""
+
+    model = None
+
+    def __init__(self, kind, labels=None, min_confidence=0.5):
+        self.kind = kind
+        self.labels = tuple(labels or LABELS[kind])
+        self.features = FEATURES[kind]
+        self.min_confidence = min_confidence
+
+    def predict_proba(self, landmarks):
+        """Class probabilities (N, classes) for landmarks shaped (N, K, 3)"""
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        if landmarks.size == 0:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        return self._proba(self.features(landmarks))
+
+    def label_of(self, probs):
+        """Class name for one probability vector; None for "none" or when no class is confident enough"""
+        best = int(np.argmax(probs))
+        if probs[best] < self.min_confidence or self.labels[best] == "none":
+            return None
+        return self.labels[best]
+
+    def classify_batch(self, landmarks):
+        """Class names (or None) and confidences for every hand or face in landmarks shaped (N, K, 3)"""
+        probs = self.predict_proba(landmarks)
+        return [self.label_of(p) for p in probs], probs.max(axis=1) if len(probs) else np.zeros(0, np.float32)
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, model=self.model, labels=np.array(self.labels),
+                 min_confidence=self.min_confidence, **self._arrays())
+
+
+class KNNClassifier(LandmarkClassifier):
+    """k nearest training samples vote; probabilities are the vote shares"""
+
+    model = "knn"
+
+    def __init__(self, kind, features, targets, k=5, labels=None, min_confidence=0.5):
+        super().__init__(kind, labels, min_confidence)
+        self.train_features = np.asarray(features, dtype=np.float32)
+        self.targets = np.asarray(targets, dtype=np.int64)
+        self.k = min(k, len(self.targets))
+        self._norms = (self.train_features ** 2).sum(axis=1)
+
+    @classmethod
+    def train(cls, kind, landmarks, targets, k=5, max_per_class=500, seed=0, labels=None):
+        """Keep up to max_per_class normalized samples of each class"""
+        features = FEATURES[kind](landmarks)
+        targets = np.asarray(targets)
+        rng = np.random.default_rng(seed)
+        keep = np.concatenate([rng.permutation(np.flatnonzero(targets == c))[:max_per_class]
+                               for c in np.unique(targets)])
+        return cls(kind, features[keep], targets[keep], k, labels)
+
+    def _proba(self, features):
+        # Squared distances to every training sample in one matrix product (minus the query's own norm,
+        # which is the same along a row and cannot change the nearest neighbours)
+        distances = self._norms[None, :] - 2 * features @ self.train_features.T
+        nearest = np.argpartition(distances, self.k - 1, axis=1)[:, :self.k]
+        probs = np.zeros((len(features), len(self.labels)), dtype=np.float32)
+        np.add.at(probs, (np.arange(len(features))[:, None], self.targets[nearest]), 1.0 / self.k)
+        return probs
+
+    def _arrays(self):
+        return {'features': self.train_features, 'targets': self.targets, 'k': self.k}
+
+
+class MLPClassifier(LandmarkClassifier):
+    """Standardized features -> one ReLU hidden layer -> softmax"""
+
+    model = "mlp"
+
+    def __init__(self, kind, mean, std, w1, b1, w2, b2, labels=None, min_confidence=0.5):
+        super().__init__(kind, labels, min_confidence)
+        self.mean, self.std = np.asarray(mean, np.float32), np.asarray(std, np.float32)
+        self.w1, self.b1 = np.asarray(w1, np.float32), np.asarray(b1, np.float32)
+        self.w2, self.b2 = np.asarray(w2, np.float32), np.asarray(b2, np.float32)
+
+    @classmethod
+    def train(cls, kind, landmarks, targets, hidden=32, epochs=200, batch_size=256, learning_rate=0.01,
+              weight_decay=1e-4, seed=0, labels=None):
+        """Mini-batch Adam on the cross-entropy loss"""
+        features = FEATURES[kind](landmarks)
+        targets = np.asarray(targets)
+        classes = len(labels or LABELS[kind])
+        mean = features.mean(axis=0)
+        std = features.std(axis=0) + 1e-6
+        x = (features - mean) / std
+        onehot = np.eye(classes, dtype=np.float32)[targets]
+
+        rng = np.random.default_rng(seed)
+        params = [rng.normal(0, np.sqrt(2 / x.shape[1]), (x.shape[1], hidden)).astype(np.float32),
+                  np.zeros(hidden, np.float32),
+                  rng.normal(0, np.sqrt(1 / hidden), (hidden, classes)).astype(np.float32),
+                  np.zeros(classes, np.float32)]
+        moments = [np.zeros_like(p) for p in params]
+        velocities = [np.zeros_like(p) for p in params]
+        step = 0
+        for _ in range(epochs):
+            order = rng.permutation(len(x))
+            for start in range(0, len(x), batch_size):
+                batch = order[start:start + batch_size]
+                w1, b1, w2, b2 = params
+                pre = x[batch] @ w1 + b1
+                hidden_out = np.maximum(pre, 0)
+                logits = hidden_out @ w2 + b2
+                logits -= logits.max(axis=1, keepdims=True)
+                probs = np.exp(logits)
+                probs /= probs.sum(axis=1, keepdims=True)
+
+                grad = (probs - onehot[batch]) / len(batch)
+                grad_hidden = (grad @ w2.T) * (pre > 0)
+                grads = [x[batch].T @ grad_hidden + weight_decay * w1, grad_hidden.sum(axis=0),
+                         hidden_out.T @ grad + weight_decay * w2, grad.sum(axis=0)]
+                step += 1
+                for p, g, m, v in zip(params, grads, moments, velocities):
+                    m *= 0.9
+                    m += 0.1 * g
+                    v *= 0.999
+                    v += 0.001 * g * g
+                    p -= learning_rate * (m / (1 - 0.9 ** step)) / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8)
+        return cls(kind, mean, std, *params, labels=labels)
+
+    def _proba(self, features):
+        hidden = np.maximum(((features - self.mean) / self.std) @ self.w1 + self.b1, 0)
+        logits = hidden @ self.w2 + self.b2
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def _arrays(self):
+        return {'mean': self.mean, 'std': self.std, 'w1': self.w1, 'b1': self.b1, 'w2': self.w2, 'b2': self.b2}
+
+
+MODELS = {'knn': KNNClassifier, 'mlp': MLPClassifier}
+
+
+def load_classifier(path):
+    """Load a model saved by LandmarkClassifier.save()"""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    kind, model = str(arrays.pop('kind')), str(arrays.pop('model'))
+    labels = tuple(arrays.pop('labels').tolist())
+    min_confidence = float(arrays.pop('min_confidence'))
+    if model == "knn":
+        return KNNClassifier(kind, arrays['features'], arrays['targets'], int(arrays['k']), labels, min_confidence)
+    return MLPClassifier(kind, arrays['mean'], arrays['std'], arrays['w1'], arrays['b1'], arrays['w2'], arrays['b2'],
+                         labels, min_confidence)
+
+
+def load_label_spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def labeled_landmarks(log_paths, labels_path, kind):
+    """
+    Landmarks and class indices of every frame inside a labeled span where the model ran.
+    Gestures use the first hand of a frame, emotions the first face.
+    """
+    labels = LABELS[kind]
+    model_name, count_field, origin_field, point_field = (("hands", "hands", "hand_origin", "hand") if kind == "gesture"
+                                                          else ("face_mesh", "faces", "face_origin", "face"))
+    spans = [span for span in load_label_spans(labels_path) if span.get(kind) in labels]
+    landmarks, targets = [], []
+    for path in log_paths:
+        log = SessionLog(path)
+        bit = 1 << log.model_names.index(model_name)
+        for span in spans:
+            if os.path.basename(span['log']) != os.path.basename(path):
+                continue
+            records = log.records[log.index_at(span['start']):log.index_at(span['end'])]
+            records = records[((records['fresh'] & bit) > 0) & (records[count_field] > 0)]
+            if len(records):
+                landmarks.append(decode_points(records[origin_field][:, 0], records[point_field][:, 0]))
+                targets.append(np.full(len(records), labels.index(span[kind])))
+        log.close()
+    if not landmarks:
+        return np.zeros((0, 21 if kind == "gesture" else 478, 3), np.float32), np.zeros(0, np.int64)
+    return np.concatenate(landmarks), np.concatenate(targets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a gesture or emotion classifier from labeled session logs")
+    parser.add_argument("kind", choices=sorted(FEATURES), help="What to classify")
+    parser.add_argument("logs", nargs="+", help="Session logs written by SessionRecorder")
+    parser.add_argument("--labels", required=True, help="JSON lines of labeled time spans")
+    parser.add_argument("--model", choices=sorted(MODELS), default="mlp")
+    parser.add_argument("--out", required=True, help="Where to save the model (.npz)")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours for k-NN")
+    parser.add_argument("--hidden", type=int, default=32, help="Hidden units for the MLP")
+    parser.add_argument("--epochs", type=int, default=200, help="Training epochs for the MLP")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    landmarks, targets = labeled_landmarks(args.logs, args.labels, args.kind)
+    if not len(targets):
+        raise SystemExit(f"❌ No labeled {args.kind} frames found in the logs")
+    counts = {LABELS[args.kind][c]: int(n) for c, n in zip(*np.unique(targets, return_counts=True))}
+    print(f"📚 {len(targets)} labeled frames: {counts}")
+
+    start = time.perf_counter()
+    if args.model == "knn":
+        classifier = KNNClassifier.train(args.kind, landmarks, targets, k=args.k, seed=args.seed)
+    else:
+        classifier = MLPClassifier.train(args.kind, landmarks, targets, hidden=args.hidden, epochs=args.epochs,
+                                         seed=args.seed)
+    predicted = classifier.predict_proba(landmarks).argmax(axis=1)
+    print(f"🏋️  Trained {args.model} in {time.perf_counter() - start:.1f}s, "
+          f"training accuracy {np.mean(predicted == targets):.1%}")
+    path = args.out if args.out.endswith(".npz") else args.out + ".npz"     # np.savez adds the suffix
+    classifier.save(path)
+    print(f"💾 Saved {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Runtime metrics for the live game.
+
+Hot-path code records stage durations into small ring buffers; counters and
+gauges such as queue depths and dropped frames are read from the pipeline
+only when someone looks. Recording a duration is a perf_counter() call and a
+deque append, so the timers stay on all the time. Percentiles are computed
+on read: for the on-screen overlay a couple of times a second, and for the
+Prometheus-style endpoint or the metrics file when they are scraped/written.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from inference_scheduler import percentile_ms
+
+QUANTILES = (50, 95, 99)
+
+
+class StageTimer:
+    """
+    Context manager that records how long its block took; the duration is also left in `seconds`.
+    With registry=None it only measures, for code whose metrics are optional.
+    """
+
+    __slots__ = ("registry", "stage", "start", "seconds")
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        if self.registry is not None:
+            self.registry.observe(self.stage, self.seconds)
+        return False
+
+
+class MetricsRegistry:
+    """Stage timers and sampled gauges shared by the pipeline threads"""
+
+    def __init__(self, window=240, prefix="rps"):
+        self.window = window        # Recent durations kept per stage for percentiles
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stages = {}           # stage -> [recent durations, count, total seconds]
+        self._gauges = []           # (name, help, kind, label, fn)
+
+    def timer(self, stage):
+        """Time a block: `with metrics.timer("hud"): ...`"""
+        return StageTimer(self, stage)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [deque(maxlen=self.window), 0, 0.0]
+            entry[0].append(seconds)
+            entry[1] += 1
+            entry[2] += seconds
+
+    def gauge(self, name, fn, help="", kind="gauge", label=None):
+        """
+        Register a value sampled on read. fn returns a number, or a dict of
+        label value -> number when `label` names the label.
+        """
+        self._gauges.append((name, help, kind, label, fn))
+
+    def stage_summary(self):
+        """Per-stage p50/p95/p99 in ms plus count and total seconds"""
+        with self._lock:
+            stages = {stage: (list(entry[0]), entry[1], entry[2]) for stage, entry in self._stages.items()}
+        summary = {}
+        for stage, (values, count, total) in stages.items():
+            summary[stage] = {f'p{pct}': percentile_ms(values, pct) for pct in QUANTILES}
+            summary[stage].update(count=count, total=total)
+        return summary
+
+    def sample_gauges(self):
+        """Current value of every gauge"""
+        values = {}
+        for name, _, _, _, fn in self._gauges:
+            try:
+                values[name] = fn()
+            except Exception:
+                values[name] = None     # A gauge must never break the game loop
+        return values
+
+    def snapshot(self):
+        return {'time': time.time(), 'stages': self.stage_summary(), 'values': self.sample_gauges()}
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        p = self.prefix
+        lines = [f"# HELP {p}_stage_seconds Duration of each frame loop stage",
+                 f"# TYPE {p}_stage_seconds summary"]
+        for stage, values in self.stage_summary().items():
+            for pct in QUANTILES:
+                lines.append(f'{p}_stage_seconds{{stage="{stage}",quantile="{pct / 100}"}} {values[f"p{pct}"] / 1000:.6f}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {values["total"]:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {values["count"]}')
+
+        sampled = self.sample_gauges()
+        for name, help, kind, label, _ in self._gauges:
+            value = sampled.get(name)
+            if value is None:
+                continue
+            lines.append(f"# HELP {p}_{name} {help}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            if label:
+                lines.extend(f'{p}_{name}{{{label}="{key}"}} {val}' for key, val in value.items())
+            else:
+                lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def overlay_lines(self, max_stages=8):
+        """Short text lines for the on-screen metrics panel"""
+        lines = []
+        for name, value in self.sample_gauges().items():
+            if isinstance(value, dict):
+                value = " ".join(f"{key} {val:.1f}" if isinstance(val, float) else f"{key} {val}"
+                                 for key, val in value.items())
+            elif isinstance(value, float):
+                value = f"{value:.1f}"
+            lines.append(f"{name}: {value}")
+        # Slowest stages first, so the overlay shows where the frame time goes
+        stages = sorted(self.stage_summary().items(), key=lambda item: item[1]['p50'], reverse=True)
+        for stage, values in stages[:max_stages]:
+            lines.append(f"{stage}: {values['p50']:.1f} / {values['p95']:.1f} / {values['p99']:.1f} ms")
+        return lines
+
+
+class MetricsServer:
+    """Serves /metrics in Prometheus text format from a daemon thread"""
+
+    def __init__(self, registry, port=9464, host="127.0.0.1"):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry_ref.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass    # Keep scrapes out of the game's console output
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsFileExporter(threading.Thread):
+    """Writes the metrics to a file every few seconds (JSON, or Prometheus text for .prom/.txt)"""
+
+    def __init__(self, registry, path, interval=5.0):
+        super().__init__(name="metrics-file", daemon=True)
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._failing = False       # Only the first of a run of failed writes is logged
+
+    def write(self):
+        if self.path.endswith((".prom", ".txt")):
+            text = self.registry.prometheus_text()
+        else:
+            text = json.dumps(self.registry.snapshot(), indent=2)
+        # Replace atomically so readers never see a half-written file
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+    def _write_logged(self):
+        """write(), logging instead of raising when the file cannot be written (full disk, directory removed)"""
+        try:
+            self.write()
+        except OSError as exc:
+            if not self._failing:
+                print(f"  ⚠️  Could not write metrics to {self.path}: {exc}")
+            self._failing = True
+            return
+        if self._failing:
+            print(f"  ✓ Writing metrics to {self.path} again")
+        self._failing = False
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self._write_logged()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=1.0)
+        self._write_logged()
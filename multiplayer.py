@@ -0,0 +1,197 @@
+"""
+Multi-player rounds from a single inference pass.
+
+FaceMesh and Hands already return every face and hand in the frame, so more
+players only means raising max_num_faces / max_num_hands, not running the
+models again. Each detected hand is assigned to a player slot: slots are the
+players' faces sorted left to right (or equal vertical strips of the frame
+when not everyone's face is visible), and a hand belongs to the slot its
+centre falls in. All hands are classified in one batched pass, every player
+keeps their own gesture lock, and all pairings of a round are scored at once
+from an outcome table.
+
+Two modes are supported: player-vs-player, where everyone throws at once
+and the player who beats the most opponents takes the round, and a knockout
+tournament, where players meet in pairs and winners advance.
+"""
+import numpy as np
+
+from game_engine import MOVES, OUTCOMES, RoundStateMachine
+from landmark_features import finger_states
+from temporal_filter import gesture_filter, probability_filter
+
+PVP = "pvp"
+TOURNAMENT = "tournament"
+
+
+def slot_boundaries(face_boxes, players):
+    """Normalized x positions separating the player slots"""
+    if len(face_boxes) == players:
+        # Halfway between neighbouring faces, so players need not stand evenly spaced
+        centers = np.sort([xmin + width / 2 for xmin, _, width, _ in face_boxes])
+        return (centers[1:] + centers[:-1]) / 2
+    return np.arange(1, players) / players
+
+
+def face_slots(face_boxes, players):
+    """Player slot index of each face box"""
+    boundaries = slot_boundaries(face_boxes, players)
+    return [int(np.searchsorted(boundaries, xmin + width / 2)) for xmin, _, width, _ in face_boxes]
+
+
+def assign_hands(hand_arrays, face_boxes, players):
+    """
+    Pick one hand per player slot.
+    Returns a list with a (21, 3) hand array or None for each slot, left to right.
+    """
+    slots = [None] * players
+    if not hand_arrays:
+        return slots
+    hands = np.stack(hand_arrays)
+    centers = hands[:, :, :2].mean(axis=1)
+    slot_index = np.searchsorted(slot_boundaries(face_boxes, players), centers[:, 0])
+    # When two hands land in one slot keep the higher one, the hand being shown to the camera
+    for i in np.argsort(-centers[:, 1]):
+        slots[slot_index[i]] = hands[i]
+    return slots
+
+
+def round_outcomes(moves):
+    """Pairwise outcome matrix for a list of move names: result[i, j] is 1 when player i beats player j"""
+    indices = np.array([MOVES.index(move) for move in moves])
+    return OUTCOMES[indices[:, None], indices[None, :]]
+
+
+class Player:
+    """Score and gesture lock for one player slot"""
+
+    def __init__(self, name, gesture_window=5, gesture_required=3, gesture_classifier=None):
+        self.name = name
+        self.score = 0
+        self.tournament_wins = 0
+        self.move = ""
+        if gesture_classifier:
+            self.gesture_smoother = probability_filter(gesture_classifier, gesture_window, gesture_required)
+        else:
+            self.gesture_smoother = gesture_filter(gesture_window, gesture_required)
+
+
+class MultiPlayerSession(RoundStateMachine):
+    """Game state for several players sharing one camera, advanced one analyzed frame at a time"""
+
+    def __init__(self, players=2, mode=PVP, countdown_duration=3, gesture_window=5, gesture_required=3,
+                 gesture_classifier=None):
+        if players < 2:
+            raise ValueError("Multi-player mode needs at least 2 players")
+        if mode not in (PVP, TOURNAMENT):
+            raise ValueError(f"Unknown mode {mode!r}")
+        self.mode = mode
+        self.gesture_classifier = gesture_classifier
+        self.players = [Player(f"P{i + 1}", gesture_window, gesture_required, gesture_classifier)
+                        for i in range(players)]
+        self.champion = None
+        self._bracket = []
+        self._advancing = []
+        self.slot_hands = [None] * players
+        self._new_bracket()
+        super().__init__(countdown_duration)
+
+    def _new_bracket(self):
+        self._bracket = list(range(len(self.players)))
+        self._advancing = []
+
+    @property
+    def contenders(self):
+        """Indices of the players throwing this round"""
+        if self.mode == TOURNAMENT:
+            return self._bracket[:2]
+        return list(range(len(self.players)))
+
+    @property
+    def mode_text(self):
+        if self.mode == TOURNAMENT:
+            names = " vs ".join(self.players[i].name for i in self.contenders)
+            return f"TOURNAMENT: {names}"
+        return "PLAYER VS PLAYER"
+
+    def restart_round(self):
+        """Clear the last result and wait for the players' faces to start the next countdown"""
+        self.result_text = ""
+        for player in self.players:
+            player.move = ""
+        super().restart_round()
+
+    def update(self, results, now):
+        """
+        Advance the game with one frame of analysis results.
+        Returns the list of events that happened on this frame.
+        """
+        face_boxes = results['face_boxes']
+
+        if 'hands' in results['fresh']:
+            self.slot_hands = assign_hands(results['hand_arrays'], face_boxes, len(self.players))
+            if self.round_active and self.countdown_started:
+                # Finger states (or class probabilities) for every present hand in one vectorized call
+                present = [i for i, hand in enumerate(self.slot_hands) if hand is not None]
+                hands = np.stack([self.slot_hands[i] for i in present]) if present else None
+                if hands is None:
+                    observations = {}
+                elif self.gesture_classifier:
+                    observations = {i: {'probs': probs} for i, probs in
+                                    zip(present, self.gesture_classifier.predict_proba(hands))}
+                else:
+                    observations = {i: {'finger_states': state.astype(np.float32)} for i, state in
+                                    zip(present, finger_states(hands))}
+                for i in self.contenders:
+                    self.players[i].gesture_smoother.update(observations.get(i), now)
+
+        # Everyone in this round must be in view before the countdown starts
+        return self.step_round(now, len(face_boxes) >= len(self.contenders))
+
+    def countdown_started_hook(self):
+        for player in self.players:
+            player.gesture_smoother.reset()
+
+    def capture_round(self):
+        moves = [self.players[i].gesture_smoother.committed for i in self.contenders]
+        if not all(moves):
+            return False
+        self.decide_round(moves)
+        return True
+
+    def decide_round(self, moves):
+        """Score the contenders' locked moves against each other"""
+        contenders = self.contenders
+        for i, move in zip(contenders, moves):
+            self.players[i].move = move
+
+        outcomes = round_outcomes(moves)
+        net = outcomes.sum(axis=1)
+        best = np.flatnonzero(net == net.max())
+        winner = contenders[best[0]] if len(best) == 1 and net.max() > 0 else None
+
+        if winner is None:
+            self.result_text = "Draw! Throw again" if self.mode == TOURNAMENT else "Draw!"
+        else:
+            self.players[winner].score += 1
+            self.result_text = f"{self.players[winner].name} Wins!"
+            if self.mode == TOURNAMENT:
+                self._advance(contenders, winner)
+
+        self.end_round()
+        return winner
+
+    def _advance(self, contenders, winner):
+        """Move the match winner to the next bracket round; the last player left wins the tournament"""
+        self._bracket = self._bracket[len(contenders):]
+        self._advancing.append(winner)
+        if len(self._bracket) == 1:
+            # Odd player out gets a bye
+            self._advancing.append(self._bracket.pop())
+        if not self._bracket:
+            self._bracket, self._advancing = self._advancing, []
+        if len(self._bracket) == 1:
+            self.champion = self.players[self._bracket[0]]
+            self.champion.tournament_wins += 1
+            self.result_text = f"{self.champion.name} wins the tournament!"
+            self._new_bracket()
@@ -0,0 +1,214 @@
+"""
+Computer opponents.
+
+A computer that picks its move at random wins a third of the rounds
+whatever the player does. The opponents here predict the player's next move
+from the rounds so far and play the move that beats it:
+
+  random     uniform random moves (the original behaviour)
+  frequency  beats the player's most common move
+  markov     beats the move that most often followed the player's last `order` moves
+  mix        follows whichever of several predictors has been right most often lately
+
+Predictions come from count tables updated once per round, so a prediction
+costs the same on round 10 as on round 10 million, and memory is fixed by
+the context order. Older rounds weigh less (counts decay by `decay` per
+round), so a player who changes habits is picked up again within a few
+dozen rounds. The decay is lazy: rather than shrinking every count each
+round, new counts are added with a weight that grows by 1 / decay, and the
+table is rescaled only when that weight gets large.
+
+Moves are indices into MOVES here; GameEngine converts them to names.
+"""
+import random
+
+from game_engine import MOVES
+
+BEATS = (1, 2, 0)       # BEATS[m] is the move that beats move m: paper beats rock, scissors paper, rock scissors
+RESCALE_AT = 1e100      # Rescale a count table once its weight passes this, long before floats overflow
+
+
+class DecayingCounts:
+    """Rows of per-move counts in which a round seen `age` rounds ago counts decay ** age"""
+
+    def __init__(self, rows, decay=0.98):
+        self.counts = [[0.0] * len(MOVES) for _ in range(rows)]
+        self.decay = decay
+        self.weight = 1.0
+
+    def add(self, row, move):
+        self.counts[row][move] += self.weight
+        self.weight /= self.decay
+        if self.weight > RESCALE_AT:
+            # Dividing every count by the same factor keeps their ratios, which is all predictions use
+            for counts in self.counts:
+                for i in range(len(counts)):
+                    counts[i] /= self.weight
+            self.weight = 1.0
+
+    def most_likely(self, row, rng):
+        """Move with the highest count in a row (ties broken at random), or None for an empty row"""
+        rock, paper, scissors = counts = self.counts[row]
+        # Three explicit comparisons cover the usual case without building a list
+        if rock > paper and rock > scissors:
+            return 0
+        if paper > rock and paper > scissors:
+            return 1
+        if scissors > rock and scissors > paper:
+            return 2
+        best = max(counts)
+        if best == 0:
+            return None
+        return rng.choice([move for move, count in enumerate(counts) if count == best])
+
+
+class Opponent:
+    """Picks the computer's move from a prediction of the player's next move"""
+
+    name = None
+
+    def predict(self, rng):
+        """Predicted next player move, or None when there is nothing to go on"""
+        return None
+
+    def choose(self, rng):
+        """The computer's next move: the one beating the prediction, or a random move without one"""
+        predicted = self.predict(rng)
+        return rng.randrange(len(MOVES)) if predicted is None else BEATS[predicted]
+
+    def observe(self, player, computer):
+        """Learn from a finished round's moves"""
+
+    def memory(self):
+        """Number of counts this opponent keeps"""
+        return 0
+
+
+class RandomOpponent(Opponent):
+    name = "random"
+
+
+class FrequencyOpponent(Opponent):
+    """Expects the player's most common recent move"""
+
+    name = "frequency"
+
+    def __init__(self, decay=0.98):
+        self.table = DecayingCounts(1, decay)
+
+    def predict(self, rng):
+        return self.table.most_likely(0, rng)
+
+    def observe(self, player, computer):
+        self.table.add(0, player)
+
+    def memory(self):
+        return len(MOVES)
+
+
+class MarkovOpponent(Opponent):
+    """
+    Expects the move that most often followed the last `order` rounds.
+    With pairs=True a round is the player's and the computer's move together, which also
+    catches players who react to the computer (win-stay, lose-shift and the like).
+    """
+
+    name = "markov"
+
+    def __init__(self, order=2, decay=0.98, pairs=False):
+        self.order = order
+        self.pairs = pairs
+        self.symbols = len(MOVES) ** 2 if pairs else len(MOVES)
+        self.contexts = self.symbols ** order
+        self.table = DecayingCounts(self.contexts, decay)
+        self.context = 0        # The last `order` rounds as a base-`symbols` number
+        self.seen = 0           # Rounds seen, up to `order`
+
+    def predict(self, rng):
+        if self.seen < self.order:
+            return None
+        return self.table.most_likely(self.context, rng)
+
+    def observe(self, player, computer):
+        if self.seen >= self.order:
+            self.table.add(self.context, player)
+        else:
+            self.seen += 1
+        symbol = player * len(MOVES) + computer if self.pairs else player
+        self.context = (self.context * self.symbols + symbol) % self.contexts
+
+    def memory(self):
+        return self.contexts * len(MOVES)
+
+
+class MixOpponent(Opponent):
+    """
+    Asks several predictors each round and follows the one with the best recent record.
+    A predictor scores +1 for a right guess and -1 for a wrong one, with the same decay as
+    the count tables; while no predictor is ahead the computer plays at random.
+    """
+
+    name = "mix"
+
+    def __init__(self, predictors=None, decay=0.98):
+        self.predictors = predictors or [FrequencyOpponent(decay), MarkovOpponent(1, decay),
+                                         MarkovOpponent(2, decay), MarkovOpponent(1, decay, pairs=True)]
+        self.decay = decay
+        self.scores = [0.0] * len(self.predictors)
+        self._predictions = [None] * len(self.predictors)
+
+    def predict(self, rng):
+        self._predictions = [predictor.predict(rng) for predictor in self.predictors]
+        best, best_score = None, 0.0
+        for prediction, score in zip(self._predictions, self.scores):
+            if prediction is not None and score > best_score:
+                best, best_score = prediction, score
+        return best
+
+    def observe(self, player, computer):
+        for i, (predictor, prediction) in enumerate(zip(self.predictors, self._predictions)):
+            if prediction is not None:
+                self.scores[i] = self.scores[i] * self.decay + (1.0 if prediction == player else -1.0)
+            predictor.observe(player, computer)
+        self._predictions = [None] * len(self.predictors)
+
+    def memory(self):
+        return sum(predictor.memory() for predictor in self.predictors) + len(self.scores)
+
+
+OPPONENTS = {
+    'random': RandomOpponent,
+    'frequency': FrequencyOpponent,
+    'markov': MarkovOpponent,
+    'mix': MixOpponent,
+}
+
+
+def create_opponent(name="random", **options):
+    """Opponent by name; options go to its constructor (decay, order, pairs)"""
+    if name not in OPPONENTS:
+        raise ValueError(f"Unknown opponent {name!r}, choose from {sorted(OPPONENTS)}")
+    return OPPONENTS[name](**options)
+
+
+def play_match(opponent, player, rounds, rng=None):
+    """
+    Play `rounds` rounds of `opponent` against a scripted player, a function (last player move,
+    last computer move, rng) -> move. Returns the computer's (wins, losses, draws).
+    """
+    rng = rng or random.Random()
+    wins = losses = draws = 0
+    last_player = last_computer = None
+    for _ in range(rounds):
+        computer = opponent.choose(rng)
+        move = player(last_player, last_computer, rng)
+        result = (computer - move) % 3
+        if result == 1:
+            wins += 1
+        elif result == 2:
+            losses += 1
+        else:
+            draws += 1
+        opponent.observe(move, computer)
+        last_player, last_computer = move, computer
+    return wins, losses, draws
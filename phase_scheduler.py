@@ -0,0 +1,94 @@
+"""
+Phase-aware model gating.
+
+The game only needs each MediaPipe model at certain moments: face presence
+while waiting for a player, the full face mesh right before the gesture is
+captured (for the emotion reaction), and hand tracking during capture. The
+schedule below says which models run in each game phase and how often;
+skipped frames reuse the most recent result for a short time.
+"""
+import time
+
+EVERY_FRAME = None  # Rate value meaning "run on every frame"
+
+# Game phases, in the order a round moves through them
+IDLE = "idle"                # Round armed, waiting for a face to start the countdown
+COUNTDOWN = "countdown"      # Countdown running
+PRECAPTURE = "precapture"    # Last moments of the countdown, right before capture
+CAPTURE = "capture"          # Countdown over, waiting for a hand gesture
+RESULT = "result"            # Round decided, showing the result
+GAME_PHASES = (IDLE, COUNTDOWN, PRECAPTURE, CAPTURE, RESULT)
+
+PRECAPTURE_WINDOW = 0.5      # Seconds before capture that count as precapture
+
+# Model name -> runs per second (EVERY_FRAME for every frame) for each phase
+DEFAULT_SCHEDULE = {
+    IDLE: {'face_mesh': 5},
+    COUNTDOWN: {'face_mesh': 5},
+    PRECAPTURE: {'face_mesh': EVERY_FRAME, 'hands': EVERY_FRAME},  # Prime the hand tracker before capture
+    CAPTURE: {'face_mesh': EVERY_FRAME, 'hands': EVERY_FRAME},
+    RESULT: {}
+}
+
+# Extra models that run on every frame while landmarks are displayed
+LANDMARK_SCHEDULE = {
+    IDLE: ['face_mesh'],
+    COUNTDOWN: ['face_mesh'],
+    RESULT: ['face_mesh', 'hands']
+}
+
+
+def game_phase(round_active, countdown_started, countdown_elapsed, countdown_duration,
+               precapture_window=PRECAPTURE_WINDOW):
+    """Map the game state flags onto a phase name"""
+    if not round_active:
+        return RESULT
+    if not countdown_started:
+        return IDLE
+    if countdown_elapsed >= countdown_duration:
+        return CAPTURE
+    if countdown_elapsed >= countdown_duration - precapture_window:
+        return PRECAPTURE
+    return COUNTDOWN
+
+
+class PhaseModelGate:
+    """Decides which models are due on a frame and holds recent results for skipped ones"""
+
+    def __init__(self, schedule=None, hold_time=0.5):
+        self.schedule = DEFAULT_SCHEDULE if schedule is None else schedule
+        self.hold_time = hold_time
+        self.rate_limits = {}       # Model name -> highest runs per second in any phase (None = no limit)
+        self._last_run = {}
+        self._held = {}
+
+    def due_models(self, phase, now=None, extra=()):
+        """Names of the models that should run on this frame"""
+        now = time.perf_counter() if now is None else now
+        due = []
+        for name, rate in self.schedule.get(phase, {}).items():
+            limit = self.rate_limits.get(name)
+            if limit is not None and (rate is EVERY_FRAME or rate > limit):
+                rate = limit
+            last = self._last_run.get(name)
+            if rate is EVERY_FRAME or last is None or now - last >= 1.0 / rate:
+                due.append(name)
+        for name in extra:
+            if name not in due:
+                due.append(name)
+        for name in due:
+            self._last_run[name] = now
+        return due
+
+    def hold(self, fresh_results, now=None):
+        """
+        Merge fresh results with recently held ones.
+        Results older than hold_time are dropped so stale landmarks are not drawn.
+        """
+        now = time.perf_counter() if now is None else now
+        for name, result in fresh_results.items():
+            self._held[name] = (now, result)
+        merged = {}
+        for name, (stamp, result) in self._held.items():
+            merged[name] = result if now - stamp <= self.hold_time else None
+        return merged
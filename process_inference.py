@@ -0,0 +1,355 @@
+"""
+MediaPipe inference in worker processes.
+
+Each worker process owns its own model instances. Frames are not pickled:
+the pipeline writes the RGB conversion straight into a shared-memory ring
+(see FramePipeline's frame_buffer), and a task only names the ring and the
+slot. Workers send back compact landmark arrays instead of MediaPipe result
+objects. By default one worker runs the face models and another the hand
+model, so the models of one frame overlap and the parent's Python thread
+is free for the game and rendering. Several stations or replays each get
+their own workers, so throughput grows with the number of cores.
+
+Workers are started as `python process_inference.py --worker`, so scripts
+without an `if __name__ == "__main__"` guard (like live_rsp.py) are never
+re-imported in the children.
+"""
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+from types import SimpleNamespace
+
+import numpy as np
+
+from inference_scheduler import InferenceScheduler
+
+# Models per worker process; each tuple is one worker
+DEFAULT_GROUPS = (("face_mesh", "face"), ("hands",))
+START_TIMEOUT = 60.0    # Seconds a worker may take to connect and load its models
+
+
+class SharedFrameRing:
+    """Fixed-size RGB frame slots in one shared-memory block"""
+
+    def __init__(self, shape, slots=3):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.frame_bytes = int(np.prod(self.shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=self.frame_bytes * slots)
+        self.views = [np.ndarray(self.shape, np.uint8, self.shm.buf, i * self.frame_bytes) for i in range(slots)]
+        self._addresses = {view.__array_interface__['data'][0]: i for i, view in enumerate(self.views)}
+        self._next = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def next_slot(self):
+        """Index and array of the slot to write next; slots are reused round-robin"""
+        index = self._next
+        self._next = (index + 1) % self.slots
+        return index, self.views[index]
+
+    def slot_of(self, array):
+        """Slot index if `array` is one of this ring's slots, else None"""
+        if array.shape != self.shape:
+            return None
+        return self._addresses.get(array.__array_interface__['data'][0])
+
+    def close(self):
+        self.views = []
+        try:
+            self.shm.close()
+        except BufferError:
+            pass    # A frame still in flight holds a view; the mapping goes away with it
+        self.shm.unlink()
+
+
+class LandmarkResults:
+    """
+    Worker results rebuilt on the parent side. Classifiers use `arrays` directly;
+    the MediaPipe-style attributes are only built when something draws them.
+    """
+
+    def __init__(self, arrays=(), boxes=()):
+        self.arrays = arrays
+        self.boxes = boxes
+        self._landmark_lists = None
+
+    def _lists(self):
+        if self._landmark_lists is None:
+            from mediapipe.framework.formats import landmark_pb2
+            self._landmark_lists = [
+                landmark_pb2.NormalizedLandmarkList(
+                    landmark=[landmark_pb2.NormalizedLandmark(x=x, y=y, z=z) for x, y, z in points.tolist()])
+                for points in self.arrays]
+        return self._landmark_lists or None
+
+    @property
+    def multi_face_landmarks(self):
+        return self._lists()
+
+    @property
+    def multi_hand_landmarks(self):
+        return self._lists()
+
+    @property
+    def detections(self):
+        return [SimpleNamespace(location_data=SimpleNamespace(relative_bounding_box=SimpleNamespace(
+            xmin=xmin, ymin=ymin, width=width, height=height))) for xmin, ymin, width, height in self.boxes] or None
+
+
+def _compact(name, result):
+    """MediaPipe result -> small picklable arrays"""
+    if name == "face":
+        boxes = []
+        for detection in result.detections or ():
+            box = detection.location_data.relative_bounding_box
+            boxes.append((box.xmin, box.ymin, box.width, box.height))
+        return {'boxes': boxes}
+    landmark_lists = result.multi_face_landmarks if name == "face_mesh" else result.multi_hand_landmarks
+    arrays = [np.array([(lm.x, lm.y, lm.z) for lm in landmarks.landmark], dtype=np.float32)
+              for landmarks in landmark_lists or ()]
+    return {'arrays': arrays}
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        # Only the creating process may unlink the block; stop this process's tracker from doing it on exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def worker_main(address):
+    """Worker process: build the requested models, then run tasks until told to stop"""
+    from frame_analysis import create_face_model, create_solutions
+    from hand_tracking import HandRoiTracker
+
+    authkey = bytes.fromhex(sys.stdin.readline().strip())
+    conn = Client(address, authkey=authkey)
+    config = conn.recv()
+    names = config['models']
+    solutions = create_solutions('face' in names, config['max_faces'], config['max_hands'])
+    models = {name: solutions[name] for name in names if name in solutions}
+    if 'hands' in models and config['hand_roi_tracking']:
+        models['hands'] = HandRoiTracker(models['hands'])
+    conn.send("ready")
+
+    shm = None
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break   # The parent went away
+        if task is None:
+            break
+        if isinstance(task, dict):
+            # New face model options: rebuild only the changed face models this worker owns
+            for name in task['stale']:
+                if name in models:
+                    solutions[name].close()
+                    solutions[name] = models[name] = create_face_model(name, config['max_faces'], **task['options'])
+            continue
+        shm_name, shape, slot, run_names, face_boxes = task
+        if shm is None or shm.name != shm_name:
+            if shm is not None:
+                shm.close()
+            shm = _attach(shm_name)
+        frame_bytes = int(np.prod(shape))
+        rgb = np.ndarray(shape, np.uint8, shm.buf, slot * frame_bytes)
+        rgb.flags.writeable = False
+
+        if 'hands' in models and isinstance(models['hands'], HandRoiTracker):
+            models['hands'].face_boxes = face_boxes
+        results, timings = {}, {}
+        for name in run_names:
+            start = time.perf_counter()
+            results[name] = _compact(name, models[name].process(rgb))
+            timings[name] = time.perf_counter() - start
+        del rgb     # Release the buffer export before the block may be closed
+        conn.send((results, timings))
+
+    if shm is not None:
+        shm.close()
+    for solution in solutions.values():
+        solution.close()
+
+
+def _check_worker(process, deadline, timeout):
+    """Raise if a starting worker has exited or is out of time"""
+    code = process.poll()
+    if code is not None:
+        raise RuntimeError(f"Inference worker exited with code {code} while starting")
+    if time.monotonic() > deadline:
+        raise TimeoutError(f"Inference worker did not start within {timeout:.0f}s")
+
+
+def _accept(listener, process, deadline, timeout):
+    """listener.accept() that gives up when the worker exits or the deadline passes"""
+    # accept() cannot time out on every platform (named pipes on Windows), so it waits on a daemon
+    # thread; if the worker never connects, the thread is left blocked until the process exits
+    outcome = {}
+
+    def accept():
+        try:
+            outcome['conn'] = listener.accept()
+        except Exception as exc:
+            outcome['error'] = exc
+
+    thread = threading.Thread(target=accept, name="worker-accept", daemon=True)
+    thread.start()
+    while True:
+        thread.join(0.1)
+        if not thread.is_alive():
+            break
+        _check_worker(process, deadline, timeout)
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['conn']
+
+
+def _wait_ready(conn, process, deadline, timeout):
+    """Wait for a worker's readiness message; a worker that dies while loading ends the wait"""
+    while not conn.poll(0.1):
+        _check_worker(process, deadline, timeout)
+    try:
+        conn.recv()
+    except EOFError:
+        try:
+            process.wait(timeout=1)     # A worker that crashed is usually just exiting; report its exit code
+        except subprocess.TimeoutExpired:
+            pass
+        _check_worker(process, deadline, timeout)
+        raise RuntimeError("Inference worker closed its connection while starting") from None
+
+
+class ProcessInference(InferenceScheduler):
+    """Drop-in replacement for InferenceScheduler that runs the models in worker processes"""
+
+    def __init__(self, groups=DEFAULT_GROUPS, hand_roi_tracking=True, max_faces=1, max_hands=2,
+                 face_detection_fallback=False, slots=3, window=120, start_timeout=START_TIMEOUT):
+        # FaceDetection is only loaded as a fallback, as in create_solutions
+        groups = [tuple(name for name in group if name != "face" or face_detection_fallback) for group in groups]
+        self.groups = [group for group in groups if group]
+        self.models = {name: i for i, group in enumerate(self.groups) for name in group}
+        self.parallel = True
+        self.mode = f"{len(self.groups)} processes"
+        self.executor = None
+        self._timings = {name: deque(maxlen=window) for name in self.models}
+        self._wall = deque(maxlen=window)
+        self.slots = slots
+        self.ring = None
+        self.face_boxes = []        # Sent with each hands task to seed the worker's ROI tracker
+
+        authkey = secrets.token_bytes(16)
+        listener = Listener(authkey=authkey)
+        self.processes = []
+        self.connections = []
+        deadline = time.monotonic() + start_timeout
+        try:
+            for group in self.groups:
+                process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker", str(listener.address)],
+                                           stdin=subprocess.PIPE, text=True)
+                self.processes.append(process)
+                process.stdin.write(authkey.hex() + "\n")
+                process.stdin.close()
+                conn = _accept(listener, process, deadline, start_timeout)
+                self.connections.append(conn)
+                conn.send({'models': list(group), 'hand_roi_tracking': hand_roi_tracking,
+                           'max_faces': max_faces, 'max_hands': max_hands})
+            for conn, process in zip(self.connections, self.processes):
+                _wait_ready(conn, process, deadline, start_timeout)     # Every worker has loaded its models
+        except BaseException:
+            # Do not leave the workers that did start running behind
+            self._terminate()
+            raise
+        finally:
+            listener.close()
+
+    def frame_buffer(self, shape):
+        """Next shared-memory slot for a frame of this shape; the pipeline converts straight into it"""
+        if self.ring is None or self.ring.shape != tuple(shape):
+            if self.ring is not None:
+                self.ring.close()
+            self.ring = SharedFrameRing(shape, self.slots)
+        return self.ring.next_slot()[1]
+
+    def run(self, rgb, names=None):
+        """
+        Run the named models (all by default) on an RGB frame in the workers.
+        Returns a dict of model name -> LandmarkResults.
+        """
+        names = list(self.models) if names is None else [name for name in names if name in self.models]
+        start = time.perf_counter()
+        slot = self.ring.slot_of(rgb) if self.ring is not None else None
+        if slot is None:
+            # Frames from elsewhere (replay, benchmarks) are copied into the ring once
+            view = self.frame_buffer(rgb.shape)
+            np.copyto(view, rgb)
+            slot = self.ring.slot_of(view)
+
+        # Every worker gets its task before any result is awaited, so the groups overlap
+        pending = []
+        for worker, group in enumerate(self.groups):
+            run_names = [name for name in names if name in group]
+            if run_names:
+                self.connections[worker].send((self.ring.name, self.ring.shape, slot, run_names, self.face_boxes))
+                pending.append(worker)
+
+        results = {}
+        for worker in pending:
+            compact, timings = self.connections[worker].recv()
+            for name, data in compact.items():
+                results[name] = LandmarkResults(data.get('arrays', ()), data.get('boxes', ()))
+                self._timings[name].append(timings[name])
+        self._wall.append(time.perf_counter() - start)
+        return results
+
+    def configure(self, face_options, stale):
+        """Send new face model options to the workers; they rebuild the `stale` models before their next frame"""
+        for worker, group in enumerate(self.groups):
+            if any(name in group for name in stale):
+                self.connections[worker].send({'options': dict(face_options), 'stale': list(stale)})
+
+    def close(self):
+        for conn in self.connections:
+            try:
+                conn.send(None)
+                conn.close()
+            except OSError:
+                pass
+        for process in self.processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def _terminate(self):
+        """Stop the workers without asking them to finish (used when starting fails)"""
+        for conn in self.connections:
+            conn.close()
+        for process in self.processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "--worker":
+        raise SystemExit("Usage: python process_inference.py --worker <address> (started by ProcessInference)")
+    worker_main(sys.argv[2])
@@ -0,0 +1,130 @@
+"""
+Adaptive quality that holds a target frame rate.
+
+The display tiers in hud.py are picked once from the camera width; nothing
+reacts to how the machine actually copes. QualityController watches how long
+the models take per frame and compares it with the budget for the target
+frame rate. While frames run over budget it steps down one quality level at
+a time: the fallback FaceDetection's model_selection from the full-range to
+the short-range model, then smaller inference frames, FaceMesh without the
+iris refinement and fewer FaceMesh runs per second. The full-range model is
+only used at the top level, reached after spare time at full resolution, so
+the game starts on the short-range model it always had. When frames have
+plenty of spare time for a while it steps back up.
+Every change is logged with the frame time that caused it.
+"""
+import time
+from collections import deque
+
+# Best quality first. Each level keeps the previous level's savings and adds one more
+QUALITY_LEVELS = (
+    {'name': "full range", 'inference_height': None, 'refine_landmarks': True, 'mesh_rate': None, 'face_model': 1},
+    {'name': "full", 'inference_height': None, 'refine_landmarks': True, 'mesh_rate': None, 'face_model': 0},
+    {'name': "720p", 'inference_height': 720, 'refine_landmarks': True, 'mesh_rate': None, 'face_model': 0},
+    {'name': "480p", 'inference_height': 480, 'refine_landmarks': True, 'mesh_rate': None, 'face_model': 0},
+    {'name': "360p", 'inference_height': 360, 'refine_landmarks': True, 'mesh_rate': None, 'face_model': 0},
+    {'name': "no iris", 'inference_height': 360, 'refine_landmarks': False, 'mesh_rate': None, 'face_model': 0},
+    {'name': "mesh 10/s", 'inference_height': 360, 'refine_landmarks': False, 'mesh_rate': 10, 'face_model': 0},
+    {'name': "minimum", 'inference_height': 240, 'refine_landmarks': False, 'mesh_rate': 5, 'face_model': 0},
+)
+
+
+def quality_levels(face_detection_fallback, levels=QUALITY_LEVELS):
+    """
+    The levels that change something for this game. Without the fallback FaceDetection its
+    model_selection does nothing, so levels that only switch it to the full-range model are left out.
+    """
+    if face_detection_fallback:
+        return levels
+    return tuple(level for level in levels if level['face_model'] == 0)
+
+
+def level_index(name, levels=QUALITY_LEVELS):
+    return [level['name'] for level in levels].index(name)
+
+
+class QualityController:
+    """Feedback loop from per-frame model time to a quality level"""
+
+    def __init__(self, apply, target_fps=24.0, levels=QUALITY_LEVELS, start="480p", window=15,
+                 headroom=0.6, settle=1.0, upgrade_after=5.0):
+        self.apply = apply                  # Called with the new level dict on every change
+        self.levels = levels
+        self.budget = 1.0 / target_fps      # Seconds of model time one frame may take
+        self.window = window                # Frames averaged per workload before deciding
+        self.headroom = headroom            # Step up only below this share of the budget
+        self.settle = settle                # Seconds to ignore after a change while the new level warms up
+        self.upgrade_after = upgrade_after  # Seconds of spare time needed before stepping up
+        self.index = level_index(start, levels) if isinstance(start, str) else start
+        self.transitions = []               # (time, from name, to name, mean frame ms)
+        # Recent model times per workload (the set of models that ran). Workloads are judged
+        # separately so cheap idle frames cannot hide the cost of capture frames
+        self._times = {}
+        self._changed_at = time.perf_counter()
+        self._last_step_up = False
+        self._spare_since = None
+        self._failed_upgrades = {}          # Level index -> times stepping up to it had to be undone
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def start(self):
+        """Apply the starting level"""
+        self.apply(self.level)
+        return self
+
+    def observe(self, seconds, workload=(), now=None):
+        """Record one frame's model time; changes level when the recent frames call for it"""
+        now = time.perf_counter() if now is None else now
+        if now - self._changed_at < self.settle:
+            return None
+        key = tuple(sorted(workload))
+        times = self._times.get(key)
+        if times is None:
+            times = self._times[key] = deque(maxlen=self.window)
+        times.append(seconds)
+        if len(times) < self.window:
+            return None
+
+        mean = sum(times) / len(times)
+        if mean > self.budget and self.index < len(self.levels) - 1:
+            if self._last_step_up and now - self._changed_at < self.settle + self.upgrade_after:
+                # The last step up did not hold; wait longer before trying that level again
+                self._failed_upgrades[self.index] = self._failed_upgrades.get(self.index, 0) + 1
+            return self._change(self.index + 1, mean, now)
+
+        # Step up only once every workload seen so far has been measured at this level and has spare time
+        means = [sum(values) / len(values) for values in self._times.values() if len(values) == self.window]
+        if len(means) == len(self._times) and max(means) < self.budget * self.headroom and self.index > 0:
+            if self._spare_since is None:
+                self._spare_since = now
+            wait = self.upgrade_after * 2 ** self._failed_upgrades.get(self.index - 1, 0)
+            if now - self._spare_since >= wait:
+                return self._change(self.index - 1, max(means), now)
+        else:
+            self._spare_since = None
+        return None
+
+    def _change(self, index, mean, now):
+        old = self.level
+        self._last_step_up = index < self.index
+        self.index = index
+        self.transitions.append((time.time(), old['name'], self.level['name'], mean * 1000))
+        print(f"🎚️  Quality {'up' if self._last_step_up else 'down'}: {old['name']} -> {self.level['name']} "
+              f"(models {mean * 1000:.1f} ms per frame, budget {self.budget * 1000:.1f} ms)")
+        self.apply(self.level)
+        for times in self._times.values():
+            times.clear()
+        self._changed_at = now
+        self._spare_since = None
+        return self.level
+
+    def summary(self):
+        return f"quality {self.level['name']} ({len(self.transitions)} changes)"
+
+
+def apply_level(level, pipeline, analyzer):
+    """Push a quality level to the frame pipeline and the models (call from the inference thread)"""
+    pipeline.inference.inference_height = level['inference_height']
+    analyzer.configure(level['mesh_rate'], refine_landmarks=level['refine_landmarks'], face_model=level['face_model'])
@@ -0,0 +1,160 @@
+"""
+Offline replay: run the full game pipeline over recorded video.
+
+Frames from MP4 files or image sequences go through the same face, emotion,
+gesture and scoring logic as the live game, as fast as the models allow,
+with no window and no sound. Every frame's decisions are written as one
+JSON object per line.
+
+    python replay.py session.mp4 --output decisions.jsonl
+    python replay.py frames/ --fps 30
+    python replay.py "frames/%04d.png" --seed 1
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+import cv2
+
+from frame_analysis import create_analyzer
+from frame_pipeline import FrameBuffers, prepare_inference_frame
+from game_engine import ROUND_DECIDED
+from game_session import GameSession, detect_emotion, get_hand_gesture
+from learned_classifiers import load_classifier
+from opponents import OPPONENTS, create_opponent
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def iter_frames(source, fps=30.0):
+    """Yield (timestamp, BGR frame) from a video file, an image-sequence pattern or a directory of images"""
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+        for i, path in enumerate(paths):
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield i / fps, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {source}")
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index / video_fps, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+class Replay:
+    """Drives a GameSession from recorded frames and reports one decision record per frame"""
+
+    def __init__(self, analyzer, session, inference_height=480, mirror=True, restart_after=2.0):
+        self.analyzer = analyzer
+        self.session = session
+        self.inference_height = inference_height
+        self.mirror = mirror                # Match the live game, which mirrors the camera image
+        self.restart_after = restart_after  # Seconds a result stays up before the next round (None = never)
+        self.buffers = FrameBuffers()
+        self._decided_at = None
+
+    def step(self, frame, timestamp):
+        """Process one frame and return its decision record"""
+        # Nothing displays the frame, so only the small inference frame is mirrored, into reused buffers
+        rgb = prepare_inference_frame(frame, self.inference_height, mirror=self.mirror, buffers=self.buffers)
+
+        # No one can press 'r' during a replay, so rounds restart after a pause
+        session = self.session
+        if (not session.round_active and self.restart_after is not None and
+                self._decided_at is not None and timestamp - self._decided_at >= self.restart_after):
+            session.restart_round()
+
+        phase = session.phase(timestamp)
+        results = self.analyzer.process(rgb, timestamp, phase)
+        events = session.update(results, timestamp)
+        if ROUND_DECIDED in events:
+            self._decided_at = timestamp
+
+        record = {
+            't': round(timestamp, 4),
+            'phase': phase,
+            'models': sorted(results['fresh']),
+            'face': bool(results['face_boxes']),
+            'raw_emotion': detect_emotion(results['face_arrays'][0])[0] if results['face_arrays'] else None,
+            'emotion': session.current_emotion,
+            'raw_gesture': get_hand_gesture(results['hand_arrays']) if 'hands' in results['fresh'] else None,
+            'locked_gesture': session.gesture_smoother.committed,
+            'events': events,
+            'score': [session.player_score, session.computer_score],
+        }
+        if ROUND_DECIDED in events:
+            record.update(player_move=session.player_move, computer_move=session.computer_move,
+                          result=session.result_text)
+        return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded video through the Rock Paper Scissors pipeline")
+    parser.add_argument("sources", nargs="+", help="Video files, image-sequence patterns or image directories")
+    parser.add_argument("--output", "-o", help="JSONL output file (default: stdout)")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate for image directories")
+    parser.add_argument("--inference-height", type=int, default=480, help="Inference frame height (0 = full size)")
+    parser.add_argument("--no-mirror", action="store_true", help="Do not mirror frames (use for already-mirrored recordings)")
+    parser.add_argument("--restart-after", type=float, default=2.0,
+                        help="Seconds before a new round starts after a result (negative = never)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the computer's moves")
+    parser.add_argument("--opponent", choices=sorted(OPPONENTS), default="random", help="Computer strategy")
+    parser.add_argument("--serial", action="store_true", help="Run the models one after another")
+    parser.add_argument("--processes", action="store_true", help="Run the models in worker processes")
+    parser.add_argument("--gesture-model", help="Learned gesture model (.npz) instead of the finger-up rules")
+    parser.add_argument("--emotion-model", help="Learned emotion model (.npz) instead of the threshold rules")
+    args = parser.parse_args()
+
+    gesture_classifier = load_classifier(args.gesture_model) if args.gesture_model else None
+    emotion_classifier = load_classifier(args.emotion_model) if args.emotion_model else None
+    out = open(args.output, "w") if args.output else sys.stdout
+    total_frames = 0
+    start = time.perf_counter()
+    try:
+        for source in args.sources:
+            # Fresh models and game state per source so files do not influence each other
+            analyzer = create_analyzer(args.processes, parallel=not args.serial)
+            session = GameSession(rng=random.Random(args.seed), gesture_classifier=gesture_classifier,
+                                  emotion_classifier=emotion_classifier, opponent=create_opponent(args.opponent))
+            replay = Replay(analyzer, session, args.inference_height or None, not args.no_mirror,
+                            args.restart_after if args.restart_after >= 0 else None)
+            source_start = time.perf_counter()
+            frames = 0
+            for frame_index, (timestamp, frame) in enumerate(iter_frames(source, args.fps)):
+                record = replay.step(frame, timestamp)
+                record = {'source': source, 'frame': frame_index, **record}
+                out.write(json.dumps(record) + "\n")
+                frames += 1
+            elapsed = time.perf_counter() - source_start
+            analyzer.close()
+            total_frames += frames
+            fps = frames / elapsed if elapsed > 0 else 0.0
+            print(f"🎞️  {source}: {frames} frames in {elapsed:.2f}s ({fps:.1f} fps), "
+                  f"{session.rounds_played} rounds, score {session.player_score}-{session.computer_score}",
+                  file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {total_frames} frames in {elapsed:.2f}s ({total_frames / elapsed if elapsed > 0 else 0:.1f} fps)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
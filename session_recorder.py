@@ -0,0 +1,319 @@
+"""
+Session recording in a compact, memory-mappable landmark log.
+
+Each analyzed frame becomes one fixed-size record: timestamp, game phase,
+game events, which models were fresh, and the face mesh (478 points with
+refine_landmarks) and hand landmarks. Points are stored as float16 offsets
+from a float32 origin per face or hand, which keeps them at about 1e-4
+precision in half the space of float32. Records all have the same stride,
+so record i lives at HEADER_SIZE + i * stride and the whole log opens as a
+numpy memmap: seeking by frame is arithmetic and seeking by time is a
+binary search over the timestamp column.
+
+The game thread only puts a reference to the frame's arrays on a queue; a
+background thread packs records in batches and writes them. A log cut off
+by a crash is still readable up to its last complete record.
+
+    python session_recorder.py sessions/*.rpslog              # re-classify and summarize
+    python session_recorder.py game.rpslog --jsonl frames.jsonl
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from game_engine import CAPTURE, COUNTDOWN, COUNTDOWN_STARTED, COUNTDOWN_TICK, ROUND_DECIDED
+from landmark_features import EMOTIONS, classify_emotions, classify_gestures, emotion_features
+from phase_scheduler import GAME_PHASES
+
+MAGIC = b"RPSLOG1\n"
+HEADER_SIZE = 4096          # Magic plus a JSON header padded to one page, so records start page-aligned
+FACE_POINTS = 478           # FaceMesh with refine_landmarks=True
+MESH_POINTS = 468           # Without it; the 10 unused iris rows are flagged in `no_iris` and cut off on read
+HAND_POINTS = 21
+NO_IRIS_FACES = 8           # Faces with a `no_iris` bit; later faces always read back as 478 points
+
+# Bit positions in a record's `events` and `fresh` fields
+EVENT_BITS = (COUNTDOWN_STARTED, COUNTDOWN, COUNTDOWN_TICK, CAPTURE, ROUND_DECIDED)
+MODEL_BITS = ("face_mesh", "hands", "face")
+NO_PHASE = 255
+
+
+def record_dtype(max_faces=1, max_hands=2):
+    """Fixed-stride record layout for a log holding up to max_faces faces and max_hands hands per frame"""
+    return np.dtype([
+        ('t', '<f8'),
+        ('phase', 'u1'),
+        ('events', 'u1'),
+        ('fresh', 'u1'),
+        ('faces', 'u1'),
+        ('hands', 'u1'),
+        ('no_iris', 'u1'),          # Bit i: face i was stored without the iris rows
+        ('reserved', 'u1', (2,)),
+        ('face_origin', '<f4', (max_faces, 3)),
+        ('face', '<f2', (max_faces, FACE_POINTS, 3)),
+        ('hand_origin', '<f4', (max_hands, 3)),
+        ('hand', '<f2', (max_hands, HAND_POINTS, 3)),
+    ])
+
+
+def _bits(names, table):
+    return sum(1 << table.index(name) for name in names if name in table)
+
+
+def _pack_points(origin_column, point_column, arrays):
+    """Store arrays as float32 origins plus float16 offsets; returns how many were stored"""
+    arrays = arrays[:len(origin_column)]
+    for i, points in enumerate(arrays):
+        origin = points.mean(axis=0)
+        origin_column[i] = origin
+        point_column[i, :len(points)] = points - origin
+    return len(arrays)
+
+
+def decode_points(origins, offsets):
+    """float32 landmark arrays from stored origins (..., 3) and float16 offsets (..., N, 3)"""
+    return offsets.astype(np.float32) + origins[..., None, :]
+
+
+def _no_iris_bits(faces):
+    return sum(1 << i for i, points in enumerate(faces[:NO_IRIS_FACES]) if len(points) < FACE_POINTS)
+
+
+class SessionRecorder:
+    """Writes one record per analyzed frame from a background thread"""
+
+    def __init__(self, path, max_faces=1, max_hands=2, batch=64, max_pending=1024, metadata=None):
+        self.path = path
+        self.dtype = record_dtype(max_faces, max_hands)
+        self.batch = batch
+        self.recorded = 0
+        self.dropped = 0
+        self.error = None           # Set if the writer thread stopped on an error, e.g. a full disk
+        header = {'version': 1, 'max_faces': max_faces, 'max_hands': max_hands,
+                  'face_points': FACE_POINTS, 'hand_points': HAND_POINTS, 'stride': self.dtype.itemsize,
+                  'phases': list(GAME_PHASES), 'events': list(EVENT_BITS), 'models': list(MODEL_BITS),
+                  'started': time.time(), **(metadata or {})}
+        encoded = json.dumps(header).encode()
+        if len(MAGIC) + len(encoded) > HEADER_SIZE:
+            raise ValueError("Session metadata does not fit in the log header")
+        self.file = open(path, "wb")
+        self.file.write((MAGIC + encoded).ljust(HEADER_SIZE, b" "))
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, timestamp, results, events=()):
+        """Queue one frame of analysis results; never blocks, and drops the frame if the writer falls behind"""
+        try:
+            self._queue.put_nowait((timestamp, results['phase'], results['face_arrays'], results['hand_arrays'],
+                                    results['fresh'], events))
+        except queue.Full:
+            self.dropped += 1
+
+    def _fill(self, records, row, item):
+        timestamp, phase, faces, hands, fresh, events = item
+        records['t'][row] = timestamp
+        records['phase'][row] = GAME_PHASES.index(phase) if phase in GAME_PHASES else NO_PHASE
+        records['events'][row] = _bits(events, EVENT_BITS)
+        records['fresh'][row] = _bits(fresh, MODEL_BITS)
+        records['faces'][row] = _pack_points(records['face_origin'][row], records['face'][row], faces)
+        records['no_iris'][row] = _no_iris_bits(faces)
+        records['hands'][row] = _pack_points(records['hand_origin'][row], records['hand'][row], hands)
+
+    def _run(self):
+        try:
+            self._write_batches()
+        except Exception as e:
+            # Recording is best effort: keep the error for the caller instead of taking the game down
+            self.error = e
+
+    def _write_batches(self):
+        records = np.zeros(self.batch, self.dtype)
+        running = True
+        while running:
+            # Block for the first item, then take whatever else is already waiting
+            items = [self._queue.get()]
+            while len(items) < self.batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records[:] = 0
+            count = 0
+            for item in items:
+                if item is None:
+                    running = False
+                    break
+                self._fill(records, count, item)
+                count += 1
+            if count:
+                self.file.write(records[:count].tobytes())
+                self.recorded += count
+        self.file.flush()
+
+    def close(self, timeout=5.0):
+        """Write what is queued and close the log; does not wait forever on a writer that died or hangs"""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self.file.close()
+
+
+class SessionLog:
+    """Read-only view of a recorded session, memory-mapped so only the records you touch are read"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            head = f.read(HEADER_SIZE)
+        if not head.startswith(MAGIC):
+            raise ValueError(f"{path} is not a session log")
+        self.header = json.loads(head[len(MAGIC):].decode().strip())
+        self.dtype = record_dtype(self.header['max_faces'], self.header['max_hands'])
+        self.phase_names = self.header['phases']
+        self.event_names = self.header['events']
+        self.model_names = self.header['models']
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            count = (f.tell() - HEADER_SIZE) // self.dtype.itemsize
+        # A log without records cannot be memory-mapped, so it gets an empty array instead
+        self.records = (np.memmap(path, self.dtype, "r", offset=HEADER_SIZE, shape=(count,)) if count
+                        else np.zeros(0, self.dtype))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def times(self):
+        return self.records['t']
+
+    @property
+    def duration(self):
+        return float(self.times[-1] - self.times[0]) if len(self) > 1 else 0.0
+
+    def index_at(self, timestamp):
+        """Index of the first record at or after `timestamp`"""
+        return int(np.searchsorted(self.times, timestamp))
+
+    def phase(self, i):
+        code = int(self.records['phase'][i])
+        return self.phase_names[code] if code < len(self.phase_names) else None
+
+    def events(self, i):
+        return [name for bit, name in enumerate(self.event_names) if self.records['events'][i] >> bit & 1]
+
+    def fresh(self, i):
+        return {name for bit, name in enumerate(self.model_names) if self.records['fresh'][i] >> bit & 1}
+
+    def with_event(self, event):
+        """Indices of the records where `event` happened"""
+        return np.flatnonzero(self.records['events'] >> self.event_names.index(event) & 1)
+
+    def rounds(self):
+        """(start, stop) record ranges from each countdown start to the record that decided the round"""
+        decided = self.with_event(ROUND_DECIDED)
+        ranges = []
+        for start in self.with_event(COUNTDOWN_STARTED):
+            j = np.searchsorted(decided, start)
+            if j < len(decided):
+                ranges.append((int(start), int(decided[j]) + 1))
+        return ranges
+
+    def face_arrays(self, i):
+        """The (478, 3) face arrays of record i, or (468, 3) for faces without iris points, as the game saw them"""
+        record = self.records[i]
+        count = int(record['faces'])
+        no_iris = int(record['no_iris'])
+        faces = decode_points(record['face_origin'][:count], record['face'][:count])
+        return [face[:MESH_POINTS] if no_iris >> k & 1 else face for k, face in enumerate(faces)]
+
+    def hand_arrays(self, i):
+        """The (21, 3) hand arrays of record i, as the game saw them"""
+        record = self.records[i]
+        count = int(record['hands'])
+        return list(decode_points(record['hand_origin'][:count], record['hand'][:count]))
+
+    def close(self):
+        # The mapping is released once no record views are left
+        self.records = np.zeros(0, self.dtype)
+
+
+def reclassify(log, chunk=4096):
+    """
+    Re-run the emotion and gesture classifiers over every record, a chunk at a time.
+    This is what detect_emotion (first face) and get_hand_gesture (first hand)
+    return for each frame, computed in batches instead of frame by frame.
+    Returns (emotion names, emotion confidences, gesture names); None where the frame had no face or hand.
+    """
+    emotions, confidences, gestures = [], [], []
+    for start in range(0, len(log), chunk):
+        records = log.records[start:start + chunk]
+        has_face = records['faces'] > 0
+        has_hand = records['hands'] > 0
+        labels = np.full(len(records), -1)
+        confidence = np.zeros(len(records), dtype=np.float32)
+        if has_face.any():
+            # Emotion features only use mesh points below 468, so faces without iris rows need no trimming here
+            faces = decode_points(records['face_origin'][has_face, 0], records['face'][has_face, 0])
+            labels[has_face], confidence[has_face] = classify_emotions(emotion_features(faces))
+        chunk_gestures = [None] * len(records)
+        if has_hand.any():
+            hands = decode_points(records['hand_origin'][has_hand, 0], records['hand'][has_hand, 0])
+            for i, gesture in zip(np.flatnonzero(has_hand), classify_gestures(hands)):
+                chunk_gestures[i] = gesture
+        emotions.extend(EMOTIONS[label] if label >= 0 else None for label in labels)
+        confidences.extend(confidence.tolist())
+        gestures.extend(chunk_gestures)
+    return emotions, confidences, gestures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-classify recorded Rock Paper Scissors sessions")
+    parser.add_argument("logs", nargs="+", help="Session log files written by SessionRecorder")
+    parser.add_argument("--jsonl", help="Write one JSON object per recorded frame to this file")
+    args = parser.parse_args()
+
+    out = open(args.jsonl, "w") if args.jsonl else None
+    total_frames = 0
+    start = time.perf_counter()
+    try:
+        for path in args.logs:
+            log = SessionLog(path)
+            emotions, confidences, gestures = reclassify(log)
+            total_frames += len(log)
+            # Held results repeat on frames where a model was skipped; only count fresh ones
+            fresh = log.records['fresh']
+            mesh_bit, hands_bit = (1 << log.model_names.index(name) for name in ("face_mesh", "hands"))
+            emotion_counts = Counter(e for e, bits in zip(emotions, fresh) if e and bits & mesh_bit)
+            gesture_counts = Counter(g for g, bits in zip(gestures, fresh) if g and bits & hands_bit)
+            print(f"🎞️  {path}: {len(log)} frames over {log.duration:.1f}s, {len(log.rounds())} rounds")
+            print(f"  😀 emotions: {dict(emotion_counts.most_common())}")
+            print(f"  ✋ gestures: {dict(gesture_counts.most_common())}")
+            if out:
+                for i in range(len(log)):
+                    out.write(json.dumps({
+                        'log': path, 'frame': i, 't': round(float(log.times[i]), 4), 'phase': log.phase(i),
+                        'models': sorted(log.fresh(i)), 'events': log.events(i),
+                        'emotion': emotions[i], 'confidence': round(confidences[i], 3), 'gesture': gestures[i],
+                    }) + "\n")
+            log.close()
+    finally:
+        if out:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {total_frames} frames re-classified in {elapsed:.2f}s "
+          f"({total_frames / elapsed if elapsed > 0 else 0:.0f} frames/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
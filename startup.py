@@ -0,0 +1,90 @@
+"""
+Start-up timing and background loading.
+
+A kiosk cares about one number: how long after launch the game is playable.
+StartupTimer splits that time into the phases start-up goes through, so a
+slow camera driver or a slow model load shows up by name. BackgroundTask runs
+slow set-up work (importing MediaPipe and building the models) on a thread
+while the main thread opens the camera.
+"""
+import os
+import threading
+import time
+
+
+def process_age():
+    """Seconds since this process was started (interpreter start-up and imports), or None if unknown"""
+    try:
+        import psutil
+        return max(0.0, time.time() - psutil.Process(os.getpid()).create_time())
+    except ImportError:
+        pass
+    try:
+        # Linux without psutil: process start and uptime, both counted from boot
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupTimer:
+    """Consecutive start-up phases, each ended by mark()"""
+
+    def __init__(self):
+        self.phases = []        # (name, seconds) in the order they happened
+        self.background = []    # (name, seconds) of work that overlapped the phases
+        imports = process_age()
+        if imports is not None:
+            self.phases.append(("imports", imports))
+        self._last = time.perf_counter()
+
+    def mark(self, name):
+        """End the current phase and name it"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def add_background(self, name, seconds):
+        self.background.append((name, seconds))
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.phases)
+
+    def report(self):
+        phases = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases)
+        text = f"Playable {self.total:.2f}s after launch: {phases}"
+        if self.background:
+            text += " (in background: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.background) + ")"
+        return text
+
+
+class BackgroundTask(threading.Thread):
+    """Runs fn(*args) on a daemon thread; result() waits for it and re-raises its error"""
+
+    def __init__(self, name, fn, *args):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.args = args
+        self.seconds = None
+        self._value = None
+        self._error = None
+        self.start()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self._value = self.fn(*self.args)
+        except BaseException as exc:
+            self._error = exc
+        finally:
+            self.seconds = time.perf_counter() - start
+
+    def result(self):
+        self.join()
+        if self._error is not None:
+            raise self._error
+        return self._value
@@ -0,0 +1,258 @@
+"""
+Several game stations served by one process.
+
+A Station owns everything one camera's game needs: the capture device, its
+threaded capture/inference pipeline, its own model instances, the game
+session and the HUD. A StationServer starts any number of stations and
+runs their render loops round-robin on the main thread (the only thread
+allowed to open windows), printing per-station FPS and capture-to-display
+latency so you can see how many stations one machine can carry.
+
+    python station.py 0 1 2                          # three cameras
+    python station.py a.mp4 b.mp4 c.mp4 --headless --duration 60 --json stations.json
+
+Video files make repeatable capacity tests: each one is read as fast as the
+station can take frames, like a camera that never waits. Rounds restart on
+their own `restart_after` seconds after a result, so every station keeps
+playing (and running its models) for the whole run; in windowed mode the
+keys 1-9 also restart that station's round at once.
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+
+from audio import AudioEngine
+from camera_probe import CAMERA_BACKEND, discover_cameras
+from frame_analysis import create_analyzer
+from frame_pipeline import FramePipeline
+from game_engine import CAPTURE, COUNTDOWN_TICK, ROUND_DECIDED
+from game_session import GameSession
+from hud import GameRenderer
+from opponents import OPPONENTS, create_opponent
+from session_recorder import SessionRecorder
+
+
+def open_capture(source, resolution=None, warmup_reads=5):
+    """Open a camera index or a video file, optionally at a resolution, and read until the first good frame"""
+    if isinstance(source, int):
+        cap = cv2.VideoCapture(source, CAMERA_BACKEND)
+        if resolution:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+    else:
+        cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {source}")
+    if isinstance(source, int):
+        for _ in range(warmup_reads):
+            if cap.read()[0]:
+                break
+    return cap
+
+
+class Station:
+    """One camera, its models and its game"""
+
+    def __init__(self, name, source, resolution=None, inference_height=480, parallel=True,
+                 hand_roi_tracking=True, audio_backend="null", processes=False, record_path=None, opponent="random",
+                 restart_after=2.0):
+        self.name = name
+        self.source = source
+        self.cap = open_capture(source, resolution)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        self.renderer = GameRenderer(self.width)
+        self.session = GameSession(opponent=create_opponent(opponent))
+        self.audio = AudioEngine(audio_backend)
+        # Per-station model instances: MediaPipe graphs keep tracking state, so they cannot be shared.
+        # With processes=True they live in worker processes and frames reach them through shared memory
+        self.analyzer = create_analyzer(processes, parallel, hand_roi_tracking)
+        self.pipeline = FramePipeline(self.cap, self._run_models, inference_height=inference_height,
+                                      frame_buffer=self.analyzer.frame_buffer)
+        self.recorder = None
+        if record_path:
+            self.recorder = SessionRecorder(record_path, metadata={'station': name, 'source': str(source)})
+        self.frames = 0
+        self.restart_after = restart_after  # Seconds a result stays up before the next round (None = never)
+        self._decided_at = None
+
+    def _run_models(self, packet):
+        return self.analyzer.process(packet.rgb, packet.capture_time, self.session.phase(time.time()))
+
+    def start(self):
+        self.pipeline.start()
+
+    def alive(self):
+        return self.pipeline.alive()
+
+    def restart_round(self):
+        self.session.restart_round()
+        self._decided_at = None
+
+    def step(self, timeout=0.0):
+        """Advance the game with the newest processed frame and return the frame to show, or None"""
+        # A station may have no one at its keyboard, so rounds restart after a pause
+        now = time.time()
+        if (not self.session.round_active and self.restart_after is not None and
+                self._decided_at is not None and now - self._decided_at >= self.restart_after):
+            self.restart_round()
+
+        packet = self.pipeline.next_packet(timeout)
+        if packet is None:
+            return None
+        now = time.time()
+        events = self.session.update(packet.results, now)
+        if ROUND_DECIDED in events:
+            self._decided_at = now
+        if self.recorder:
+            self.recorder.record(now, packet.results, events)
+        if COUNTDOWN_TICK in events:
+            self.audio.play("go" if CAPTURE in events else "tick")
+        frame = self.renderer.render(packet.frame, packet.results, self.session, events, now)
+        self.pipeline.mark_displayed(packet)
+        self.frames += 1
+        return frame
+
+    def report(self):
+        stats = self.pipeline.stats
+        return {
+            'name': self.name,
+            'source': self.source,
+            'resolution': [self.width, self.height],
+            'frames': self.frames,
+            'fps': {stage: stats.fps(stage) for stage in ("capture", "inference", "render")},
+            'latency_ms': {'p50': stats.latency_ms('display', 50), 'p95': stats.latency_ms('display', 95)},
+            'dropped': {name: q.dropped for name, q in self.pipeline.queues.items()},
+            'rounds': self.session.rounds_played,
+        }
+
+    def summary(self):
+        return f"{self.name}: {self.pipeline.stats.summary(self.pipeline.queues)}"
+
+    def close(self):
+        self.pipeline.stop()
+        self.analyzer.close()
+        self.audio.close()
+        if self.recorder:
+            self.recorder.close()
+        self.cap.release()
+
+
+class StationServer:
+    """Runs several stations' render loops round-robin on the calling thread"""
+
+    def __init__(self, stations, show=True, stats_interval=5.0):
+        self.stations = stations
+        self.show = show
+        self.stats_interval = stats_interval
+
+    def run(self, duration=None):
+        """
+        Serve until 'q', until every source has ended, or for `duration` seconds; returns per-station reports.
+        In windowed mode the keys 1-9 restart that station's round.
+        """
+        for station in self.stations:
+            station.start()
+        start = last_stats = time.perf_counter()
+        try:
+            while True:
+                active = [station for station in self.stations if station.alive()]
+                if not active:
+                    break
+                shown = 0
+                for station in active:
+                    frame = station.step()
+                    if frame is not None:
+                        shown += 1
+                        if self.show:
+                            cv2.imshow(f"Rock Paper Scissors - {station.name}", frame)
+
+                if self.show:
+                    key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
+                        break
+                    if ord('1') <= key <= ord('9') and key - ord('1') < len(self.stations):
+                        self.stations[key - ord('1')].restart_round()
+                elif not shown:
+                    time.sleep(0.001)   # Nothing was ready; do not spin a core while headless
+
+                now = time.perf_counter()
+                if now - last_stats >= self.stats_interval:
+                    for station in self.stations:
+                        print(f"📊 {station.summary()}")
+                    last_stats = now
+                if duration is not None and now - start >= duration:
+                    break
+        finally:
+            reports = [station.report() for station in self.stations]
+            for station in self.stations:
+                station.close()
+            if self.show:
+                cv2.destroyAllWindows()
+        return reports
+
+
+def parse_source(text):
+    return int(text) if text.isdigit() else text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve several Rock Paper Scissors stations from one process")
+    parser.add_argument("sources", nargs="+", help="Camera indices or video files, one per station")
+    parser.add_argument("--headless", action="store_true", help="Do not open windows (capacity testing)")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--inference-height", type=int, default=480, help="Inference frame height (0 = full size)")
+    parser.add_argument("--serial", action="store_true", help="Run each station's models one after another")
+    parser.add_argument("--processes", action="store_true", help="Run each station's models in worker processes")
+    parser.add_argument("--audio", default="null", help="Audio backend for the stations (default: silent)")
+    parser.add_argument("--json", help="Write the per-station report to this file")
+    parser.add_argument("--record", help="Directory for per-station landmark logs (see session_recorder.py)")
+    parser.add_argument("--opponent", choices=sorted(OPPONENTS), default="random", help="Computer strategy at every station")
+    parser.add_argument("--restart-after", type=float, default=2.0,
+                        help="Seconds before a station starts a new round after a result (negative = never)")
+    args = parser.parse_args()
+
+    sources = [parse_source(text) for text in args.sources]
+    probed = {}
+    if any(isinstance(source, int) for source in sources):
+        probed = {camera['index']: camera for camera in discover_cameras()}
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    stations = []
+    for i, source in enumerate(sources):
+        camera = probed.get(source) if isinstance(source, int) else None
+        resolution = camera['resolutions'][0] if camera and camera.get('resolutions') else None
+        station = Station(f"station {i + 1}", source, resolution, args.inference_height or None,
+                          parallel=not args.serial, audio_backend=args.audio, processes=args.processes,
+                          record_path=os.path.join(args.record, f"station{i + 1}.rpslog") if args.record else None,
+                          opponent=args.opponent,
+                          restart_after=args.restart_after if args.restart_after >= 0 else None)
+        print(f"🕹️  {station.name}: {source} at {station.width}x{station.height}")
+        stations.append(station)
+    if not args.headless:
+        print(f"Press 'q' to quit, 1-{min(len(stations), 9)} to restart a station's round")
+
+    reports = StationServer(stations, show=not args.headless).run(args.duration)
+
+    print("\n📋 Per-station results:")
+    for report in reports:
+        fps = report['fps']
+        print(f"  {report['name']}: render {fps['render']:.1f} fps (capture {fps['capture']:.1f}, "
+              f"inference {fps['inference']:.1f}) | latency p50 {report['latency_ms']['p50']:.0f} ms, "
+              f"p95 {report['latency_ms']['p95']:.0f} ms | {report['frames']} frames")
+    total = sum(report['fps']['render'] for report in reports)
+    print(f"  total: {total:.1f} fps across {len(reports)} stations")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'stations': reports, 'total_render_fps': total}, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Temporal smoothing for per-frame classifications.
+
+A single noisy frame should not decide a round or flip the displayed emotion.
+Each filter keeps an exponential moving average of the classifier features,
+classifies the smoothed features, and only commits a label once it wins K of
+the last N frames. It also records how long each lock took after the label
+first appeared, so responsiveness can be traded against misfires knowingly.
+"""
+from collections import deque
+
+import numpy as np
+
+from inference_scheduler import percentile_ms
+from landmark_features import EMOTIONS, FINGER_BITS, GESTURE_PATTERNS, classify_emotions, emotion_features, finger_states
+
+
+class VoteFilter:
+    """K-of-N agreement over a ring buffer of smoothed per-frame labels"""
+
+    def __init__(self, classify_fn, window=5, required=3, ema_alpha=0.6):
+        if not 1 <= required <= window:
+            raise ValueError(f"required ({required}) must be between 1 and window ({window})")
+        self.classify_fn = classify_fn      # Smoothed features -> label (or None)
+        self.window = window
+        self.required = required
+        self.ema_alpha = ema_alpha          # Weight of the newest frame in the moving average
+        self.committed = None
+        self.lock_latencies = deque(maxlen=200)
+        self.lock_frames = deque(maxlen=200)
+        self.reset()
+
+    def reset(self):
+        """Forget all history, e.g. when a new round starts"""
+        self._labels = deque(maxlen=self.window)
+        self._ema = None
+        self.committed = None
+
+    def _smooth(self, features):
+        if self._ema is None:
+            self._ema = {name: np.asarray(value, dtype=np.float32) for name, value in features.items()}
+        else:
+            a = self.ema_alpha
+            for name, value in features.items():
+                self._ema[name] = a * np.asarray(value, dtype=np.float32) + (1 - a) * self._ema[name]
+        return self._ema
+
+    def update(self, features, timestamp):
+        """
+        Add one frame's features (None when nothing was detected).
+        Returns the label committed on this frame, or None.
+        """
+        if features is None:
+            # A gap breaks the moving average; the ring buffer still counts it as a vote for nothing
+            self._ema = None
+            self._labels.append((None, timestamp))
+            return None
+
+        label = self.classify_fn(self._smooth(features))
+        self._labels.append((label, timestamp))
+        if label is None or label == self.committed:
+            return None
+
+        votes = [i for i, (vote, _) in enumerate(self._labels) if vote == label]
+        if len(votes) < self.required:
+            return None
+
+        # Onset is the oldest frame in the window that already showed this label
+        self.committed = label
+        self.lock_latencies.append(timestamp - self._labels[votes[0]][1])
+        self.lock_frames.append(len(self._labels) - votes[0])
+        return label
+
+    def latency_summary(self):
+        if not self.lock_latencies:
+            return f"no locks yet ({self.required} of {self.window} frames)"
+        return (f"lock latency p50 {percentile_ms(self.lock_latencies, 50):.0f} ms, "
+                f"p95 {percentile_ms(self.lock_latencies, 95):.0f} ms, "
+                f"{np.mean(self.lock_frames):.1f} frames ({self.required} of {self.window} frames)")
+
+
+def _classify_smoothed_gesture(features):
+    states = features['finger_states'] > 0.5
+    return GESTURE_PATTERNS.get(int((states * FINGER_BITS).sum()))
+
+
+def _classify_smoothed_emotion(features):
+    labels, _ = classify_emotions(features)
+    return EMOTIONS[int(labels)]
+
+
+def gesture_filter(window=5, required=3, ema_alpha=0.6):
+    """Filter over finger-up states; the average is a per-finger 'up' probability"""
+    return VoteFilter(_classify_smoothed_gesture, window, required, ema_alpha)
+
+
+def emotion_filter(window=7, required=4, ema_alpha=0.5):
+    """Filter over the emotion features computed from the face mesh"""
+    return VoteFilter(_classify_smoothed_emotion, window, required, ema_alpha)
+
+
+def probability_filter(classifier, window=5, required=3, ema_alpha=0.6):
+    """Filter over a learned classifier's class probabilities (see learned_classifiers.py)"""
+    return VoteFilter(lambda features: classifier.label_of(features['probs']), window, required, ema_alpha)
+
+
+def probability_observation(classifier, arrays):
+    """Filter input for one frame: class probabilities of the first hand or face, or None"""
+    if not arrays:
+        return None
+    return {'probs': classifier.predict_proba(arrays[:1])[0]}
+
+
+def gesture_observation(hand_arrays):
+    """Filter input for one frame: finger states of the first hand, or None"""
+    if not hand_arrays:
+        return None
+    return {'finger_states': finger_states(hand_arrays[0]).astype(np.float32)}
+
+
+def emotion_observation(face_arrays):
+    """Filter input for one frame: emotion features of the first face, or None"""
+    if not face_arrays:
+        return None
+    return emotion_features(face_arrays[0])
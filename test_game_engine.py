@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+
+from game_engine import (CAPTURE, COUNTDOWN, COUNTDOWN_STARTED, COUNTDOWN_TICK, DRAW, LOSS, MOVES, REACTION_TEXT,
+                         ROUND_DECIDED, WIN, GameEngine, decide_winner, get_emotion_reaction, round_result)
+from landmark_features import EMOTIONS
+from opponents import create_opponent
+
+
+def test_event_order():
+    engine = GameEngine(countdown_duration=3)
+    assert engine.observe(0.0, False) == []
+    assert engine.observe(0.0, True) == [COUNTDOWN_STARTED, COUNTDOWN_TICK, COUNTDOWN]
+    assert engine.observe(0.5, True) == [COUNTDOWN]
+    assert engine.observe(1.0, True) == [COUNTDOWN_TICK, COUNTDOWN]
+    assert engine.observe(2.0, True) == [COUNTDOWN_TICK, COUNTDOWN]
+    assert engine.observe(3.0, True) == [COUNTDOWN_TICK, CAPTURE]
+    assert engine.observe(3.2, True) == [CAPTURE]     # Nothing locked yet
+    assert engine.observe(3.4, True, "rock") == [CAPTURE, ROUND_DECIDED]
+    assert engine.rounds_played == 1 and not engine.round_active
+    assert engine.observe(3.5, True, "rock") == []   # The result stays up until a restart
+
+
+def test_timer_advance_between_frames():
+    engine = GameEngine(countdown_duration=3)
+    engine.observe(10.0, True)
+    assert engine.next_deadline() == 11.0
+    assert engine.advance(11.0) == [COUNTDOWN_TICK, COUNTDOWN]
+    assert engine.next_deadline() == 12.0
+    engine.advance(12.0)
+    assert engine.next_deadline() == 13.0
+    assert engine.advance(13.0) == [COUNTDOWN_TICK, CAPTURE]
+    assert engine.next_deadline() is None
+
+
+def test_scoring_table():
+    expected = {
+        ("rock", "rock"): "Draw!", ("rock", "paper"): "Computer Wins!", ("rock", "scissors"): "You Win!",
+        ("paper", "rock"): "You Win!", ("paper", "paper"): "Draw!", ("paper", "scissors"): "Computer Wins!",
+        ("scissors", "rock"): "Computer Wins!", ("scissors", "paper"): "You Win!", ("scissors", "scissors"): "Draw!",
+    }
+    for (player, computer), result in expected.items():
+        assert decide_winner(player, computer) == result
+    assert [round_result(1, 0), round_result(0, 1), round_result(2, 2)] == [WIN, LOSS, DRAW]
+
+
+def test_play_rounds_matches_decide_round():
+    rng = np.random.default_rng(0)
+    player_moves = rng.integers(0, 3, 500, dtype=np.int8)
+    emotions = rng.integers(0, len(EMOTIONS), 500, dtype=np.int8)
+
+    for opponent in (None, "mix"):
+        batch = GameEngine(rng=random.Random(1), opponent=opponent and create_opponent(opponent))
+        computer_moves, results, reactions = batch.play_rounds(player_moves, emotions)
+
+        # Against the same opponent the computer must pick the same moves round by round
+        single = GameEngine(rng=random.Random(1), opponent=opponent and create_opponent(opponent))
+        for i, player in enumerate(player_moves):
+            single.current_emotion = EMOTIONS[emotions[i]]
+            given = MOVES[computer_moves[i]] if opponent is None else None
+            basic = single.decide_round(MOVES[player], given)
+            assert single.computer_move == MOVES[computer_moves[i]]
+            assert basic == decide_winner(MOVES[player], MOVES[computer_moves[i]])
+            assert round_result(player, computer_moves[i]) == results[i]
+            assert REACTION_TEXT[reactions[i]] == get_emotion_reaction(EMOTIONS[emotions[i]], basic)
+            assert single.result_text == REACTION_TEXT[reactions[i]]
+
+        assert (batch.player_score, batch.computer_score, batch.rounds_played) == \
+               (single.player_score, single.computer_score, single.rounds_played)
+        assert (batch.player_move, batch.computer_move, batch.result_text) == \
+               (single.player_move, single.computer_move, single.result_text)
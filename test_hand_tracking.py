@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from hand_tracking import HandRoiTracker
+
+
+class FakeHands:
+    """Stands in for MediaPipe Hands: always finds one small hand in the middle of what it is given"""
+
+    def __init__(self):
+        self.shapes = []
+
+    def process(self, rgb):
+        self.shapes.append(rgb.shape)
+        landmarks = [SimpleNamespace(x=x, y=y, z=0.0) for x, y in ((0.45, 0.45), (0.55, 0.55))]
+        return SimpleNamespace(multi_hand_landmarks=[SimpleNamespace(landmark=landmarks)])
+
+
+def test_frame_size_change_mid_track():
+    hands = FakeHands()
+    tracker = HandRoiTracker(hands)
+    large = np.zeros((480, 853, 3), np.uint8)
+    small = np.zeros((360, 640, 3), np.uint8)
+
+    tracker.process(large)
+    tracker.process(large)
+    assert tracker.roi_runs == 1     # The second frame ran on a crop of the first frame's hand
+
+    results = tracker.process(small)
+    assert results.multi_hand_landmarks
+    assert hands.shapes[-1] == small.shape      # The old ROI was dropped, so the new frame ran in full
+
+    tracker.process(small)
+    assert tracker.roi_runs == 2
+    x0, y0, x1, y1 = tracker._roi
+    assert x1 <= 640 and y1 <= 360
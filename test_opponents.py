@@ -0,0 +1,42 @@
+import random
+
+import numpy as np
+
+import opponents
+from opponents import OPPONENTS, DecayingCounts, create_opponent, play_match
+
+
+def eager_counts(updates, rows, decay):
+    """Reference: shrink every count by `decay` before each new round is added"""
+    counts = np.zeros((rows, 3))
+    for row, move in updates:
+        counts *= decay
+        counts[row, move] += 1
+    return counts
+
+
+def test_lazy_decay_matches_eager(monkeypatch):
+    # A low rescale threshold makes the rescaling path run many times
+    monkeypatch.setattr(opponents, "RESCALE_AT", 1e3)
+    rng = random.Random(0)
+    decay = 0.9
+    updates = [(rng.randrange(4), rng.randrange(3)) for _ in range(2000)]
+    table = DecayingCounts(4, decay)
+    for n, (row, move) in enumerate(updates, 1):
+        table.add(row, move)
+        if n % 97 == 0 or n == len(updates):
+            # Lazy counts are the eager ones scaled by the weight the next round would get
+            lazy = np.array(table.counts) / (table.weight * decay)
+            np.testing.assert_allclose(lazy, eager_counts(updates[:n], 4, decay), rtol=1e-9)
+    assert table.weight < opponents.RESCALE_AT
+
+
+def test_play_match_is_deterministic():
+    def player(last_player, last_computer, rng):
+        return rng.randrange(3) if rng.random() < 0.5 else 0
+
+    for name in OPPONENTS:
+        first = play_match(create_opponent(name), player, 3000, random.Random(7))
+        second = play_match(create_opponent(name), player, 3000, random.Random(7))
+        assert first == second
+        assert sum(first) == 3000
@@ -0,0 +1,41 @@
+import numpy as np
+
+from game_engine import COUNTDOWN_STARTED, COUNTDOWN_TICK
+from session_recorder import FACE_POINTS, HAND_POINTS, MESH_POINTS, SessionLog, SessionRecorder
+
+
+def test_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "session.rpslog")
+    frames = [
+        # (timestamp, phase, faces, hands, fresh, events)
+        (0.0, "idle", [rng.random((FACE_POINTS, 3), np.float32)], [], {"face_mesh"}, []),
+        (0.1, "countdown", [rng.random((MESH_POINTS, 3), np.float32), rng.random((FACE_POINTS, 3), np.float32)],
+         [rng.random((HAND_POINTS, 3), np.float32)], {"face_mesh", "hands"}, [COUNTDOWN_STARTED, COUNTDOWN_TICK]),
+        (0.2, "capture", [], [rng.random((HAND_POINTS, 3), np.float32) for _ in range(2)], {"hands"}, []),
+    ]
+
+    recorder = SessionRecorder(path, max_faces=2, max_hands=2)
+    for timestamp, phase, faces, hands, fresh, events in frames:
+        recorder.record(timestamp, {'phase': phase, 'face_arrays': faces, 'hand_arrays': hands, 'fresh': fresh},
+                        events)
+    recorder.close()
+    assert recorder.error is None and recorder.recorded == len(frames)
+
+    log = SessionLog(path)
+    assert len(log) == len(frames)
+    for i, (timestamp, phase, faces, hands, fresh, events) in enumerate(frames):
+        assert log.times[i] == timestamp
+        assert log.phase(i) == phase
+        assert log.fresh(i) == fresh
+        assert log.events(i) == events
+        read_faces, read_hands = log.face_arrays(i), log.hand_arrays(i)
+        # Faces stored without iris points come back with 468 rows, the others with 478
+        assert [face.shape for face in read_faces] == [face.shape for face in faces]
+        assert [hand.shape for hand in read_hands] == [hand.shape for hand in hands]
+        for written, read in zip(faces + hands, read_faces + read_hands):
+            # float16 offsets below 1 keep about 3 decimal digits
+            np.testing.assert_allclose(read, written, atol=1e-3)
+    assert log.records['no_iris'].tolist() == [0, 1, 0]
+    assert log.with_event(COUNTDOWN_STARTED).tolist() == [1]
+    log.close()